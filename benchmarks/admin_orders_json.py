@@ -0,0 +1,84 @@
+"""
+Benchmark de GET /admin/orders: encodage FastAPI par défaut vs résumés pré-encodés
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.admin_orders_json            # 10 000 commandes, 200 requêtes par mesure
+    python -m benchmarks.admin_orders_json 50000 100  # commandes, requêtes par mesure
+
+Les deux variantes servent les mêmes commandes (dépôt mémoire, statuts actifs répartis):
+- avant: l'endpoint retourne un dict de résumés, encodé par FastAPI (jsonable_encoder + json.dumps)
+- après: GET /admin/orders de l'application, résumés pré-encodés insérés tels quels
+Mesuré avec limit=50 (dashboard) et limit=2500 (colonnes complètes).
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+os.environ["ORDER_STORE"] = "memory"  # avant l'import de l'application: ne pas toucher orders.db
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from benchmarks.order_memory import build_order
+from src import main
+from src.models import ACTIVE_STATUSES
+
+LIMITS = [50, 2500]
+
+
+def build_before_app() -> FastAPI:
+    """Endpoint tel qu'avant les réponses pré-encodées"""
+    before = FastAPI()
+
+    @before.get("/admin/orders")
+    def get_admin_orders(limit: int = 50, offset: int = 0) -> dict:
+        counts = main.orders_db.count_by_status()
+        return {
+            "total_orders": sum(counts.values()),
+            "counts": counts,
+            "archived_orders": main.order_archive.count(),
+            "orders_by_status": {
+                column.value: main.orders_db.summaries_by_status(column, offset, limit)
+                for column in ACTIVE_STATUSES
+            },
+            "limit": limit,
+            "offset": offset
+        }
+
+    return before
+
+
+def measure(client: TestClient, limit: int, requests: int) -> float:
+    """Millisecondes par requête"""
+    client.get("/admin/orders", params={"limit": limit})  # caches des résumés remplis
+    began = time.perf_counter()
+    for _ in range(requests):
+        client.get("/admin/orders", params={"limit": limit})
+    return (time.perf_counter() - began) / requests * 1000
+
+
+def main_benchmark():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    rng = random.Random(42)
+    start = datetime(2026, 1, 1)
+    main.orders_db.clear()
+    orders = [build_order(order_id, rng, start) for order_id in range(1, count + 1)]
+    for order in orders:
+        order.status = rng.choice(ACTIVE_STATUSES)
+    main.orders_db.add_many(orders)
+
+    before, after = TestClient(build_before_app()), TestClient(main.app)
+    assert before.get("/admin/orders").json() == after.get("/admin/orders").json()
+    print(f"{count:,} commandes, {requests} requêtes par mesure")
+    for limit in LIMITS:
+        before_ms = measure(before, limit, requests)
+        after_ms = measure(after, limit, requests)
+        print(f"limit={limit:<5} avant: {before_ms:7.2f} ms  après: {after_ms:7.2f} ms  gain: x{before_ms / after_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
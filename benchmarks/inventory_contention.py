@@ -0,0 +1,101 @@
+"""
+Benchmark de contention: verrou global d'inventaire vs verrous par ingrédient
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.inventory_contention          # 64 clients, 50 commandes chacun
+    python -m benchmarks.inventory_contention 128 100  # clients, commandes par client
+
+Les deux variantes réservent le même stock, persisté dans une base SQLite temporaire:
+- global: un asyncio.Lock tenu pendant la vérification, la réduction et le commit SQLite
+  (chemin de commande avant les verrous par ingrédient)
+- striped: AsyncInventory.reserve_order, verrous des seuls ingrédients de la commande,
+  commit attendu après les avoir relâchés (les commits concurrents sont regroupés)
+Les clients commandent des pizzas aux garnitures disjointes deux à deux (la pâte reste commune).
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from src import db
+from src.async_store import AsyncInventory, DatabaseExecutor
+from src.models import Pizza, PizzaCreate
+
+# Pizzas aux garnitures disjointes deux à deux
+DISJOINT_PIZZAS = {
+    "Margherita": ["basilic"],
+    "Pepperoni": ["pepperoni"],
+    "Reine": ["jambon", "champignons"],
+    "4 fromages": ["gorgonzola", "chèvre", "emmental"],
+    "Végétarienne": ["poivrons", "oignons", "olives"],
+}
+
+
+def build_orders():
+    """Une commande (PizzaCreate, Pizza) par pizza aux garnitures disjointes"""
+    orders = []
+    for name, toppings in DISJOINT_PIZZAS.items():
+        pizza_create = PizzaCreate(name=name, size="medium", toppings=toppings)
+        orders.append(([pizza_create], [Pizza.from_create(pizza_create)]))
+    return orders
+
+
+async def run_global(async_inventory: AsyncInventory, executor: DatabaseExecutor, orders, clients: int, per_client: int) -> float:
+    """Toutes les réservations sous un même verrou, commit compris"""
+    inventory = async_inventory.inventory
+    lock = asyncio.Lock()
+
+    def reduce_and_flush(pizzas):
+        inventory.reduce_inventory(pizzas)
+        inventory.flush()
+
+    async def client(index: int):
+        pizza_creates, pizzas = orders[index % len(orders)]
+        for _ in range(per_client):
+            async with lock:
+                can_fulfill, _ = inventory.can_fulfill_order(pizza_creates)
+                if can_fulfill:
+                    await executor.run(reduce_and_flush, pizzas)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    return time.perf_counter() - began
+
+
+async def run_striped(async_inventory: AsyncInventory, orders, clients: int, per_client: int) -> float:
+    """Réservations sous les verrous des ingrédients de chaque commande"""
+    async def client(index: int):
+        pizza_creates, pizzas = orders[index % len(orders)]
+        for _ in range(per_client):
+            await async_inventory.reserve_order(pizza_creates, pizzas)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    return time.perf_counter() - began
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    total = clients * per_client
+    orders = build_orders()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db.DB_PATH = os.path.join(directory, "inventory.db")
+        inventory = db.SQLiteInventoryManager()
+        inventory.ingredients = {ingredient: 10**9 for ingredient in inventory.AVAILABLE_INGREDIENTS}
+        inventory.flush()
+        executor = DatabaseExecutor()
+        async_inventory = AsyncInventory(inventory, executor)
+
+        global_seconds = asyncio.run(run_global(async_inventory, executor, orders, clients, per_client))
+        print(f"global:  {total:>7,} commandes en {global_seconds:6.2f}s ({total / global_seconds:8,.0f} commandes/s)")
+        striped_seconds = asyncio.run(run_striped(async_inventory, orders, clients, per_client))
+        print(f"striped: {total:>7,} commandes en {striped_seconds:6.2f}s ({total / striped_seconds:8,.0f} commandes/s)")
+        print(f"Gain: x{global_seconds / striped_seconds:.1f}")
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
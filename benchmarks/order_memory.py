@@ -0,0 +1,112 @@
+"""
+Benchmark mémoire: commandes stockées en OrderRecord compact vs modèles Pydantic
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.order_memory            # 1 000 000 commandes compactes
+    python -m benchmarks.order_memory 100000     # taille personnalisée
+
+Mesure la mémoire allouée (tracemalloc) par commande stockée dans le dépôt mémoire,
+comparée à un échantillon de modèles Order Pydantic complets.
+"""
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.models import Address, Order, Pizza, Price
+from src.repository import OrderRepository
+
+SKIP_GEOCODING = {"skip_geocoding": True}
+PYDANTIC_SAMPLE = 20_000
+TEMPLATES = 5_000
+
+STREETS = ["Rue Alsace-Lorraine", "Allée Jean Jaurès", "Place du Capitole", "Rue de Metz", "Boulevard de Strasbourg"]
+FIRST_NAMES = ["Jean", "Marie", "Paul", "Sophie", "Luc", "Emma", "Hugo", "Léa"]
+LAST_NAMES = ["Dupont", "Martin", "Bernard", "Petit", "Durand", "Leroy", "Moreau"]
+SIZES = list(Price.SIZE_MULTIPLIERS)
+EXTRAS = ["olives", "bacon", "poulet", "ananas", "oeuf"]
+
+
+def build_order(order_id: int, rng: random.Random, start: datetime) -> Order:
+    """Commande réaliste: 1 à 3 pizzas, clients et adresses répétés"""
+    pizzas = []
+    for _ in range(rng.randint(1, 3)):
+        name = rng.choice(Price.VALID_PIZZAS)
+        size = rng.choice(SIZES)
+        toppings = list(Price.BASE_TOPPINGS[name])
+        if rng.random() < 0.3:
+            toppings.append(rng.choice(EXTRAS))
+        pizzas.append(Pizza(name=name, size=size, toppings=toppings,
+                            price=Price.calculate_pizza_price(name, size, toppings)))
+    address = Address.model_validate(
+        {"street_number": str(rng.randint(1, 120)), "street": rng.choice(STREETS),
+         "city": "Toulouse", "postal_code": "31000"},
+        context=SKIP_GEOCODING,
+    )
+    return Order.model_validate(
+        {
+            "order_id": order_id,
+            "pizzas": pizzas,
+            "customer_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "customer_address": address,
+            "created_at": start + timedelta(seconds=order_id * 7, microseconds=rng.randint(0, 999_999)),
+        },
+        context=SKIP_GEOCODING,
+    )
+
+
+def measure_records(count: int) -> float:
+    """Octets par commande stockée dans le dépôt mémoire (enregistrements compacts)"""
+    rng = random.Random(42)
+    start = datetime(2026, 1, 1, 11, 0)
+    # Modèles construits hors mesure puis copiés: seul l'enregistrement compact reste en mémoire
+    templates = [build_order(order_id, rng, start) for order_id in range(1, TEMPLATES + 1)]
+    for template in templates:
+        template.customer_key  # Clé client calculée une fois par modèle
+    repository = OrderRepository()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    began = time.perf_counter()
+    for index in range(count):
+        order_id = repository.next_order_id()
+        order = templates[index % TEMPLATES].model_copy(update={
+            "order_id": order_id,
+            "created_at": start + timedelta(seconds=order_id * 7, microseconds=index % 1_000_000),
+        })
+        repository.add(order)
+    elapsed = time.perf_counter() - began
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    print(f"OrderRecord: {count:>9,} commandes, {used / 2**20:8.1f} Mo, "
+          f"{used / count:6.0f} octets/commande ({elapsed:.1f}s d'insertion)")
+    return used / count
+
+
+def measure_pydantic(count: int) -> float:
+    """Octets par commande conservée en modèle Order Pydantic (ancien stockage)"""
+    rng = random.Random(42)
+    start = datetime(2026, 1, 1, 11, 0)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    orders = {order_id: build_order(order_id, rng, start) for order_id in range(1, count + 1)}
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    print(f"Order:       {len(orders):>9,} commandes, {used / 2**20:8.1f} Mo, "
+          f"{used / count:6.0f} octets/commande")
+    return used / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    pydantic_bytes = measure_pydantic(min(count, PYDANTIC_SAMPLE))
+    record_bytes = measure_records(count)
+    print(f"Gain: x{pydantic_bytes / record_bytes:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compteurs d'activité (dashboard vendeur)
+
+Mis à jour par les abonnés du bus d'événements métier (voir background.py), hors du chemin
+des requêtes: commandes créées, chiffre d'affaires, pizzas vendues, changements de statut et
+mouvements de stock depuis le démarrage du serveur.
+"""
+import threading
+from collections import Counter
+from datetime import datetime
+
+
+class OrderAnalytics:
+    """Compteurs cumulés depuis le démarrage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Remet les compteurs à zéro"""
+        with self._lock:
+            self.started_at = datetime.now()
+            self.orders_created = 0
+            self.revenue = 0.0
+            self.pizzas_sold: Counter = Counter()
+            self.transitions: Counter = Counter()
+            # Unités sorties du stock (réservations) et remises en stock (annulations, réapprovisionnements)
+            self.ingredients_used: Counter = Counter()
+            self.ingredients_added: Counter = Counter()
+
+    def on_order_created(self, payload: dict) -> None:
+        """Abonné order.created"""
+        summary = payload["summary"]
+        with self._lock:
+            self.orders_created += 1
+            self.revenue += summary["total"]
+            self.pizzas_sold.update(pizza["name"] for pizza in summary["pizzas"])
+
+    def on_order_status_changed(self, payload: dict) -> None:
+        """Abonné order.status_changed"""
+        with self._lock:
+            self.transitions[payload["summary"]["status"]] += 1
+
+    def on_inventory_changed(self, payload: dict) -> None:
+        """Abonné inventory.changed"""
+        delta = payload["new_quantity"] - payload["old_quantity"]
+        with self._lock:
+            if delta < 0:
+                self.ingredients_used[payload["ingredient"]] -= delta
+            elif delta > 0:
+                self.ingredients_added[payload["ingredient"]] += delta
+
+    def snapshot(self) -> dict:
+        """Compteurs actuels"""
+        with self._lock:
+            return {
+                "since": self.started_at.isoformat(),
+                "orders_created": self.orders_created,
+                "revenue": round(self.revenue, 2),
+                "pizzas_sold": dict(self.pizzas_sold.most_common()),
+                "transitions": dict(self.transitions),
+                "ingredients_used": dict(self.ingredients_used.most_common()),
+                "ingredients_added": dict(self.ingredients_added.most_common()),
+            }
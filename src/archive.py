@@ -0,0 +1,305 @@
+"""
+Archivage des commandes terminées (stockage froid)
+
+Les commandes livrées ou annulées plus anciennes qu'un âge configurable sont retirées
+du dépôt chaud et écrites dans des segments NDJSON compressés (zlib), partitionnés
+par date de création:
+
+    archive/2026-10-19/orders-20261020T031500-<pid>-000001.ndjson.z
+
+Un petit index SQLite (order_id -> segment) permet de retrouver une commande archivée
+sans parcourir les segments; GET /orders/{order_id} la résout de façon transparente.
+
+Plusieurs workers partagent le même dossier d'archive: un seul d'entre eux archive à la fois
+(verrou exclusif sur archive/archiver.lock), et le nombre de commandes archivées est tenu
+dans l'index, donc identique pour tous les workers.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+from .models import Order
+from .repository import OrderRepository
+
+try:
+    import fcntl
+except ImportError:  # Windows: un seul worker, pas de verrou entre processus
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(__file__), "..", "archive"))
+# Âge (depuis la création) à partir duquel une commande terminée est archivée
+ARCHIVE_AFTER_HOURS = float(os.getenv("ARCHIVE_AFTER_HOURS", "24"))
+# Période de l'archiveur en tâche de fond
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "300"))
+# Nombre maximum de commandes archivées par passage (taille maximale d'un segment)
+ARCHIVE_BATCH_SIZE = 1000
+
+# Les commandes archivées ont été validées à leur création
+LOAD_CONTEXT = {"skip_geocoding": True}
+
+
+class OrderArchive:
+    """Stockage froid: segments NDJSON compressés + index order_id -> segment"""
+
+    # Nombre de segments décompressés gardés en mémoire
+    SEGMENT_CACHE_SIZE = 8
+
+    def __init__(self, root_dir: str = ARCHIVE_DIR):
+        """Crée le dossier d'archive et son index si besoin"""
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        self.index_path = os.path.join(root_dir, "index.db")
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._segments: "OrderedDict[str, Dict[int, bytes]]" = OrderedDict()
+        self._init_index()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index_path, timeout=10)
+
+    def _init_index(self):
+        """Crée la table d'index"""
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS archived_orders (
+                order_id INTEGER PRIMARY KEY,
+                segment TEXT NOT NULL,
+                customer_key TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_archived_customer ON archived_orders(customer_key);
+            CREATE TABLE IF NOT EXISTS archive_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            -- Le compteur ne peut jamais être en retard sur l'index existant
+            INSERT OR IGNORE INTO archive_stats (name, value)
+                SELECT 'archived_orders', COUNT(*) FROM archived_orders;
+            -- Une commande déjà indexée (archivée deux fois) est mise à jour sans être recomptée
+            CREATE TRIGGER IF NOT EXISTS count_archived_orders AFTER INSERT ON archived_orders
+            BEGIN
+                UPDATE archive_stats SET value = value + 1 WHERE name = 'archived_orders';
+            END;
+        """)
+        conn.commit()
+        conn.close()
+
+    def _next_segment_path(self, partition: str) -> str:
+        """Chemin relatif d'un nouveau segment dans la partition (date de création)"""
+        self._sequence += 1
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        return os.path.join(partition, f"orders-{stamp}-{os.getpid()}-{self._sequence:06d}.ndjson.z")
+
+    def append(self, orders: Iterable[Order]) -> int:
+        """
+        Écrit les commandes dans un segment par partition, puis les indexe.
+        Le segment est écrit (fichier temporaire + renommage) avant l'index: une commande
+        indexée est toujours lisible.
+        """
+        partitions: Dict[str, List[Order]] = {}
+        for order in orders:
+            partitions.setdefault(order.created_at.strftime("%Y-%m-%d"), []).append(order)
+
+        archived = 0
+        with self._lock:
+            for partition, partition_orders in partitions.items():
+                segment = self._next_segment_path(partition)
+                path = os.path.join(self.root_dir, segment)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+                payload = b"".join(order.model_dump_json().encode("utf-8") + b"\n" for order in partition_orders)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(zlib.compress(payload, 6))
+                os.replace(path + ".tmp", path)
+
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT INTO archived_orders (order_id, segment, customer_key, created_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(order_id) DO UPDATE SET segment = excluded.segment",
+                    [(order.order_id, segment, order.customer_key, order.created_at.isoformat()) for order in partition_orders],
+                )
+                conn.commit()
+                conn.close()
+                archived += len(partition_orders)
+        return archived
+
+    def _read_segment(self, segment: str) -> Dict[int, bytes]:
+        """Décompresse un segment (cache LRU): order_id -> ligne JSON"""
+        with self._lock:
+            lines = self._segments.get(segment)
+            if lines is not None:
+                self._segments.move_to_end(segment)
+                return lines
+
+        with open(os.path.join(self.root_dir, segment), "rb") as f:
+            payload = zlib.decompress(f.read())
+        lines = {json.loads(line)["order_id"]: line for line in payload.splitlines()}
+
+        with self._lock:
+            self._segments[segment] = lines
+            while len(self._segments) > self.SEGMENT_CACHE_SIZE:
+                self._segments.popitem(last=False)
+        return lines
+
+    def _load(self, order_id: int, segment: str) -> Optional[Order]:
+        """Relit une commande depuis son segment"""
+        line = self._read_segment(segment).get(order_id)
+        return Order.model_validate_json(line, context=LOAD_CONTEXT) if line is not None else None
+
+    def get(self, order_id: int) -> Optional[Order]:
+        """Retrouve une commande archivée via l'index (None si absente)"""
+        conn = self._connect()
+        row = conn.execute("SELECT segment FROM archived_orders WHERE order_id = ?", (order_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        return self._load(order_id, row[0])
+
+    def list_by_customer(self, customer_key: str, limit: int = 20) -> List[Order]:
+        """Commandes archivées d'un client via l'index sur customer_key, les plus récentes d'abord"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT order_id, segment FROM archived_orders WHERE customer_key = ? ORDER BY order_id DESC LIMIT ?",
+            (customer_key, limit),
+        ).fetchall()
+        conn.close()
+        orders = (self._load(order_id, segment) for order_id, segment in rows)
+        return [order for order in orders if order is not None]
+
+    def iter_orders(
+        self,
+        after: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+    ) -> Iterator[Order]:
+        """
+        Parcourt les commandes archivées d'identifiant > after, créées dans [since, until[,
+        par identifiant croissant (pagination keyset sur l'index, par lots)
+        """
+        conditions, params = ["order_id > ?"], [after if after is not None else 0]
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(until.isoformat())
+        query = f"SELECT order_id, segment FROM archived_orders WHERE {' AND '.join(conditions)} ORDER BY order_id LIMIT ?"
+        while True:
+            conn = self._connect()
+            rows = conn.execute(query, params + [batch_size]).fetchall()
+            conn.close()
+            for order_id, segment in rows:
+                order = self._load(order_id, segment)
+                if order is not None:
+                    yield order
+            if len(rows) < batch_size:
+                return
+            params[0] = rows[-1][0]
+
+    def count(self) -> int:
+        """Nombre de commandes archivées (compteur de l'index, partagé entre workers)"""
+        conn = self._connect()
+        count = conn.execute("SELECT value FROM archive_stats WHERE name = 'archived_orders'").fetchone()[0]
+        conn.close()
+        return count
+
+
+class OrderArchiver:
+    """
+    Tâche de fond qui déplace périodiquement les commandes terminées vers l'archive.
+
+    Chaque worker démarre un archiveur, mais seul celui qui détient le verrou exclusif du
+    dossier d'archive (archiver.lock) archive; les autres retentent à chaque période et
+    prennent le relais si ce worker s'arrête (le système libère le verrou).
+    """
+
+    def __init__(
+        self,
+        repository: OrderRepository,
+        archive: OrderArchive,
+        max_age: timedelta = timedelta(hours=ARCHIVE_AFTER_HOURS),
+        interval_seconds: float = ARCHIVE_INTERVAL_SECONDS,
+    ):
+        self.repository = repository
+        self.archive = archive
+        self.max_age = max_age
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+
+    def acquire_lock(self) -> bool:
+        """Prend (ou détient déjà) le verrou d'archivage du dossier, sans attendre"""
+        if self._lock_file is not None or fcntl is None:
+            return True
+        lock_file = open(os.path.join(self.archive.root_dir, "archiver.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"Archiveur actif dans le processus {os.getpid()}")
+        return True
+
+    def release_lock(self) -> None:
+        """Libère le verrou d'archivage (un autre worker peut prendre le relais)"""
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """Date de création avant laquelle une commande terminée est archivée"""
+        return (now or datetime.now()) - self.max_age
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """Archive toutes les commandes éligibles, par lots; retourne le nombre archivé"""
+        cutoff = self.cutoff(now)
+        total = 0
+        while True:
+            orders = self.repository.archivable_orders(cutoff, ARCHIVE_BATCH_SIZE)
+            if not orders:
+                break
+            self.archive.append(orders)
+            # Retirer du dépôt chaud seulement après écriture et indexation dans l'archive
+            for order in orders:
+                self.repository.remove(order.order_id)
+            total += len(orders)
+            if len(orders) < ARCHIVE_BATCH_SIZE:
+                break
+        if total:
+            logger.info(f"Archivage: {total} commandes terminées déplacées vers le stockage froid")
+        return total
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                if self.acquire_lock():
+                    self.run_once()
+            except Exception:
+                logger.exception("Erreur lors de l'archivage des commandes")
+
+    def start(self) -> None:
+        """Démarre l'archiveur dans un thread démon"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="order-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête l'archiveur"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.release_lock()
@@ -0,0 +1,128 @@
+"""
+Accès asynchrones au dépôt de commandes et à l'inventaire
+
+Les endpoints asynchrones n'appellent jamais SQLite depuis la boucle d'événements: chaque
+accès est exécuté sur un pool de threads dédié à la base, distinct du pool anyio des endpoints
+synchrones. Une rafale de requêtes lentes ailleurs (export, géocodage) ne prive donc pas le
+chemin de commande de threads, et la boucle reste libre pendant les écritures.
+"""
+import asyncio
+import functools
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, TypeVar
+from .batch import allocate_stock, ingredient_requirements
+from .locks import STOCK_LOCK_STRIPES, StripedLocks
+from .models import InventoryManager, Order, Pizza, PizzaCreate
+from .repository import OrderRepository
+
+# Nombre de threads du pool dédié à SQLite
+DB_EXECUTOR_THREADS = int(os.getenv("DB_EXECUTOR_THREADS", "4"))
+
+T = TypeVar("T")
+
+
+class DatabaseExecutor:
+    """Pool de threads dédié aux accès à la base des endpoints asynchrones"""
+
+    def __init__(self, max_workers: int = DB_EXECUTOR_THREADS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sqlite")
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Exécute func(*args) sur le pool de la base sans bloquer la boucle"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def shutdown(self) -> None:
+        """Attend la fin des accès en cours puis arrête le pool"""
+        self._executor.shutdown(wait=True)
+
+
+class AsyncOrderRepository:
+    """Vue asynchrone d'un OrderRepository (opérations du chemin de commande)"""
+
+    def __init__(self, repository: OrderRepository, executor: DatabaseExecutor):
+        self.repository = repository
+        self._executor = executor
+
+    async def next_order_id(self) -> int:
+        return await self._executor.run(self.repository.next_order_id)
+
+    async def next_order_ids(self, count: int) -> range:
+        return await self._executor.run(self.repository.next_order_ids, count)
+
+    async def add(self, order: Order) -> None:
+        await self._executor.run(self.repository.add, order)
+
+    async def add_many(self, orders: List[Order]) -> None:
+        await self._executor.run(self.repository.add_many, orders)
+
+
+class AsyncInventory:
+    """
+    Vue asynchrone des écritures de l'inventaire.
+
+    Chaque opération prend les verrous des seuls ingrédients concernés (verrous par bandes,
+    ordre canonique): des commandes sans ingrédient commun réservent leur stock en parallèle.
+    Sous les verrous, seuls la vérification et les changements en mémoire sont faits (mis en
+    file de l'écrivain SQLite); l'attente du commit se fait après les avoir relâchés, ou pas du
+    tout pour les réservations avec wait_for_commit=False (échecs d'écriture journalisés et réessayés).
+    """
+
+    def __init__(self, inventory: InventoryManager, executor: DatabaseExecutor, stripes: int = STOCK_LOCK_STRIPES):
+        self.inventory = inventory
+        self._executor = executor
+        # Ingrédients du menu et ingrédients chargés depuis la base (les autres clés sont hachées)
+        self.locks = StripedLocks(set(inventory.AVAILABLE_INGREDIENTS) | set(inventory.ingredients), stripes)
+
+    async def reserve_order(self, pizza_creates: List[PizzaCreate], pizzas: List[Pizza], wait_for_commit: bool = True) -> Optional[str]:
+        """Vérifie puis réserve le stock d'une commande: None si réservé, sinon le message de rupture"""
+        return await self._executor.run(self._reserve_order, pizza_creates, pizzas, wait_for_commit)
+
+    async def reserve_batch(self, requirements: List[Counter], pizzas: List[List[Pizza]], wait_for_commit: bool = True) -> List[Optional[str]]:
+        """Réserve le stock commande par commande dans l'ordre du lot: None ou message de rupture pour chacune"""
+        return await self._executor.run(self._reserve_batch, requirements, pizzas, wait_for_commit)
+
+    async def restore_inventory(self, pizzas: List[Pizza]) -> None:
+        await self._executor.run(self._restore_inventory, pizzas)
+
+    async def add_ingredient_stock(self, ingredient_name: str, quantity: int) -> Optional[int]:
+        """Réapprovisionne l'ingrédient: nouveau stock, None si l'ingrédient est inconnu"""
+        return await self._executor.run(self._add_ingredient_stock, ingredient_name, quantity)
+
+    def _reserve_order(self, pizza_creates: List[PizzaCreate], pizzas: List[Pizza], wait_for_commit: bool) -> Optional[str]:
+        # Quantités cumulées de toute la commande (trois pizzas demandent trois pâtes)
+        requirements = ingredient_requirements(pizza_creates)
+        with self.locks.acquire(requirements):
+            [error_message] = allocate_stock(self.inventory, [requirements])
+            if error_message is not None:
+                return error_message
+            self.inventory.reduce_inventory(pizzas)
+        if wait_for_commit:
+            self.inventory.flush()
+        return None
+
+    def _reserve_batch(self, requirements: List[Counter], pizzas: List[List[Pizza]], wait_for_commit: bool) -> List[Optional[str]]:
+        with self.locks.acquire(set().union(*requirements)):
+            errors = allocate_stock(self.inventory, requirements)
+            self.inventory.reduce_inventory(
+                [pizza for order_pizzas, error in zip(pizzas, errors) if error is None for pizza in order_pizzas]
+            )
+        if wait_for_commit:
+            self.inventory.flush()
+        return errors
+
+    def _restore_inventory(self, pizzas: List[Pizza]) -> None:
+        with self.locks.acquire(ingredient_requirements(pizzas)):
+            self.inventory.restore_inventory(pizzas)
+        self.inventory.flush()
+
+    def _add_ingredient_stock(self, ingredient_name: str, quantity: int) -> Optional[int]:
+        ingredient = ingredient_name.lower()
+        with self.locks.acquire([ingredient]):
+            if not self.inventory.add_ingredient_stock(ingredient, quantity):
+                return None
+            stock = self.inventory.get_ingredient_stock(ingredient)
+        self.inventory.flush()
+        return stock
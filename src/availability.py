@@ -0,0 +1,124 @@
+"""
+Matrice de disponibilité du menu (pizza × taille × topping)
+
+La matrice est calculée une fois au démarrage puis mise à jour incrémentalement:
+quand le stock d'un ingrédient franchit le seuil, seules les cellules qui dépendent
+de cet ingrédient sont recalculées. GET /pizzas/menu sert directement la vue maintenue.
+"""
+import threading
+from typing import Dict, List, Tuple
+from .models import InventoryManager, PizzaMenuPrice, Price
+
+# Tailles proposées au menu
+MENU_SIZES = ["small", "medium", "large"]
+
+# Pizzas du menu (nom affiché, toppings inclus de base)
+MENU_PIZZAS = [
+    ("Margherita", ["tomate", "mozzarella", "basilic"]),
+    ("Reine", ["tomate", "mozzarella", "jambon", "champignons"]),
+    ("4 Fromages", ["mozzarella", "gorgonzola", "chèvre", "emmental"]),
+    ("Calzone", ["tomate", "mozzarella", "jambon", "oeuf"]),
+    ("Végétarienne", ["tomate", "mozzarella", "poivrons", "oignons", "olives"]),
+    ("Pepperoni", ["tomate", "mozzarella", "pepperoni"]),
+]
+
+# Ingrédient consommé par chaque pizza, quels que soient ses toppings
+BASE_INGREDIENT = "pate"
+
+Cell = Tuple[str, str, str]  # (pizza, taille, topping)
+
+
+class MenuAvailability:
+    """
+    Disponibilité précalculée de chaque combinaison pizza × taille × topping.
+
+    Chaque cellule compte le nombre de ses ingrédients requis qui sont sous le seuil:
+    elle est disponible quand ce compteur vaut 0. Un index inverse ingrédient -> cellules
+    permet de ne toucher que les cellules concernées quand un stock franchit le seuil.
+    """
+
+    def __init__(self, inventory: InventoryManager, threshold: int = 1):
+        """Construit la matrice à partir de l'inventaire et s'abonne à ses changements"""
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.toppings = sorted(name for name in inventory.ingredients if name != BASE_INGREDIENT)
+
+        # Compteur d'ingrédients manquants par cellule, et par (pizza, taille) pour la base
+        self._missing: Dict[Cell, int] = {}
+        self._base_missing: Dict[Tuple[str, str], int] = {}
+        # Index inverse: ingrédient -> cellules et bases qui en dépendent
+        self._cells_by_ingredient: Dict[str, List[Cell]] = {}
+        self._bases_by_ingredient: Dict[str, List[Tuple[str, str]]] = {}
+        # Vue servie par l'API, modifiée en place
+        self._views: Dict[Tuple[str, str], dict] = {}
+        self.menu: List[PizzaMenuPrice] = []
+        # Incrémentée à chaque changement de disponibilité (ETag de GET /pizzas/menu)
+        self.version = 0
+
+        for pizza_name, base_toppings in MENU_PIZZAS:
+            base_required = {BASE_INGREDIENT, *base_toppings}
+            for size in MENU_SIZES:
+                self._base_missing[(pizza_name, size)] = 0
+                self._views[(pizza_name, size)] = {"available": True, "unavailable_toppings": []}
+                for ingredient in base_required:
+                    self._bases_by_ingredient.setdefault(ingredient, []).append((pizza_name, size))
+                for topping in self.toppings:
+                    cell = (pizza_name, size, topping)
+                    self._missing[cell] = 0
+                    for ingredient in base_required | {topping}:
+                        self._cells_by_ingredient.setdefault(ingredient, []).append(cell)
+
+            prices = {size: Price.calculate_pizza_price(pizza_name, size, base_toppings) for size in MENU_SIZES}
+            entry = PizzaMenuPrice(name=pizza_name, base_toppings=base_toppings, prices=prices)
+            # Partager les vues: les mises à jour de la matrice sont visibles sans reconstruire le menu
+            entry.availability = {size: self._views[(pizza_name, size)] for size in MENU_SIZES}
+            self.menu.append(entry)
+
+        with self._lock:
+            for ingredient, quantity in inventory.ingredients.items():
+                if quantity < self.threshold:
+                    self._apply_crossing(ingredient, below=True)
+        inventory.add_stock_listener(self.on_stock_change)
+
+    def on_stock_change(self, ingredient: str, old_quantity: int, new_quantity: int) -> None:
+        """Met à jour la matrice uniquement si le stock franchit le seuil"""
+        was_below = old_quantity < self.threshold
+        is_below = new_quantity < self.threshold
+        if was_below == is_below:
+            return
+        with self._lock:
+            self._apply_crossing(ingredient, below=is_below)
+
+    def _apply_crossing(self, ingredient: str, below: bool) -> None:
+        """Ajuste les compteurs des cellules dépendant de l'ingrédient (appelé sous le lock)"""
+        delta = 1 if below else -1
+
+        for pizza_name, size in self._bases_by_ingredient.get(ingredient, []):
+            self._base_missing[(pizza_name, size)] += delta
+            self._views[(pizza_name, size)]["available"] = self._base_missing[(pizza_name, size)] == 0
+
+        for cell in self._cells_by_ingredient.get(ingredient, []):
+            self._missing[cell] += delta
+            pizza_name, size, topping = cell
+            # Un topping n'est listé indisponible que s'il manque lui-même (la base est signalée à part)
+            if topping == ingredient:
+                unavailable = self._views[(pizza_name, size)]["unavailable_toppings"]
+                if below and topping not in unavailable:
+                    unavailable.append(topping)
+                    unavailable.sort()
+                elif not below and topping in unavailable:
+                    unavailable.remove(topping)
+        # Après la mise à jour des vues: une réponse n'est jamais associée à une version plus récente qu'elle
+        self.version += 1
+
+    def is_available(self, pizza_name: str, size: str, topping: str) -> bool:
+        """Indique si la combinaison pizza × taille × topping peut être commandée"""
+        return self._missing.get((pizza_name, size, topping), 0) == 0
+
+    def is_pizza_available(self, pizza_name: str, size: str) -> bool:
+        """Indique si la pizza avec ses toppings de base peut être commandée dans cette taille"""
+        return self._base_missing.get((pizza_name, size), 0) == 0
+
+    def get_menu(self) -> List[PizzaMenuPrice]:
+        """Retourne le menu avec sa disponibilité courante (aucun calcul par requête)"""
+        return self.menu
@@ -0,0 +1,162 @@
+"""
+Bus d'événements métier et workers de fond
+
+Les endpoints publient des événements métier (order.created, order.status_changed,
+inventory.changed) et répondent aussitôt; les abonnés (diffusion SSE, journalisation,
+compteurs) sont exécutés par un pool borné de BACKGROUND_WORKERS threads, hors du chemin
+de la requête.
+
+- les événements d'une même clé (order_id, ingrédient) sont traités par le même worker,
+  dans l'ordre de publication: une création n'est jamais comptée après le changement de
+  statut qui la suit
+- les abonnés ordonnés (subscribe(..., ordered=True), ex: diffusion aux dashboards) sont
+  exécutés par un worker dédié, dans l'ordre global de publication: les compteurs par statut
+  pris dans une section publishing() n'y reculent jamais
+- chaque file est bornée (BACKGROUND_QUEUE_SIZE) et la publication ne bloque jamais (elle est
+  appelée depuis la boucle asyncio): file pleine, l'événement est abandonné, compté, et les
+  abonnés de perte (add_drop_listener) sont prévenus pour resynchroniser leurs clients
+- l'exception d'un abonné est journalisée sans empêcher les autres abonnés de s'exécuter
+"""
+import itertools
+import logging
+import os
+import queue
+import threading
+from typing import Any, Callable, ContextManager, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Types d'événements métier
+ORDER_CREATED_EVENT = "order.created"
+ORDER_STATUS_CHANGED_EVENT = "order.status_changed"
+INVENTORY_CHANGED_EVENT = "inventory.changed"
+
+# Threads exécutant les abonnés (hors worker des abonnés ordonnés)
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "2"))
+# Événements en attente au plus par worker
+BACKGROUND_QUEUE_SIZE = int(os.getenv("BACKGROUND_QUEUE_SIZE", "10000"))
+
+Handler = Callable[[dict], Any]
+# Abonné de perte: type de l'événement abandonné (file pleine)
+DropListener = Callable[[str], None]
+
+
+class BackgroundBus:
+    """Publication d'événements métier, abonnés exécutés par un pool de workers borné"""
+
+    def __init__(self, workers: int = BACKGROUND_WORKERS, queue_size: int = BACKGROUND_QUEUE_SIZE):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._ordered_handlers: Dict[str, List[Handler]] = {}
+        self._drop_listeners: List[DropListener] = []
+        self._queues = [queue.Queue(queue_size) for _ in range(max(workers, 1))]
+        # File du worker des abonnés ordonnés, alimentée sous _ordered_lock
+        self._ordered_queue: "queue.Queue" = queue.Queue(queue_size)
+        self._ordered_lock = threading.RLock()
+        self._round_robin = itertools.count()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0  # abandonnés: file pleine à la publication
+        self.failed = 0
+        self._threads = [
+            threading.Thread(target=self._run, args=(events,), name=f"background-{index}", daemon=True)
+            for index, events in enumerate(self._queues)
+        ]
+        self._threads.append(
+            threading.Thread(target=self._run, args=(self._ordered_queue,), name="background-ordered", daemon=True)
+        )
+        for thread in self._threads:
+            thread.start()
+
+    def subscribe(self, event_type: str, handler: Handler, ordered: bool = False) -> None:
+        """
+        Abonne un handler(payload) au type d'événement (à la configuration, avant toute publication).
+        ordered: exécuté par le worker dédié, dans l'ordre global de publication
+        """
+        handlers = self._ordered_handlers if ordered else self._handlers
+        handlers.setdefault(event_type, []).append(handler)
+
+    def add_drop_listener(self, listener: DropListener) -> None:
+        """Abonne une fonction appelée (dans le thread qui publie) quand un événement est abandonné"""
+        self._drop_listeners.append(listener)
+
+    def publishing(self) -> ContextManager:
+        """
+        Section où l'état lu (ex: compteurs par statut) et sa publication forment un tout:
+        les abonnés ordonnés reçoivent les événements dans l'ordre des sections
+        """
+        return self._ordered_lock
+
+    def publish(self, event_type: str, payload: dict, key: Optional[Hashable] = None) -> None:
+        """
+        Publie un événement (appelable depuis n'importe quel thread, sans jamais bloquer).
+        Sans abonné, rien n'est mis en file.
+        key: les événements de même clé sont traités dans l'ordre de publication
+        """
+        handlers = self._handlers.get(event_type)
+        ordered_handlers = self._ordered_handlers.get(event_type)
+        if not handlers and not ordered_handlers:
+            return
+        with self._lock:
+            self.published += 1
+        if handlers:
+            index = hash(key) if key is not None else next(self._round_robin)
+            self._enqueue(self._queues[index % len(self._queues)], event_type, handlers, payload)
+        if ordered_handlers:
+            with self._ordered_lock:
+                self._enqueue(self._ordered_queue, event_type, ordered_handlers, payload)
+
+    def _enqueue(self, events: "queue.Queue", event_type: str, handlers: List[Handler], payload: dict) -> None:
+        """Met l'événement en file; file pleine: abandon compté, journalisé et signalé"""
+        try:
+            events.put_nowait((event_type, handlers, payload))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"File des événements pleine: {event_type} abandonné")
+            for listener in self._drop_listeners:
+                listener(event_type)
+
+    def _run(self, events: "queue.Queue") -> None:
+        while True:
+            item = events.get()
+            try:
+                if item is None:
+                    return
+                self._dispatch(*item)
+            finally:
+                events.task_done()
+
+    def _dispatch(self, event_type: str, handlers: List[Handler], payload: dict) -> None:
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                logger.exception(f"Échec de l'abonné {getattr(handler, '__name__', handler)} pour {event_type}")
+
+    def _all_queues(self) -> List["queue.Queue"]:
+        return [*self._queues, self._ordered_queue]
+
+    def flush(self) -> None:
+        """Attend que tous les événements publiés jusqu'ici soient traités"""
+        for events in self._all_queues():
+            events.join()
+
+    def close(self) -> None:
+        """Traite les événements en attente puis arrête les workers"""
+        for events in self._all_queues():
+            events.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self) -> dict:
+        """Compteurs du bus (supervision)"""
+        with self._lock:
+            return {
+                "workers": len(self._queues),
+                "queued": sum(events.qsize() for events in self._all_queues()),
+                "published": self.published,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
@@ -0,0 +1,117 @@
+"""
+Création de commandes en lot (POST /orders:batch), pour les commandes de traiteur / entreprise
+
+Par rapport à N appels à POST /orders:
+- chaque adresse distincte n'est géocodée qu'une fois (les géocodages restent séquentiels,
+  conformément à la politique d'usage de Nominatim, mais asynchrones: aucun thread n'est bloqué)
+- les prix sont calculés en une passe, une seule fois par combinaison pizza / taille / toppings
+- le stock est réservé pour tout le lot en une seule prise des verrous de ses ingrédients
+  (et un seul commit SQLite), les identifiants en une seule transaction
+
+Chaque commande du lot est acceptée ou rejetée individuellement.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from pydantic import ValidationError
+from .geocoding import geocode_address
+from .models import Address, InventoryManager, OrderCreate, Pizza, PizzaCreate, normalize_text
+
+# Nombre maximum de commandes par lot
+MAX_BATCH_SIZE = 100
+
+# Les adresses sont géocodées une fois par adresse distincte, après la validation des champs
+SKIP_GEOCODING = {"skip_geocoding": True}
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Message lisible pour une erreur de validation: 'champ.sous_champ: message; ...'"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors(include_url=False)
+    )
+
+
+def parse_order(payload: dict) -> Tuple[Optional[OrderCreate], Optional[str]]:
+    """Valide une commande du lot sans géocodage: (commande, None) ou (None, erreur)"""
+    try:
+        order_create = OrderCreate.model_validate(payload, context=SKIP_GEOCODING)
+    except ValidationError as e:
+        return None, format_validation_error(e)
+    if not order_create.pizzas:
+        return None, "La commande doit contenir au moins une pizza"
+    if not order_create.customer_name:
+        return None, "Le nom du client est obligatoire"
+    return order_create, None
+
+
+def address_key(address: Address) -> str:
+    """Clé de déduplication d'une adresse (texte normalisé)"""
+    return normalize_text(str(address))
+
+
+async def validate_addresses(addresses: Iterable[Address]) -> Dict[str, Optional[str]]:
+    """
+    Géocode chaque adresse distincte une seule fois: clé d'adresse -> erreur (None si valide).
+    Les adresses répétées reçoivent les coordonnées de la première.
+    """
+    results: Dict[str, Optional[str]] = {}
+    located: Dict[str, Address] = {}
+    for address in addresses:
+        key = address_key(address)
+        if key not in results:
+            results[key] = await geocode_address(address)
+            located[key] = address
+        else:
+            address.latitude, address.longitude = located[key].latitude, located[key].longitude
+    return results
+
+
+def price_pizzas(orders: Iterable[OrderCreate]) -> List[List[Pizza]]:
+    """Calcule le prix de toutes les pizzas du lot (une fois par combinaison distincte)"""
+    prices: Dict[tuple, float] = {}
+    priced_orders = []
+    for order_create in orders:
+        pizzas = []
+        for pizza_create in order_create.pizzas:
+            combination = (pizza_create.name, pizza_create.size, tuple(pizza_create.toppings))
+            price = prices.get(combination)
+            if price is None:
+                price = prices[combination] = Pizza.from_create(pizza_create).price
+            pizzas.append(Pizza.model_construct(
+                name=pizza_create.name, size=pizza_create.size, toppings=list(pizza_create.toppings), price=price
+            ))
+        priced_orders.append(pizzas)
+    return priced_orders
+
+
+def ingredient_requirements(pizzas: Iterable[PizzaCreate]) -> Counter:
+    """Quantité consommée de chaque ingrédient (une pâte par pizza, une unité par topping)"""
+    required: Counter = Counter()
+    for pizza in pizzas:
+        required["pate"] += 1
+        for topping in pizza.toppings:
+            required[topping.lower()] += 1
+    return required
+
+
+def allocate_stock(inventory: InventoryManager, requirements: List[Counter]) -> List[Optional[str]]:
+    """
+    Réserve le stock commande par commande, dans l'ordre du lot (à appeler sous les verrous des ingrédients).
+    Retourne pour chaque commande None (acceptée) ou le message de rupture de stock.
+    Contrairement à can_fulfill_order, les quantités déjà réservées par le lot sont décomptées.
+    """
+    reserved: Counter = Counter()
+    results: List[Optional[str]] = []
+    for required in requirements:
+        error = None
+        for ingredient, quantity in required.items():
+            if inventory.get_ingredient_stock(ingredient) - reserved[ingredient] < quantity:
+                error = (
+                    "La pâte est en rupture de stock" if ingredient == "pate"
+                    else f"L'ingrédient '{ingredient}' est en rupture de stock"
+                )
+                break
+        if error is None:
+            reserved.update(required)
+        results.append(error)
+    return results
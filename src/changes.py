@@ -0,0 +1,196 @@
+"""
+Journal des modifications pour la synchronisation différentielle (GET /changes)
+
+Chaque modification de commande ou de stock incrémente une séquence globale monotone et est
+inscrite dans un journal borné (ring buffer). Un client qui ne peut pas garder de connexion
+ouverte (SSE) envoie la dernière séquence reçue et ne relit que ce qui a changé depuis.
+Si le curseur est plus ancien que le journal (entrées écrasées, redémarrage), le client
+doit repartir d'un instantané complet.
+
+La séquence démarre à l'horloge du lancement (microsecondes): les curseurs émis avant un
+redémarrage sont toujours inférieurs au plancher du nouveau journal, donc détectés comme périmés.
+Le journal est propre au processus (comme le bus d'événements).
+
+Le journal donne aussi la version de chaque commande et de l'inventaire (séquence de leur
+dernière modification), utilisée pour les ETags et le long-polling de GET /orders/{id}/status.
+Les versions ne sont gardées que pour les clés encore présentes dans le journal: une clé dont
+la dernière entrée est écrasée prend pour version le plancher du journal, jamais inférieur à
+sa dernière modification ni à une version déjà donnée pour elle (pas de 304 périmé).
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Nombre maximum d'entrées conservées dans le journal
+CHANGELOG_SIZE = int(os.getenv("CHANGELOG_SIZE", "10000"))
+
+# Types d'entrées du journal
+ORDER_CHANGE = "order"
+INGREDIENT_CHANGE = "ingredient"
+
+# Abonné du journal: (type, clés modifiées, séquence)
+ChangeListener = Callable[[str, List[Hashable], int], None]
+
+
+class Changes(NamedTuple):
+    """Modifications depuis un curseur: séquence courante, commandes et ingrédients modifiés"""
+    sequence: int
+    order_ids: Set[int]
+    ingredients: Set[str]
+
+
+class ChangeLog:
+    """Séquence globale de modifications et journal borné des dernières modifications"""
+
+    def __init__(self, maxlen: int = CHANGELOG_SIZE, start: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._entries: Deque[Tuple[int, str, Hashable]] = deque(maxlen=maxlen)
+        self._sequence = time.time_ns() // 1000 if start is None else start
+        # Séquence de départ: version des données non modifiées depuis le lancement
+        self.epoch = self._sequence
+        # Plus grande séquence dont des entrées ont pu être perdues: un curseur inférieur est périmé
+        self._floor = self._sequence
+        # Séquence de la dernière modification par clé et par type (versions)
+        self._versions: Dict[Tuple[str, Hashable], int] = {}
+        self._kind_versions: Dict[str, int] = {}
+        self._listeners: List[ChangeListener] = []
+
+    @property
+    def sequence(self) -> int:
+        """Séquence de la dernière modification"""
+        with self._lock:
+            return self._sequence
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """Abonne une fonction appelée après chaque modification inscrite"""
+        self._listeners.append(listener)
+
+    def record(self, kind: str, keys: Iterable[Hashable]) -> int:
+        """Inscrit une modification portant sur une ou plusieurs clés et retourne sa séquence"""
+        keys = list(keys)
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+            for key in keys:
+                if len(self._entries) == self._entries.maxlen:
+                    evicted_sequence, evicted_kind, evicted_key = self._entries[0]
+                    self._floor = max(self._floor, evicted_sequence)
+                    # Version retirée avec sa dernière entrée: la mémoire reste bornée par le journal
+                    if self._versions.get((evicted_kind, evicted_key)) == evicted_sequence:
+                        del self._versions[(evicted_kind, evicted_key)]
+                self._entries.append((sequence, kind, key))
+                self._versions[(kind, key)] = sequence
+            self._kind_versions[kind] = sequence
+        for listener in self._listeners:
+            listener(kind, keys, sequence)
+        return sequence
+
+    def version(self, kind: str, key: Optional[Hashable] = None) -> int:
+        """
+        Séquence de la dernière modification de la clé (ou du type entier si key est None).
+        Clé absente du journal (jamais modifiée, ou entrée écrasée): plancher du journal
+        """
+        with self._lock:
+            if key is None:
+                return self._kind_versions.get(kind, self.epoch)
+            return self._versions.get((kind, key), self._floor)
+
+    def record_orders(self, order_ids: Iterable[int]) -> int:
+        """Inscrit la modification de commandes (création, statut, annulation)"""
+        return self.record(ORDER_CHANGE, order_ids)
+
+    def on_stock_change(self, ingredient: str, old_quantity: int, new_quantity: int) -> None:
+        """Abonné de l'inventaire: inscrit chaque changement de stock"""
+        self.record(INGREDIENT_CHANGE, [ingredient])
+
+    def changes_since(self, since: int) -> Optional[Changes]:
+        """
+        Modifications postérieures à la séquence `since`, ou None si le curseur est périmé
+        (antérieur au journal, ou postérieur à la séquence courante après un redémarrage)
+        """
+        with self._lock:
+            if since < self._floor or since > self._sequence:
+                return None
+            order_ids: Set[int] = set()
+            ingredients: Set[str] = set()
+            # Parcours depuis la fin: seules les entrées postérieures au curseur sont lues
+            for sequence, kind, key in reversed(self._entries):
+                if sequence <= since:
+                    break
+                if kind == ORDER_CHANGE:
+                    order_ids.add(key)
+                else:
+                    ingredients.add(key)
+            return Changes(self._sequence, order_ids, ingredients)
+
+
+class ChangeWaiter:
+    """
+    Long-polling: met une requête en attente sur une condition asyncio jusqu'à la prochaine
+    modification d'une clé du journal. Les modifications sont inscrites depuis les threads
+    des endpoints synchrones: la notification est transmise à la boucle de chaque requête en attente.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[Tuple[str, Hashable], List[Tuple[asyncio.AbstractEventLoop, asyncio.Condition]]] = {}
+
+    def on_change(self, kind: str, keys: List[Hashable], sequence: int) -> None:
+        """Abonné du journal: réveille les requêtes qui attendent une des clés modifiées"""
+        with self._lock:
+            waiters = [waiter for key in keys for waiter in self._waiters.get((kind, key), ())]
+        self._wake(waiters)
+
+    def on_kind_change(self, kind: str) -> None:
+        """
+        Réveille toutes les requêtes qui attendent une clé du type: modification qui peut toucher
+        chacune d'elles (ex: file de la cuisine). Chaque requête réévalue sa condition et se
+        rendort si sa réponse est inchangée.
+        """
+        with self._lock:
+            waiters = [
+                waiter for (waiter_kind, _), key_waiters in self._waiters.items() if waiter_kind == kind
+                for waiter in key_waiters
+            ]
+        self._wake(waiters)
+
+    def _wake(self, waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Condition]]) -> None:
+        """Transmet la notification à la boucle de chaque requête en attente"""
+        for loop, condition in waiters:
+            try:
+                loop.call_soon_threadsafe(lambda condition=condition: asyncio.ensure_future(self._notify(condition)))
+            except RuntimeError:
+                # Boucle fermée: la requête a disparu
+                pass
+
+    @staticmethod
+    async def _notify(condition: asyncio.Condition) -> None:
+        """Réveille les attentes de la condition (dans sa boucle)"""
+        async with condition:
+            condition.notify_all()
+
+    async def wait(self, kind: str, key: Hashable, unchanged: Callable[[], bool], timeout: float) -> bool:
+        """
+        Attend que unchanged() devienne faux, au plus timeout secondes.
+        Retourne vrai si la clé a été modifiée, faux si le délai a expiré.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Condition())
+        with self._lock:
+            self._waiters.setdefault((kind, key), []).append(waiter)
+        try:
+            condition = waiter[1]
+            async with condition:
+                await asyncio.wait_for(condition.wait_for(lambda: not unchanged()), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get((kind, key), [])
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    self._waiters.pop((kind, key), None)
@@ -1,31 +1,76 @@
 """
 Gestion de la persistance des données avec SQLite
 """
+import logging
 import sqlite3
 import os
-from typing import Dict
-from .models import InventoryManager
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import InventoryManager, Order, OrderStatus, ACTIVE_STATUSES, TERMINAL_STATUSES
+from .repository import OrderRepository
+from .records import OrderRecord
+from .transitions import apply_transition
+from .writer import connect_readonly, get_writer
+from .idempotency import (
+    IdempotencyStore, StoredResponse, IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_PENDING_TIMEOUT_SECONDS,
+    IDEMPOTENCY_TTL_SECONDS, IN_PROGRESS, MISMATCH, NEW, REPLAY,
+)
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "inventory.db")
+logger = logging.getLogger(__name__)
+
+# Base de l'inventaire (configurable comme la base des commandes)
+DB_PATH = os.getenv("INVENTORY_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "inventory.db"))
+# Base des commandes (configurable pour isoler les environnements / workers)
+ORDERS_DB_PATH = os.getenv("ORDERS_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "orders.db"))
+# Implémentation du dépôt de commandes: "sqlite" (durable) ou "memory"
+ORDER_STORE = os.getenv("ORDER_STORE", "sqlite")
 
 
 class SQLiteInventoryManager(InventoryManager):
-    """InventoryManager avec persistance SQLite"""
+    """
+    InventoryManager avec persistance SQLite.
+
+    Les ingrédients modifiés sont marqués puis écrits par une commande de l'écrivain de la base,
+    mise en file sans attendre; cette commande lit les quantités au moment de son exécution, donc
+    les changements faits entre-temps sont regroupés en une seule écriture. flush() attend leur
+    commit: les appelants modifient le stock sous les verrous d'ingrédients et attendent le disque
+    après les avoir relâchés. Une écriture échouée est journalisée et reprogrammée après
+    WRITE_RETRY_SECONDS, sans attendre un autre changement de stock.
+    """
+
+    # Délai avant de retenter une écriture du stock échouée (base verrouillée, disque plein...)
+    WRITE_RETRY_SECONDS = 1.0
+
+    # Mise à jour de la quantité d'un ingrédient
+    UPSERT_SQL = """
+        INSERT INTO inventory (ingredient, quantity, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(ingredient) DO UPDATE SET
+            quantity = excluded.quantity, updated_at = excluded.updated_at
+        WHERE quantity != excluded.quantity
+    """
 
     def __init__(self):
         """Initialise le gestionnaire d'inventaire avec SQLite"""
         super().__init__()
         self.db_path = DB_PATH
+        # Ingrédients modifiés pas encore écrits, et écriture en file qui les prendra
+        self._dirty: set = set()
+        self._dirty_lock = threading.Lock()
+        self._pending_write: Optional[Future] = None
+        self._last_write: Optional[Future] = None
         self._init_db()
         self._load_from_db()
+        self.add_stock_listener(self._persist_stock_change)
 
     def _init_db(self):
         """Crée la table SQLite si elle n'existe pas"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("""
+            self._writer = get_writer(self.db_path)
+            self._writer.execute(lambda conn: conn.execute("""
                 CREATE TABLE IF NOT EXISTS inventory (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     ingredient TEXT UNIQUE NOT NULL,
@@ -33,21 +78,16 @@ class SQLiteInventoryManager(InventoryManager):
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
-            """)
-
-            conn.commit()
-            conn.close()
+            """))
         except sqlite3.Error as e:
             print(f"Erreur lors de l'initialisation de la base de données: {e}")
 
     def _load_from_db(self):
-        """Charge l'inventaire depuis la base de données"""
+        """Charge l'inventaire depuis la base de données (connexion en lecture seule)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT ingredient, quantity FROM inventory")
-            rows = cursor.fetchall()
+            conn = connect_readonly(self.db_path)
+            rows = conn.execute("SELECT ingredient, quantity FROM inventory").fetchall()
+            conn.close()
 
             if rows:
                 # Si la DB a des données, les charger
@@ -56,45 +96,93 @@ class SQLiteInventoryManager(InventoryManager):
             else:
                 # Sinon, initialiser avec les valeurs par défaut et les sauvegarder
                 self._save_to_db()
-
-            conn.close()
         except sqlite3.Error as e:
             print(f"Erreur lors du chargement de la DB: {e}")
             # En cas d'erreur, utiliser les valeurs par défaut
             self._save_to_db()
 
     def _save_to_db(self):
-        """Sauvegarde l'inventaire actuel dans la base de données"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            # Supprimer les anciennes données et réinsérer
-            cursor.execute("DELETE FROM inventory")
-
-            for ingredient, quantity in self.ingredients.items():
-                cursor.execute(
-                    """
-                    INSERT INTO inventory (ingredient, quantity, updated_at)
-                    VALUES (?, ?, CURRENT_TIMESTAMP)
-                    """,
-                    (ingredient, quantity),
-                )
+        """
+        Sauvegarde l'inventaire actuel dans la base de données via l'écrivain unique:
+        les quantités sont capturées à l'appel, puis mises à jour en place (upsert)
+        """
+        snapshot = list(self.ingredients.items())
 
-            conn.commit()
-            conn.close()
+        def save(conn: sqlite3.Connection) -> None:
+            conn.executemany(self.UPSERT_SQL, snapshot)
+            placeholders = ",".join("?" for _ in snapshot)
+            conn.execute(
+                f"DELETE FROM inventory WHERE ingredient NOT IN ({placeholders})",
+                [ingredient for ingredient, _ in snapshot],
+            )
+
+        try:
+            self._writer.execute(save)
         except sqlite3.Error as e:
             print(f"Erreur lors de la sauvegarde en DB: {e}")
 
-    def reduce_inventory(self, pizzas):
-        """Réduit l'inventaire et sauvegarde en DB"""
-        super().reduce_inventory(pizzas)
-        self._save_to_db()
+    def _persist_stock_change(self, ingredient: str, old_quantity: int, new_quantity: int) -> None:
+        """Marque l'ingrédient et met une écriture en file si aucune n'est en attente (abonné aux changements de stock)"""
+        with self._dirty_lock:
+            self._dirty.add(ingredient)
+            if self._pending_write is None:
+                self._schedule_write()
 
-    def restore_inventory(self, pizzas):
-        """Restaure l'inventaire et sauvegarde en DB"""
-        super().restore_inventory(pizzas)
-        self._save_to_db()
+    def _schedule_write(self) -> None:
+        """Met en file l'écriture des ingrédients marqués (appelé sous _dirty_lock)"""
+        write = self._writer.submit(self._write_dirty)
+        self._pending_write = self._last_write = write
+        write.add_done_callback(self._on_write_done)
+
+    def _write_dirty(self, conn: sqlite3.Connection) -> None:
+        """Écrit les quantités courantes des ingrédients marqués (exécuté par l'écrivain)"""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+            self._pending_write = None
+        try:
+            conn.executemany(self.UPSERT_SQL, [(ingredient, self.ingredients.get(ingredient, 0)) for ingredient in dirty])
+        except sqlite3.Error:
+            # Écriture annulée: les ingrédients restent marqués, l'écriture est reprogrammée (_on_write_done)
+            with self._dirty_lock:
+                self._dirty |= dirty
+            raise
+
+    def _on_write_done(self, write: Future) -> None:
+        """
+        Fin d'une écriture du stock: en cas d'échec (commande annulée, ou transaction de l'écrivain
+        impossible avant même son exécution), l'erreur est journalisée et l'écriture reprogrammée
+        """
+        error = write.exception()
+        if error is None:
+            return
+        logger.error(f"Erreur lors de la sauvegarde du stock en DB, nouvel essai dans {self.WRITE_RETRY_SECONDS}s: {error}")
+        with self._dirty_lock:
+            if self._pending_write is write:
+                # La commande n'a pas été exécutée: elle n'est plus en attente
+                self._pending_write = None
+        retry = threading.Timer(self.WRITE_RETRY_SECONDS, self._retry_write)
+        retry.daemon = True
+        retry.start()
+
+    def _retry_write(self) -> None:
+        """Reprogramme l'écriture des ingrédients encore marqués, si aucune n'est déjà en file"""
+        with self._dirty_lock:
+            if self._dirty and self._pending_write is None:
+                self._schedule_write()
+
+    def flush(self) -> None:
+        """
+        Attend le commit des changements de stock déjà faits: ils sont pris par la dernière
+        écriture en file ou par une écriture antérieure (l'écrivain traite sa file dans l'ordre)
+        """
+        last_write = self._last_write
+        if last_write is None:
+            return
+        try:
+            last_write.result()
+        except sqlite3.Error:
+            # Erreur déjà journalisée, écriture reprogrammée (_on_write_done)
+            pass
 
     def get_full_inventory(self) -> dict:
         """Retourne l'inventaire complet"""
@@ -113,3 +201,522 @@ class SQLiteInventoryManager(InventoryManager):
 def get_inventory_manager() -> SQLiteInventoryManager:
     """Retourne une instance du gestionnaire d'inventaire"""
     return SQLiteInventoryManager()
+
+
+class SQLiteOrderRepository(OrderRepository):
+    """
+    Dépôt de commandes persisté dans SQLite.
+
+    - Table orders indexée sur status, created_at et customer_key
+    - Cache chaud en mémoire des commandes actives (non livrées / non annulées)
+    - Séquence d'identifiants persistée: unique entre redémarrages et entre workers
+    - Écritures exécutées par l'écrivain unique de la base (writer.py), lectures sur des
+      connexions en lecture seule par thread
+    """
+
+    # Les commandes sont sérialisées en JSON; l'adresse a déjà été validée à la création
+    LOAD_CONTEXT = {"skip_geocoding": True}
+    # Seules les commandes actives sont indexées en mémoire; les statuts finaux passent par SQLite
+    INDEXED_STATUSES = frozenset(ACTIVE_STATUSES)
+
+    def __init__(self, db_path: str = ORDERS_DB_PATH):
+        """Initialise le dépôt et charge les commandes actives dans le cache"""
+        super().__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+        self._writer = get_writer(db_path)
+        self._init_db()
+        self._load_active_orders()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retourne la connexion de lecture du thread courant (une connexion SQLite par thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_readonly(self.db_path)
+            self._local.conn = conn
+        return conn
+
+    # Schéma exécuté instruction par instruction dans la transaction de l'écrivain
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            customer_key TEXT NOT NULL,
+            customer_name TEXT NOT NULL,
+            data TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_key)",
+        """
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """,
+        # La séquence ne peut jamais être en retard sur les commandes existantes
+        "INSERT OR IGNORE INTO sequences (name, value) "
+        "SELECT 'order_id', COALESCE(MAX(order_id), 0) FROM orders",
+    ]
+
+    def _init_db(self):
+        """Crée les tables et index s'ils n'existent pas"""
+        def create(conn: sqlite3.Connection) -> None:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+        self._writer.execute(create)
+
+    def _load_active_orders(self):
+        """Charge les commandes non terminées dans le cache chaud et initialise les compteurs par statut"""
+        conn = self._connect()
+        placeholders = ",".join("?" for _ in TERMINAL_STATUSES)
+        rows = conn.execute(
+            f"SELECT data FROM orders WHERE status NOT IN ({placeholders}) ORDER BY order_id",
+            [status.value for status in TERMINAL_STATUSES],
+        ).fetchall()
+        counts = conn.execute("SELECT status, COUNT(*) FROM orders GROUP BY status").fetchall()
+        with self._lock:
+            self._orders = {}
+            self._reset_indexes()
+            for row in rows:
+                order = self._deserialize(row[0])
+                self._orders[order.order_id] = OrderRecord.from_order(order)
+                self._ids_by_status[order.status][order.order_id] = None
+                self._status_by_id[order.order_id] = order.status
+            for status, count in counts:
+                self._status_counts[OrderStatus(status)] = count
+
+    def _deserialize(self, data: str) -> Order:
+        """Reconstruit une commande depuis son JSON sans refaire le géocodage"""
+        return Order.model_validate_json(data, context=self.LOAD_CONTEXT)
+
+    def next_order_id(self) -> int:
+        """Incrémente la séquence persistée (commande de l'écrivain)"""
+        return self.next_order_ids(1)[0]
+
+    def next_order_ids(self, count: int) -> range:
+        """Réserve `count` identifiants consécutifs en une seule commande de l'écrivain"""
+        last = self._writer.execute(lambda conn: conn.execute(
+            "UPDATE sequences SET value = value + ? WHERE name = 'order_id' RETURNING value",
+            (count,),
+        ).fetchone()[0])
+        return range(last - count + 1, last + 1)
+
+    # Insertion ou mise à jour d'une ligne de commande
+    WRITE_SQL = """
+        INSERT INTO orders (order_id, status, created_at, customer_key, customer_name, data)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(order_id) DO UPDATE SET status = excluded.status, data = excluded.data
+    """
+
+    @staticmethod
+    def _row(order: Order) -> tuple:
+        """Valeurs de la ligne SQLite d'une commande"""
+        return (
+            order.order_id,
+            order.status.value,
+            order.created_at.isoformat(),
+            order.customer_key,
+            order.customer_name,
+            order.model_dump_json(),
+        )
+
+    def _write(self, order: Order) -> None:
+        """Insère ou met à jour la ligne SQLite de la commande"""
+        row = self._row(order)
+        self._writer.execute(lambda conn: conn.execute(self.WRITE_SQL, row))
+
+    def _update_cache(self, order: Order) -> None:
+        """Garde en cache (forme compacte) les commandes actives uniquement (appelé sous le lock)"""
+        if order.status in TERMINAL_STATUSES:
+            self._orders.pop(order.order_id, None)
+        else:
+            self._orders[order.order_id] = OrderRecord.from_order(order)
+
+    def _previous_status(self, order: Order) -> Optional[OrderStatus]:
+        """Statut indexé pour une commande active, sinon statut stocké en base"""
+        status = self._status_by_id.get(order.order_id)
+        if status is not None:
+            return status
+        row = self._connect().execute("SELECT status FROM orders WHERE order_id = ?", (order.order_id,)).fetchone()
+        return OrderStatus(row[0]) if row else None
+
+    def add(self, order: Order) -> None:
+        """
+        Insère une nouvelle commande. L'écriture est attendue hors du lock: les insertions
+        concurrentes sont regroupées par l'écrivain dans une même transaction
+        """
+        self._write(order)
+        with self._lock:
+            self._track_status(order.order_id, None, order.status)
+            self._update_cache(order)
+
+    def add_many(self, orders: List[Order]) -> None:
+        """Insère plusieurs commandes dans une seule commande de l'écrivain (tout ou rien)"""
+        rows = [self._row(order) for order in orders]
+        self._writer.execute(lambda conn: conn.executemany(self.WRITE_SQL, rows))
+        with self._lock:
+            for order in orders:
+                self._track_status(order.order_id, None, order.status)
+                self._update_cache(order)
+
+    def save(self, order: Order) -> None:
+        """Met à jour la commande en base, puis les index et le cache chaud"""
+        with self._lock:
+            old_status = self._previous_status(order)
+            self._write(order)
+            self._track_status(order.order_id, old_status, order.status)
+            self._update_cache(order)
+
+    def transition(
+        self,
+        order_id: int,
+        expected: OrderStatus,
+        target: OrderStatus,
+        timestamp_field: Optional[str] = None,
+        at: Optional[datetime] = None,
+    ) -> Tuple[Optional[Order], Optional[OrderStatus]]:
+        """
+        Compare-and-set du statut, atomique aussi entre workers: la mise à jour SQLite
+        n'est appliquée que si le statut stocké est encore `expected` (voir OrderRepository.transition)
+        """
+        with self._lock:
+            order = self.get(order_id)
+            if order is None:
+                return None, None
+            if order.status == expected:
+                apply_transition(order, target, timestamp_field, at or datetime.now())
+                params = (order.status.value, order.model_dump_json(), order_id, expected.value)
+                updated = self._writer.execute(lambda conn: conn.execute(
+                    "UPDATE orders SET status = ?, data = ? WHERE order_id = ? AND status = ?", params
+                ).rowcount)
+                if updated == 1:
+                    self._track_status(order_id, expected, order.status)
+                    self._update_cache(order)
+                    return order, None
+
+            # Statut différent (éventuellement modifié par un autre worker): resynchroniser le cache chaud
+            cached_status = self._status_by_id.get(order_id)
+            row = self._connect().execute("SELECT data FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+            stored = self._deserialize(row[0]) if row else None
+            if cached_status is not None:
+                self._track_status(order_id, cached_status, stored.status if stored else None)
+                if stored is None:
+                    self._orders.pop(order_id, None)
+                else:
+                    self._update_cache(stored)
+            return None, stored.status if stored else None
+
+    def get(self, order_id: int) -> Optional[Order]:
+        """Cherche dans le cache chaud puis dans SQLite (commandes terminées)"""
+        record = self._orders.get(order_id)
+        if record is not None:
+            return record.to_order()
+        row = self._connect().execute("SELECT data FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+        return self._deserialize(row[0]) if row else None
+
+    def get_summary(self, order_id: int) -> Optional[dict]:
+        """Résumé en cache pour une commande active, sinon construit depuis SQLite"""
+        summary = super().get_summary(order_id)
+        if summary is not None:
+            return summary
+        order = self.get(order_id)
+        return order.get_summary() if order is not None else None
+
+    def get_summary_json(self, order_id: int) -> Optional[bytes]:
+        """Résumé JSON en cache pour une commande active, sinon construit depuis SQLite"""
+        summary_json = super().get_summary_json(order_id)
+        if summary_json is not None:
+            return summary_json
+        order = self.get(order_id)
+        return order.get_summary_json() if order is not None else None
+
+    def remove(self, order_id: int) -> Optional[Order]:
+        """
+        Supprime la commande de SQLite et du cache. Lecture et suppression en une seule
+        instruction (DELETE … RETURNING): entre requêtes ou entre workers, une seule suppression
+        de la même commande réussit, les autres retournent None
+        """
+        with self._lock:
+            row = self._writer.execute(lambda conn: conn.execute(
+                "DELETE FROM orders WHERE order_id = ? RETURNING status, data", (order_id,)
+            ).fetchone())
+            if row is None:
+                return None
+            record = self._orders.pop(order_id, None)
+            order = record.to_order() if record is not None else self._deserialize(row[1])
+            self._track_status(order_id, self._status_by_id.get(order_id, OrderStatus(row[0])), None)
+        return order
+
+    def values(self) -> Iterator[Order]:
+        """Itère sur toutes les commandes par identifiant croissant"""
+        cursor = self._connect().execute("SELECT order_id, data FROM orders ORDER BY order_id")
+        for order_id, data in cursor:
+            record = self._orders.get(order_id)
+            yield record.to_order() if record is not None else self._deserialize(data)
+
+    def list_orders(
+        self,
+        after: Optional[int] = None,
+        limit: int = 100,
+        status: Optional[OrderStatus] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        customer_key: Optional[str] = None,
+    ) -> List[Order]:
+        """Pagination keyset sur la clé primaire; les filtres utilisent les index status / created_at / customer_key"""
+        conditions = ["order_id > ?"]
+        params: list = [after if after is not None else 0]
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status.value)
+        range_conditions, range_params = self._created_at_conditions(since, until)
+        conditions += range_conditions
+        params += range_params
+        if customer_key is not None:
+            conditions.append("customer_key = ?")
+            params.append(customer_key)
+        params.append(limit)
+
+        rows = self._connect().execute(
+            f"SELECT order_id, data FROM orders WHERE {' AND '.join(conditions)} ORDER BY order_id LIMIT ?",
+            params,
+        ).fetchall()
+        # Les commandes actives sont déjà en cache: pas de désérialisation
+        return [self._load_row(order_id, data) for order_id, data in rows]
+
+    def _load_row(self, order_id: int, data: str) -> Order:
+        """Reconstruit une commande depuis le cache compact si elle est active, sinon depuis son JSON"""
+        record = self._orders.get(order_id)
+        return record.to_order() if record is not None else self._deserialize(data)
+
+    def list_by_customer(self, customer_key: str, limit: int = 20) -> List[Order]:
+        """Commandes d'un client via l'index SQLite sur customer_key, les plus récentes d'abord"""
+        rows = self._connect().execute(
+            "SELECT order_id, data FROM orders WHERE customer_key = ? ORDER BY order_id DESC LIMIT ?",
+            (customer_key, limit),
+        ).fetchall()
+        return [self._load_row(order_id, data) for order_id, data in rows]
+
+    def archivable_orders(self, cutoff: datetime, limit: int) -> List[Order]:
+        """Commandes terminées créées avant cutoff, via les index status / created_at"""
+        placeholders = ",".join("?" for _ in TERMINAL_STATUSES)
+        rows = self._connect().execute(
+            f"SELECT data FROM orders WHERE status IN ({placeholders}) AND created_at < ? ORDER BY order_id LIMIT ?",
+            [status.value for status in TERMINAL_STATUSES] + [cutoff.isoformat(), limit],
+        ).fetchall()
+        return [self._deserialize(row[0]) for row in rows]
+
+    def count_by_status(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, int]:
+        """Compteurs en mémoire sans intervalle, sinon comptage SQLite via l'index created_at"""
+        if since is None and until is None:
+            return super().count_by_status()
+        conditions, params = self._created_at_conditions(since, until)
+        rows = self._connect().execute(
+            f"SELECT status, COUNT(*) FROM orders WHERE {' AND '.join(conditions)} GROUP BY status", params
+        ).fetchall()
+        counts = {status.value: 0 for status in OrderStatus}
+        counts.update(rows)
+        return counts
+
+    @staticmethod
+    def _created_at_conditions(since: Optional[datetime], until: Optional[datetime]) -> Tuple[List[str], list]:
+        """Conditions SQL sur created_at pour l'intervalle [since, until[ (dates ISO: ordre lexicographique)"""
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(until.isoformat())
+        return conditions, params
+
+    def list_by_status(
+        self,
+        status: OrderStatus,
+        offset: int = 0,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Order]:
+        """
+        Statuts actifs sans intervalle: index mémoire.
+        Sinon index SQLite sur status / created_at; statuts finaux les plus récents d'abord.
+        """
+        if status in self.INDEXED_STATUSES and since is None and until is None:
+            return super().list_by_status(status, offset, limit)
+        conditions, params = self._created_at_conditions(since, until)
+        direction = "DESC" if status in TERMINAL_STATUSES else "ASC"
+        rows = self._connect().execute(
+            f"SELECT order_id, data FROM orders WHERE {' AND '.join(['status = ?'] + conditions)} "
+            f"ORDER BY order_id {direction} LIMIT ? OFFSET ?",
+            [status.value] + params + [limit, offset],
+        ).fetchall()
+        return [self._load_row(order_id, data) for order_id, data in rows]
+
+    def summaries_by_status(
+        self,
+        status: OrderStatus,
+        offset: int = 0,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[dict]:
+        """Résumés en cache pour les statuts actifs, construits depuis SQLite sinon"""
+        if status in self.INDEXED_STATUSES and since is None and until is None:
+            return super().summaries_by_status(status, offset, limit)
+        return [order.get_summary() for order in self.list_by_status(status, offset, limit, since, until)]
+
+    def summaries_json_by_status(
+        self,
+        status: OrderStatus,
+        offset: int = 0,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[bytes]:
+        """Résumés pré-encodés en cache pour les statuts actifs, encodés depuis SQLite sinon"""
+        if status in self.INDEXED_STATUSES and since is None and until is None:
+            return super().summaries_json_by_status(status, offset, limit)
+        return [order.get_summary_json() for order in self.list_by_status(status, offset, limit, since, until)]
+
+    def clear(self) -> None:
+        """Supprime toutes les commandes (la séquence d'identifiants est conservée)"""
+        with self._lock:
+            self._writer.execute(lambda conn: conn.execute("DELETE FROM orders"))
+            self._orders.clear()
+            self._reset_indexes()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(self._status_counts.values())
+
+    def __contains__(self, order_id: int) -> bool:
+        if order_id in self._orders:
+            return True
+        return self._connect().execute("SELECT 1 FROM orders WHERE order_id = ?", (order_id,)).fetchone() is not None
+
+
+def get_order_repository() -> OrderRepository:
+    """Retourne le dépôt de commandes configuré via ORDER_STORE"""
+    if ORDER_STORE == "memory":
+        return OrderRepository()
+    return SQLiteOrderRepository()
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """
+    Clés d'idempotence stockées dans la base des commandes: partagées entre workers.
+
+    La réservation d'une clé est une commande de l'écrivain unique de la base, exécutée dans
+    sa transaction d'écriture (BEGIN IMMEDIATE): deux requêtes, ou deux workers, recevant la
+    même clé en parallèle ne peuvent pas la réserver tous les deux.
+    """
+
+    # Les purges (expiration, taille maximale) sont faites toutes les PURGE_EVERY réservations
+    PURGE_EVERY = 100
+
+    def __init__(
+        self,
+        db_path: str = ORDERS_DB_PATH,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        max_keys: int = IDEMPOTENCY_MAX_KEYS,
+        pending_timeout: float = IDEMPOTENCY_PENDING_TIMEOUT_SECONDS,
+    ):
+        super().__init__(ttl_seconds, max_keys, pending_timeout)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._writer = get_writer(db_path)
+        # Compteur modifié uniquement par le thread écrivain
+        self._reservations = 0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retourne la connexion de lecture du thread courant (une connexion SQLite par thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_readonly(self.db_path)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        """Crée la table des clés si elle n'existe pas"""
+        def create(conn: sqlite3.Connection) -> None:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    status_code INTEGER,
+                    body BLOB,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_created_at ON idempotency_keys(created_at)")
+
+        self._writer.execute(create)
+
+    def begin(self, key: str, fingerprint: str, now: Optional[float] = None) -> Tuple[str, Optional[StoredResponse]]:
+        """Réserve la clé ou retourne l'état de la requête d'origine (voir IdempotencyStore.begin)"""
+        now = time.time() if now is None else now
+
+        def reserve(conn: sqlite3.Connection) -> Tuple[str, Optional[StoredResponse]]:
+            row = conn.execute(
+                "SELECT fingerprint, status_code, body, created_at FROM idempotency_keys WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and now - row[3] < self.ttl_seconds:
+                entry_fingerprint, status_code, body, created_at = row
+                if entry_fingerprint != fingerprint:
+                    return MISMATCH, None
+                if status_code is not None:
+                    return REPLAY, (status_code, bytes(body))
+                if now - created_at < self.pending_timeout:
+                    return IN_PROGRESS, None
+
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, status_code, body, created_at) "
+                "VALUES (?, ?, NULL, NULL, ?)",
+                (key, fingerprint, now),
+            )
+            self._reservations += 1
+            if self._reservations % self.PURGE_EVERY == 0:
+                self._purge_db(conn, now)
+            return NEW, None
+
+        return self._writer.execute(reserve)
+
+    def _purge_db(self, conn: sqlite3.Connection, now: float) -> None:
+        """Supprime les clés expirées puis les plus anciennes au-delà de max_keys"""
+        conn.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM idempotency_keys WHERE created_at < ("
+            "SELECT created_at FROM idempotency_keys ORDER BY created_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_keys - 1,),
+        )
+
+    def complete(self, key: str, status_code: int, body: bytes) -> None:
+        """Enregistre la réponse de la requête réservée"""
+        self._writer.execute(lambda conn: conn.execute(
+            "UPDATE idempotency_keys SET status_code = ?, body = ? WHERE key = ?",
+            (status_code, body, key),
+        ))
+
+    def release(self, key: str) -> None:
+        """Libère une clé réservée dont la requête a échoué"""
+        self._writer.execute(lambda conn: conn.execute(
+            "DELETE FROM idempotency_keys WHERE key = ? AND status_code IS NULL", (key,)
+        ))
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM idempotency_keys").fetchone()[0]
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Retourne le store de clés d'idempotence (partagé entre workers sauf avec ORDER_STORE=memory)"""
+    if ORDER_STORE == "memory":
+        return IdempotencyStore()
+    return SQLiteIdempotencyStore()
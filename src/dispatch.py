@@ -0,0 +1,244 @@
+"""
+Planification des tournées de livraison des commandes prêtes
+
+Les commandes prêtes (ready_for_delivery) géocodées sont regroupées en tournées:
+- la commande la plus urgente (échéance la plus proche) ouvre une tournée, puis ses voisines
+  les plus proches y sont ajoutées tant que la capacité du livreur (en pizzas) le permet et que
+  toutes les échéances de la tournée restent tenues
+- l'ordre de passage est construit par plus proche voisin depuis la pizzeria puis amélioré par
+  2-opt; si ce parcours manque une échéance, l'ordre des échéances est essayé
+- échéance d'une commande: sortie du four + DELIVERY_WINDOW_MINUTES (pizza encore chaude)
+
+Les distances sont à vol d'oiseau (approximation équirectangulaire, précise à l'échelle d'une
+ville). Les tournées sont de petite taille: 100 commandes sont planifiées en quelques dizaines
+de millisecondes. Les commandes sans coordonnées sont listées à part (livraison individuelle).
+
+trip() construit une seule tournée, ouverte par une commande donnée: c'est la tournée confiée
+à un livreur par l'affectation automatique (drivers.py).
+"""
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from .models import Order
+
+# Position de la pizzeria (départ et retour des tournées)
+RESTAURANT_LATITUDE = float(os.getenv("RESTAURANT_LATITUDE", "43.6045"))
+RESTAURANT_LONGITUDE = float(os.getenv("RESTAURANT_LONGITUDE", "1.4440"))
+# Pizzas transportées au plus par un livreur
+DRIVER_CAPACITY = int(os.getenv("DRIVER_CAPACITY", "8"))
+# Vitesse moyenne d'un livreur en ville (km/h)
+DRIVER_SPEED_KMH = float(os.getenv("DRIVER_SPEED_KMH", "20"))
+# Délai maximal entre la sortie du four et la livraison (minutes)
+DELIVERY_WINDOW_MINUTES = int(os.getenv("DELIVERY_WINDOW_MINUTES", "40"))
+# Temps passé à chaque arrêt (minutes)
+STOP_MINUTES = 2.0
+# Distance maximale entre la commande qui ouvre une tournée et les commandes ajoutées (km)
+CLUSTER_RADIUS_KM = 3.0
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def distance_km(latitude_a: float, longitude_a: float, latitude_b: float, longitude_b: float) -> float:
+    """Distance à vol d'oiseau (approximation équirectangulaire)"""
+    x = math.radians(longitude_b - longitude_a) * math.cos(math.radians((latitude_a + latitude_b) / 2))
+    y = math.radians(latitude_b - latitude_a)
+    return EARTH_RADIUS_KM * math.hypot(x, y)
+
+
+class Stop(NamedTuple):
+    """Commande à livrer"""
+    order_id: int
+    latitude: float
+    longitude: float
+    pizzas: int
+    deadline_minutes: float  # échéance, en minutes à partir du départ
+
+
+def nearest_neighbour_route(nodes: List[int], dist: List[List[float]]) -> List[int]:
+    """Ordre de passage par plus proche voisin depuis la pizzeria (nœud 0)"""
+    remaining = set(nodes)
+    route = []
+    current = 0
+    while remaining:
+        current = min(remaining, key=dist[current].__getitem__)
+        remaining.remove(current)
+        route.append(current)
+    return route
+
+
+def two_opt(route: List[int], dist: List[List[float]]) -> List[int]:
+    """Améliore le parcours pizzeria -> route -> pizzeria en inversant des segments tant que c'est plus court"""
+    tour = [0] + route + [0]
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(tour) - 2):
+            for j in range(i + 1, len(tour) - 1):
+                a, b, c, e = tour[i - 1], tour[i], tour[j], tour[j + 1]
+                if dist[a][c] + dist[b][e] < dist[a][b] + dist[c][e] - 1e-9:
+                    tour[i:j + 1] = reversed(tour[i:j + 1])
+                    improved = True
+    return tour[1:-1]
+
+
+class DispatchPlanner:
+    """Regroupement des commandes prêtes en tournées"""
+
+    def __init__(
+        self,
+        depot: Tuple[float, float] = (RESTAURANT_LATITUDE, RESTAURANT_LONGITUDE),
+        capacity: int = DRIVER_CAPACITY,
+        speed_kmh: float = DRIVER_SPEED_KMH,
+        window_minutes: int = DELIVERY_WINDOW_MINUTES,
+        radius_km: float = CLUSTER_RADIUS_KM,
+    ):
+        self.depot = depot
+        self.capacity = capacity
+        self.speed_kmh = speed_kmh
+        self.window_minutes = window_minutes
+        self.radius_km = radius_km
+
+    def _stop(self, order: Order, now: datetime) -> Optional[Stop]:
+        """Arrêt d'une commande, None si elle n'est pas géocodée"""
+        address = order.customer_address
+        if address.latitude is None or address.longitude is None:
+            return None
+        deadline = (order.ready_at or now) + timedelta(minutes=self.window_minutes)
+        return Stop(
+            order.order_id, address.latitude, address.longitude, len(order.pizzas),
+            (deadline - now).total_seconds() / 60,
+        )
+
+    def _distances(self, stops: List[Optional[Stop]]) -> List[List[float]]:
+        """Matrice des distances entre la pizzeria (nœud 0) et les arrêts"""
+        points = [self.depot] + [(stop.latitude, stop.longitude) for stop in stops[1:]]
+        return [[distance_km(*a, *b) for b in points] for a in points]
+
+    def plan(self, orders: List[Order], now: Optional[datetime] = None) -> dict:
+        """Tournées proposées pour les commandes prêtes (aucune commande n'est modifiée)"""
+        now = now or datetime.now()
+        stops: List[Optional[Stop]] = [None]  # nœud 0: la pizzeria
+        unlocated = []
+        for order in orders:
+            stop = self._stop(order, now)
+            if stop is None:
+                unlocated.append(order.order_id)
+            else:
+                stops.append(stop)
+
+        dist = self._distances(stops)
+        trips = [self._trip(route, stops, dist) for route in self._routes(stops, dist)]
+        return {
+            "generated_at": now.isoformat(),
+            "capacity": self.capacity,
+            "trips": trips,
+            "late_orders": sum(stop["late"] for trip in trips for stop in trip["stops"]),
+            "unlocated_order_ids": unlocated,
+        }
+
+    def trip(self, seed: Order, orders: Iterable[Order], now: Optional[datetime] = None) -> List[int]:
+        """
+        Tournée ouverte par la commande seed, complétée par ses voisines parmi orders (commandes
+        prêtes): identifiants dans l'ordre de passage. Seules les 2 * capacité voisines les plus
+        proches entrent dans la matrice des distances. Commande sans coordonnées: livrée seule.
+        """
+        now = now or datetime.now()
+        seed_stop = self._stop(seed, now)
+        if seed_stop is None:
+            return [seed.order_id]
+        neighbours = []
+        for order in orders:
+            stop = self._stop(order, now) if order.order_id != seed.order_id else None
+            if stop is not None:
+                distance = distance_km(seed_stop.latitude, seed_stop.longitude, stop.latitude, stop.longitude)
+                if distance <= self.radius_km:
+                    neighbours.append((distance, stop))
+        neighbours.sort(key=lambda item: item[0])
+        stops = [None, seed_stop] + [stop for _, stop in neighbours[:2 * self.capacity]]
+        route = self._route_from(1, set(range(2, len(stops))), stops, self._distances(stops))
+        return [stops[node].order_id for node in route]
+
+    def _routes(self, stops: List[Optional[Stop]], dist: List[List[float]]) -> List[List[int]]:
+        """Tournées (nœuds dans l'ordre de passage), ouvertes par échéance croissante"""
+        unassigned = set(range(1, len(stops)))
+        routes = []
+        for seed in sorted(unassigned, key=lambda node: stops[node].deadline_minutes):
+            if seed not in unassigned:
+                continue
+            unassigned.remove(seed)
+            routes.append(self._route_from(seed, unassigned, stops, dist))
+        return routes
+
+    def _route_from(self, seed: int, unassigned: Set[int], stops: List[Optional[Stop]], dist: List[List[float]]) -> List[int]:
+        """Tournée ouverte par seed: voisines ajoutées (et retirées de unassigned) dans la capacité et les échéances"""
+        members, route, load = [seed], [seed], stops[seed].pizzas
+        # Voisines les plus proches de la commande qui ouvre la tournée
+        candidates = sorted(
+            (node for node in unassigned if dist[seed][node] <= self.radius_km),
+            key=dist[seed].__getitem__,
+        )[:2 * self.capacity]
+        for node in candidates:
+            if load + stops[node].pizzas > self.capacity:
+                continue
+            trial = self._best_route(members + [node], stops, dist)
+            if trial is not None:
+                members.append(node)
+                route = trial
+                load += stops[node].pizzas
+                unassigned.remove(node)
+                if load == self.capacity:
+                    break
+        return route
+
+    def _best_route(self, members: List[int], stops: List[Optional[Stop]], dist: List[List[float]]) -> Optional[List[int]]:
+        """Parcours le plus court tenant toutes les échéances (2-opt, sinon ordre des échéances), None si aucun"""
+        candidates = [
+            two_opt(nearest_neighbour_route(members, dist), dist),
+            sorted(members, key=lambda node: stops[node].deadline_minutes),
+        ]
+        feasible = [route for route in candidates if self._on_time(route, stops, dist)]
+        if not feasible:
+            return None
+        return min(feasible, key=lambda route: self._length(route, dist))
+
+    def _arrivals(self, route: List[int], dist: List[List[float]]) -> List[float]:
+        """Minutes d'arrivée à chaque arrêt depuis le départ de la pizzeria"""
+        arrivals = []
+        minutes, previous = 0.0, 0
+        for node in route:
+            minutes += dist[previous][node] / self.speed_kmh * 60
+            arrivals.append(minutes)
+            minutes += STOP_MINUTES
+            previous = node
+        return arrivals
+
+    def _on_time(self, route: List[int], stops: List[Optional[Stop]], dist: List[List[float]]) -> bool:
+        return all(
+            arrival <= stops[node].deadline_minutes for node, arrival in zip(route, self._arrivals(route, dist))
+        )
+
+    @staticmethod
+    def _length(route: List[int], dist: List[List[float]]) -> float:
+        """Longueur de la tournée, retour à la pizzeria compris (km)"""
+        tour = [0] + route + [0]
+        return sum(dist[a][b] for a, b in zip(tour, tour[1:]))
+
+    def _trip(self, route: List[int], stops: List[Optional[Stop]], dist: List[List[float]]) -> Dict:
+        """Description d'une tournée"""
+        arrivals = self._arrivals(route, dist)
+        length = self._length(route, dist)
+        return {
+            "order_ids": [stops[node].order_id for node in route],
+            "pizzas": sum(stops[node].pizzas for node in route),
+            "distance_km": round(length, 2),
+            "duration_minutes": round(length / self.speed_kmh * 60 + STOP_MINUTES * len(route), 1),
+            "stops": [
+                {
+                    "order_id": stops[node].order_id,
+                    "arrival_minutes": round(arrival, 1),
+                    "late": arrival > stops[node].deadline_minutes,
+                }
+                for node, arrival in zip(route, arrivals)
+            ],
+        }
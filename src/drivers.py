@@ -0,0 +1,307 @@
+"""
+Livreurs et affectation automatique des commandes prêtes
+
+Deux files de priorité indexées, mises à jour à chaque événement (jamais de parcours complet):
+- commandes prêtes, par heure de départ au plus tard: sortie du four + DELIVERY_WINDOW_MINUTES
+  moins le trajet pizzeria -> client. Plus la commande attend ou plus elle va loin, plus elle
+  est prioritaire
+- livreurs disponibles, par temps de retour à la pizzeria (distance depuis leur position),
+  puis par attente la plus longue
+
+Une commande qui sort du four, un livreur qui rentre de livraison ou qui prend son service
+déclenche l'affectation: tant que les deux files sont non vides, le livreur le plus proche part
+avec la tournée ouverte par la commande la plus urgente (DispatchPlanner.trip: voisines dans
+la limite de DRIVER_CAPACITY pizzas et des échéances). Les files coûtent O(log n) par
+affectation, la recherche des voisines un parcours des commandes prêtes en attente; changer
+la position d'un livreur ne fait que réordonner son entrée. Le livreur est de nouveau
+disponible quand toutes les commandes de sa tournée sont livrées ou annulées.
+"""
+import itertools
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .dispatch import (
+    DELIVERY_WINDOW_MINUTES, DRIVER_CAPACITY, DRIVER_SPEED_KMH, RESTAURANT_LATITUDE, RESTAURANT_LONGITUDE,
+    DispatchPlanner, distance_km,
+)
+from .models import Address, DriverStatus, Order, OrderStatus
+
+
+class IndexedHeap:
+    """Tas binaire indexé par clé: ajout, changement de priorité, retrait et extraction du minimum en O(log n)"""
+
+    def __init__(self):
+        self._heap: List[Tuple[tuple, int]] = []  # (priorité, clé)
+        self._positions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._positions
+
+    def push(self, key: int, priority: tuple) -> None:
+        """Ajoute la clé, ou change sa priorité si elle est déjà présente"""
+        position = self._positions.get(key)
+        if position is None:
+            self._heap.append((priority, key))
+            self._positions[key] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+        else:
+            self._heap[position] = (priority, key)
+            self._sift_up(position)
+            self._sift_down(self._positions[key])
+
+    def peek(self) -> Optional[int]:
+        """Clé de priorité minimale, None si le tas est vide"""
+        return self._heap[0][1] if self._heap else None
+
+    def pop(self) -> int:
+        """Retire et retourne la clé de priorité minimale"""
+        key = self._heap[0][1]
+        self.remove(key)
+        return key
+
+    def remove(self, key: int) -> bool:
+        """Retire la clé (False si elle est absente)"""
+        position = self._positions.pop(key, None)
+        if position is None:
+            return False
+        last = self._heap.pop()
+        if position < len(self._heap):
+            self._heap[position] = last
+            self._positions[last[1]] = position
+            self._sift_up(position)
+            self._sift_down(self._positions[last[1]])
+        return True
+
+    def _swap(self, i: int, j: int) -> None:
+        self._heap[i], self._heap[j] = self._heap[j], self._heap[i]
+        self._positions[self._heap[i][1]] = i
+        self._positions[self._heap[j][1]] = j
+
+    def _sift_up(self, position: int) -> None:
+        while position > 0:
+            parent = (position - 1) // 2
+            if self._heap[position] >= self._heap[parent]:
+                return
+            self._swap(position, parent)
+            position = parent
+
+    def _sift_down(self, position: int) -> None:
+        size = len(self._heap)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self._heap[child] < self._heap[smallest]:
+                    smallest = child
+            if smallest == position:
+                return
+            self._swap(position, smallest)
+            position = smallest
+
+
+class Driver(NamedTuple):
+    """Livreur enregistré"""
+    driver_id: int
+    name: str
+    status: DriverStatus
+    latitude: Optional[float] = None  # position inconnue: à la pizzeria
+    longitude: Optional[float] = None
+    order_ids: Tuple[int, ...] = ()  # tournée en cours: commandes pas encore livrées
+    available_since: Optional[datetime] = None
+    on_duty: bool = True  # False pendant une livraison: fin de service au retour
+
+    def to_dict(self) -> dict:
+        """Représentation JSON"""
+        return {**self._asdict(), "status": self.status.value, "order_ids": list(self.order_ids),
+                "available_since": self.available_since.isoformat() if self.available_since else None}
+
+
+class DriverRegistry:
+    """Registre des livreurs (disponibilité, position) et affectation des commandes prêtes"""
+
+    def __init__(
+        self,
+        depot: Tuple[float, float] = (RESTAURANT_LATITUDE, RESTAURANT_LONGITUDE),
+        speed_kmh: float = DRIVER_SPEED_KMH,
+        window_minutes: int = DELIVERY_WINDOW_MINUTES,
+        capacity: int = DRIVER_CAPACITY,
+    ):
+        self.depot = depot
+        self.speed_kmh = speed_kmh
+        self.window_minutes = window_minutes
+        self.planner = DispatchPlanner(depot=depot, capacity=capacity, speed_kmh=speed_kmh, window_minutes=window_minutes)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._drivers: Dict[int, Driver] = {}
+        self._driver_by_order: Dict[int, int] = {}
+        # Commandes prêtes, par départ au plus tard (et leur modèle, pour construire les tournées)
+        self._ready_orders = IndexedHeap()
+        self._ready: Dict[int, Order] = {}
+        # Livreurs disponibles, par temps de retour à la pizzeria puis ancienneté de disponibilité
+        self._available = IndexedHeap()
+
+    def clear(self) -> None:
+        """Oublie livreurs et commandes prêtes"""
+        with self._lock:
+            self._reset()
+
+    def load(self, orders: List[Order]) -> None:
+        """Reprend les commandes prêtes (démarrage du serveur)"""
+        with self._lock:
+            for order in orders:
+                if order.status == OrderStatus.READY_FOR_DELIVERY:
+                    self._push_order(order)
+
+    def _minutes_from_depot(self, latitude: Optional[float], longitude: Optional[float]) -> Optional[float]:
+        """Trajet depuis la pizzeria (minutes), None si la position est inconnue"""
+        if latitude is None or longitude is None:
+            return None
+        return distance_km(*self.depot, latitude, longitude) / self.speed_kmh * 60
+
+    def _push_order(self, order: Order) -> None:
+        """Ajoute une commande prête (appelé sous le lock)"""
+        address = order.customer_address
+        travel_minutes = self._minutes_from_depot(address.latitude, address.longitude)
+        if travel_minutes is None:
+            travel_minutes = order.get_estimated_travel_minutes()
+        ready_at = order.ready_at or datetime.now()
+        latest_departure = ready_at.timestamp() / 60 + self.window_minutes - travel_minutes
+        self._ready_orders.push(order.order_id, (latest_departure, order.order_id))
+        self._ready[order.order_id] = order
+
+    def _pop_order(self, order_id: int) -> None:
+        """Retire une commande prête (appelé sous le lock)"""
+        self._ready_orders.remove(order_id)
+        self._ready.pop(order_id, None)
+
+    def _set_available(self, driver: Driver, now: datetime) -> None:
+        """Rend un livreur disponible (appelé sous le lock)"""
+        driver = driver._replace(status=DriverStatus.AVAILABLE, order_ids=(), available_since=now)
+        self._drivers[driver.driver_id] = driver
+        self._push_available(driver)
+
+    def _push_available(self, driver: Driver) -> None:
+        """(Re)classe un livreur disponible (appelé sous le lock)"""
+        return_minutes = self._minutes_from_depot(driver.latitude, driver.longitude) or 0.0
+        self._available.push(driver.driver_id, (return_minutes, driver.available_since, driver.driver_id))
+
+    def register(self, name: str, latitude: Optional[float] = None, longitude: Optional[float] = None,
+                 now: Optional[datetime] = None) -> dict:
+        """Enregistre un livreur, disponible immédiatement"""
+        with self._lock:
+            driver = Driver(next(self._ids), name, DriverStatus.AVAILABLE, latitude, longitude)
+            self._set_available(driver, now or datetime.now())
+            return self._drivers[driver.driver_id].to_dict()
+
+    def update(self, driver_id: int, latitude: Optional[float] = None, longitude: Optional[float] = None,
+               on_duty: Optional[bool] = None, now: Optional[datetime] = None) -> Optional[dict]:
+        """
+        Nouvelle position et/ou prise / fin de service d'un livreur (None si inconnu).
+        Un livreur en livraison qui termine son service est retiré à son retour.
+        """
+        with self._lock:
+            driver = self._drivers.get(driver_id)
+            if driver is None:
+                return None
+            if latitude is not None and longitude is not None:
+                driver = driver._replace(latitude=latitude, longitude=longitude)
+            if on_duty is not None:
+                driver = driver._replace(on_duty=on_duty)
+            self._drivers[driver_id] = driver
+            if driver.status == DriverStatus.AVAILABLE and not driver.on_duty:
+                self._available.remove(driver_id)
+                self._drivers[driver_id] = driver._replace(status=DriverStatus.OFF_DUTY, available_since=None)
+            elif driver.status == DriverStatus.AVAILABLE:
+                self._push_available(driver)
+            elif driver.status == DriverStatus.OFF_DUTY and driver.on_duty:
+                self._set_available(driver, now or datetime.now())
+            return self._drivers[driver_id].to_dict()
+
+    def get(self, driver_id: int) -> Optional[dict]:
+        """Livreur (None si inconnu)"""
+        with self._lock:
+            driver = self._drivers.get(driver_id)
+            return driver.to_dict() if driver is not None else None
+
+    def list(self) -> List[dict]:
+        """Tous les livreurs enregistrés"""
+        with self._lock:
+            return [driver.to_dict() for driver in self._drivers.values()]
+
+    def on_transition(self, order: Order, previous_status: OrderStatus, now: Optional[datetime] = None) -> None:
+        """Suit un changement de statut: commande prête en file, livreur libéré à la livraison"""
+        with self._lock:
+            if order.status == OrderStatus.READY_FOR_DELIVERY:
+                self._push_order(order)
+            elif previous_status == OrderStatus.READY_FOR_DELIVERY:
+                self._pop_order(order.order_id)
+            if order.status == OrderStatus.DELIVERED:
+                self._driver_returns(order.order_id, order.customer_address, now or datetime.now())
+
+    def remove_order(self, order: Order, now: Optional[datetime] = None) -> bool:
+        """Commande annulée: retirée de la file ou de sa tournée (True si son livreur est libéré)"""
+        with self._lock:
+            self._pop_order(order.order_id)
+            return self._driver_returns(order.order_id, None, now or datetime.now())
+
+    def _driver_returns(self, order_id: int, address: Optional[Address], now: datetime) -> bool:
+        """
+        Commande de la tournée livrée (ou annulée): le livreur est à l'adresse du client, et
+        disponible s'il n'a plus rien à livrer. True si le livreur est libéré (appelé sous le lock)
+        """
+        driver_id = self._driver_by_order.pop(order_id, None)
+        if driver_id is None:
+            return False
+        driver = self._drivers[driver_id]
+        if address is not None and address.latitude is not None and address.longitude is not None:
+            driver = driver._replace(latitude=address.latitude, longitude=address.longitude)
+        remaining = tuple(other for other in driver.order_ids if other != order_id)
+        if remaining:
+            self._drivers[driver_id] = driver._replace(order_ids=remaining)
+            return False
+        if driver.on_duty:
+            self._set_available(driver, now)
+        else:
+            self._drivers[driver_id] = driver._replace(status=DriverStatus.OFF_DUTY, order_ids=())
+        return True
+
+    def assign(self, now: Optional[datetime] = None) -> List[Tuple[List[int], int]]:
+        """
+        Confie aux livreurs les plus proches les tournées ouvertes par les commandes les plus
+        urgentes, tant que les deux files sont non vides. Retourne les paires (order_ids dans
+        l'ordre de passage, driver_id); le livreur est réservé.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            assignments = []
+            while self._ready_orders and self._available:
+                seed = self._ready[self._ready_orders.peek()]
+                order_ids = self.planner.trip(seed, self._ready.values(), now)
+                for order_id in order_ids:
+                    self._pop_order(order_id)
+                driver_id = self._available.pop()
+                self._drivers[driver_id] = self._drivers[driver_id]._replace(
+                    status=DriverStatus.DELIVERING, order_ids=tuple(order_ids), available_since=None
+                )
+                for order_id in order_ids:
+                    self._driver_by_order[order_id] = driver_id
+                assignments.append((order_ids, driver_id))
+            return assignments
+
+    def release(self, order_id: int, now: Optional[datetime] = None) -> None:
+        """Commande retirée de sa tournée (elle n'était plus prête): le livreur est libéré s'il n'a plus rien à livrer"""
+        with self._lock:
+            self._driver_returns(order_id, None, now or datetime.now())
+
+    def stats(self) -> dict:
+        """Compteurs (dashboard vendeur)"""
+        with self._lock:
+            by_status = {status.value: 0 for status in DriverStatus}
+            for driver in self._drivers.values():
+                by_status[driver.status.value] += 1
+            return {"counts": by_status, "waiting_orders": len(self._ready_orders)}
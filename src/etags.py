@@ -0,0 +1,35 @@
+"""
+Requêtes conditionnelles (ETag / If-None-Match)
+
+Les ETags sont dérivés de numéros de version maintenus par l'application (journal des
+modifications, matrice de disponibilité), jamais d'un hash du corps: une requête dont le
+client a déjà la version courante reçoit 304 sans que la réponse soit construite.
+Le statut d'une commande y ajoute le délai estimé par la cuisine (lu en O(log n)).
+"""
+from typing import Optional
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """ETag fort à partir des composants de version (ex: "42-1718000000000001")"""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vrai si l'en-tête If-None-Match contient l'ETag (comparaison faible, "*" accepté)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Retourne une réponse 304 si le client a déjà cette version,
+    sinon ajoute l'en-tête ETag à la réponse à construire et retourne None
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,195 @@
+"""
+Bus d'événements en processus et flux Server-Sent Events (SSE)
+
+Les endpoints publient un événement à chaque changement de commande (création,
+changement de statut, annulation). Chaque client SSE (onglet du dashboard vendeur)
+est un abonné avec sa propre file asyncio: le serveur fait O(événements) de travail
+au lieu de recalculer le dashboard à chaque rafraîchissement de chaque onglet.
+
+L'événement est encodé une seule fois à la publication, puis partagé par tous les abonnés.
+
+Un abonné peut aussi suivre un sujet (ex: "order:42" pour le suivi d'une commande par le
+client): un événement publié sur un sujet n'est transmis qu'aux abonnés de ce sujet, le coût
+d'une publication ne dépend donc pas du nombre de commandes suivies par ailleurs.
+"""
+import asyncio
+import itertools
+import threading
+from typing import Awaitable, Callable, AsyncIterator, Dict, List, NamedTuple, Optional
+
+from .responses import dumps
+
+# Types d'événements de commande
+ORDER_CREATED = "order_created"
+ORDER_STATUS_CHANGED = "order_status_changed"
+ORDER_CANCELLED = "order_cancelled"
+# Statut d'une commande, publié sur le sujet de la commande (suivi client)
+ORDER_STATUS = "order_status"
+
+
+def order_topic(order_id: int) -> str:
+    """Sujet des événements d'une commande"""
+    return f"order:{order_id}"
+
+
+# Nombre maximum d'événements en attente par abonné (au-delà: resynchronisation)
+SUBSCRIBER_QUEUE_SIZE = 1000
+# Commentaire SSE envoyé en l'absence d'événement (garde la connexion ouverte à travers les proxys)
+HEARTBEAT_SECONDS = 15.0
+# Délai de reconnexion suggéré au navigateur (millisecondes)
+RETRY_MS = 3000
+
+
+class Event(NamedTuple):
+    """Événement publié: identifiant croissant, type, données et message SSE pré-encodé"""
+    id: int
+    type: str
+    data: dict
+    message: str
+
+
+def format_sse(event_id: Optional[int], event_type: str, data: dict) -> str:
+    """Encode un message SSE (id, event, data sur une ligne JSON)"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {dumps(data).decode('utf-8')}")
+    return "\n".join(lines) + "\n\n"
+
+
+# Marqueur déposé dans la file d'un abonné qui doit se resynchroniser
+RESYNC_EVENT = Event(0, "resync", {}, format_sse(None, "resync", {}))
+
+
+class Subscription:
+    """File d'événements d'un abonné, consommée dans sa boucle asyncio"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self._loop = loop
+        self._queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize)
+        self.topic: Optional[str] = None
+        # Vrai si des événements ont été perdus (abonné trop lent): il doit se resynchroniser
+        self.overflowed = False
+
+    def push(self, event: Event) -> None:
+        """Transmet l'événement depuis n'importe quel thread"""
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, event)
+        except RuntimeError:
+            # Boucle fermée: l'abonné a disparu
+            pass
+
+    def _deliver(self, event: Event) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def overflow(self) -> None:
+        """Signale des événements perdus avant publication (depuis n'importe quel thread): resynchronisation"""
+        try:
+            self._loop.call_soon_threadsafe(self._overflow)
+        except RuntimeError:
+            pass
+
+    def _overflow(self) -> None:
+        self.overflowed = True
+        # Réveille le flux en attente: il émet resync sans attendre l'événement suivant
+        self._deliver(RESYNC_EVENT)
+
+    async def get(self) -> Event:
+        """Attend le prochain événement"""
+        return await self._queue.get()
+
+    def drain(self) -> None:
+        """Vide la file (après une resynchronisation)"""
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self.overflowed = False
+
+
+class EventBus:
+    """Publication d'événements vers les abonnés du processus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # sujet -> abonnés (None: flux global)
+        self._subscriptions: Dict[Optional[str], List[Subscription]] = {}
+        self._ids = itertools.count(1)
+
+    def subscribe(self, topic: Optional[str] = None, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> Subscription:
+        """Crée un abonné au sujet (flux global par défaut), lié à la boucle asyncio courante"""
+        subscription = Subscription(asyncio.get_running_loop(), maxsize)
+        subscription.topic = topic
+        with self._lock:
+            self._subscriptions.setdefault(topic, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Retire un abonné"""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.topic, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.topic, None)
+
+    def publish(self, event_type: str, data: dict, topic: Optional[str] = None) -> Optional[Event]:
+        """
+        Publie un événement sur un sujet (appelable depuis les threads des endpoints synchrones).
+        Sans abonné au sujet, rien n'est encodé et None est retourné.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+            if not subscriptions:
+                return None
+            event_id = next(self._ids)
+        event = Event(event_id, event_type, data, format_sse(event_id, event_type, data))
+        for subscription in subscriptions:
+            subscription.push(event)
+        return event
+
+    def overflow_all(self) -> None:
+        """Tous les abonnés ont perdu des événements (abandonnés en amont): ils se resynchronisent"""
+        with self._lock:
+            subscriptions = [subscription for subscriptions in self._subscriptions.values() for subscription in subscriptions]
+        for subscription in subscriptions:
+            subscription.overflow()
+
+    def has_subscribers(self, topic: Optional[str] = None) -> bool:
+        """Vrai si le sujet a au moins un abonné (évite de construire un événement inutile)"""
+        with self._lock:
+            return topic in self._subscriptions
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        """Nombre d'abonnés connectés au sujet"""
+        with self._lock:
+            return len(self._subscriptions.get(topic, ()))
+
+
+async def iter_sse(
+    subscription: Subscription,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    heartbeat_seconds: float = HEARTBEAT_SECONDS,
+    is_final: Optional[Callable[[Event], bool]] = None,
+) -> AsyncIterator[str]:
+    """
+    Flux SSE d'un abonné: événements, commentaire de maintien toutes les heartbeat_seconds,
+    et un événement "resync" si l'abonné a perdu des événements (il doit recharger l'état complet).
+    Le flux se termine après un événement pour lequel is_final retourne vrai.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    while not await is_disconnected():
+        try:
+            event = await asyncio.wait_for(subscription.get(), timeout=heartbeat_seconds)
+        except asyncio.TimeoutError:
+            yield ": keepalive\n\n"
+            continue
+        if subscription.overflowed:
+            subscription.drain()
+            yield format_sse(None, "resync", {})
+            continue
+        yield event.message
+        if is_final is not None and is_final(event):
+            return
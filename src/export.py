@@ -0,0 +1,111 @@
+"""
+Export en flux de l'historique des commandes (NDJSON ou CSV)
+
+Les commandes sont lues par lots via la pagination keyset du dépôt et écrites ligne
+par ligne: la mémoire utilisée ne dépend que de la taille d'un lot, pas de l'historique.
+Les commandes archivées (stockage froid) sont fusionnées dans l'ordre des identifiants.
+"""
+import csv
+import heapq
+import io
+from datetime import datetime
+from typing import Iterator, Optional
+from .archive import OrderArchive
+from .models import Order
+from .repository import OrderRepository
+
+# Nombre de commandes lues par requête au dépôt
+EXPORT_BATCH_SIZE = 500
+
+# Colonnes de l'export CSV (une ligne par commande)
+CSV_COLUMNS = [
+    "order_id",
+    "created_at",
+    "status",
+    "customer_name",
+    "customer_key",
+    "customer_address",
+    "pizzas",
+    "subtotal",
+    "delivery_fee",
+    "total",
+    "started_at",
+    "ready_at",
+    "delivered_at",
+]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def iter_repository_orders(
+    repository: OrderRepository,
+    after: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Order]:
+    """Parcourt les commandes du dépôt d'identifiant > after, par lots, dans l'ordre des identifiants"""
+    cursor = after
+    while True:
+        batch = repository.list_orders(after=cursor, limit=batch_size, since=since, until=until)
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        cursor = batch[-1].order_id
+
+
+def iter_orders(
+    repository: OrderRepository,
+    after: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    archive: Optional[OrderArchive] = None,
+) -> Iterator[Order]:
+    """
+    Parcourt toutes les commandes d'identifiant > after dans l'ordre des identifiants, archive comprise.
+    Une commande en cours d'archivage (déjà archivée, pas encore retirée du dépôt) n'est écrite qu'une fois.
+    """
+    orders = iter_repository_orders(repository, after, since, until, batch_size)
+    if archive is not None:
+        archived = archive.iter_orders(after, since, until, batch_size)
+        orders = heapq.merge(orders, archived, key=lambda order: order.order_id)
+    last_id = None
+    for order in orders:
+        if order.order_id != last_id:
+            last_id = order.order_id
+            yield order
+
+
+def iter_ndjson(orders: Iterator[Order]) -> Iterator[bytes]:
+    """Une ligne JSON par commande"""
+    for order in orders:
+        yield order.get_summary_json() + b"\n"
+
+
+def format_pizzas(summary: dict) -> str:
+    """Résume les pizzas d'une commande en une cellule CSV: 'Margherita (medium); Reine (large)'"""
+    return "; ".join(f"{pizza['name']} ({pizza['size']})" for pizza in summary["pizzas"])
+
+
+def iter_csv(orders: Iterator[Order]) -> Iterator[bytes]:
+    """En-tête CSV puis une ligne par commande"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for order in orders:
+        summary = order.get_summary()
+        row = {**summary, "pizzas": format_pizzas(summary)}
+        writer.writerow([row[column] if row[column] is not None else "" for column in CSV_COLUMNS])
+        yield flush()
@@ -0,0 +1,42 @@
+"""
+Géocodage des adresses de livraison via Nominatim (OpenStreetMap)
+
+Deux chemins partagent la même requête et la même analyse des résultats:
+- synchrone (requests), utilisé par la validation pydantic de Address (models.py)
+- asynchrone (httpx), utilisé par les endpoints de commande: un géocodage lent ne bloque
+  ni la boucle d'événements ni un thread du pool, les autres requêtes continuent d'être servies
+"""
+from typing import Optional
+import httpx
+from .models import GEOCODING_HEADERS, GEOCODING_TIMEOUT_SECONDS, NOMINATIM_URL, Address, geocoding_error, geocoding_params
+
+# Client HTTP partagé du chemin asynchrone (créé au premier appel, fermé à l'arrêt du serveur)
+http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Client HTTP asynchrone partagé (connexions réutilisées entre géocodages)"""
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(headers=GEOCODING_HEADERS, timeout=GEOCODING_TIMEOUT_SECONDS)
+    return http_client
+
+
+async def close_http_client() -> None:
+    """Ferme le client HTTP partagé (arrêt du serveur)"""
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+async def geocode_address(address: Address) -> Optional[str]:
+    """Géocode l'adresse sans bloquer: None si elle existe à Toulouse (coordonnées renseignées), sinon le message d'erreur"""
+    try:
+        response = await get_http_client().get(
+            NOMINATIM_URL, params=geocoding_params(address), headers=GEOCODING_HEADERS
+        )
+        results = response.json() if response.status_code == 200 else None
+    except (httpx.HTTPError, ValueError) as e:
+        return f"Erreur lors de la validation de l'adresse: {str(e)}"
+    return geocoding_error(address, response.status_code, results)
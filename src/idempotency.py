@@ -0,0 +1,210 @@
+"""
+Clés d'idempotence pour les requêtes de création (en-tête Idempotency-Key)
+
+Un client qui réessaie une requête POST avec la même clé reçoit la réponse d'origine:
+la requête n'est pas rejouée (pas de géocodage, pas de décrément d'inventaire,
+pas de commande en double).
+
+IdempotencyStore est l'implémentation en mémoire (un seul worker) et définit l'interface.
+SQLiteIdempotencyStore (voir db.py) partage les clés entre workers via la base des commandes.
+
+Le middleware intervient avant la validation du corps par FastAPI: une réponse rejouée
+ne coûte qu'une lecture dans le store.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+# Durée de conservation d'une réponse
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Nombre maximum de clés conservées (les plus anciennes sont évincées)
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+# Au-delà, une requête restée "en cours" (worker arrêté) est considérée abandonnée
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = 60.0
+MAX_KEY_LENGTH = 255
+
+# Résultats de IdempotencyStore.begin
+NEW = "new"
+IN_PROGRESS = "in_progress"
+MISMATCH = "mismatch"
+REPLAY = "replay"
+
+# Réponse enregistrée: (code HTTP, corps JSON)
+StoredResponse = Tuple[int, bytes]
+
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    """Empreinte de la requête: une clé réutilisée pour une autre requête est refusée"""
+    digest = hashlib.sha256()
+    digest.update(f"{method} {path}\n".encode("utf-8"))
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """Store en mémoire, borné en taille et en durée"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        max_keys: int = IDEMPOTENCY_MAX_KEYS,
+        pending_timeout: float = IDEMPOTENCY_PENDING_TIMEOUT_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self.pending_timeout = pending_timeout
+        self._lock = threading.Lock()
+        # clé -> [empreinte, réponse ou None si en cours, date de création]; ordre d'insertion
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+
+    def begin(self, key: str, fingerprint: str, now: Optional[float] = None) -> Tuple[str, Optional[StoredResponse]]:
+        """
+        Réserve la clé pour une nouvelle requête ou retourne l'état de la requête d'origine:
+        (NEW, None), (IN_PROGRESS, None), (MISMATCH, None) ou (REPLAY, réponse enregistrée)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._purge(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_fingerprint, response, created_at = entry
+                if entry_fingerprint != fingerprint:
+                    return MISMATCH, None
+                if response is not None:
+                    return REPLAY, response
+                if now - created_at < self.pending_timeout:
+                    return IN_PROGRESS, None
+                del self._entries[key]
+            while len(self._entries) >= self.max_keys:
+                self._entries.popitem(last=False)
+            self._entries[key] = [fingerprint, None, now]
+            return NEW, None
+
+    def complete(self, key: str, status_code: int, body: bytes) -> None:
+        """Enregistre la réponse de la requête réservée"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] = (status_code, body)
+
+    def release(self, key: str) -> None:
+        """Libère une clé réservée (requête échouée: le client peut réessayer)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _purge(self, now: float) -> None:
+        """Évince les clés expirées (les plus anciennes sont en tête), appelé sous le lock"""
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry[2] < self.ttl_seconds:
+                break
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class IdempotencyMiddleware:
+    """
+    Middleware ASGI: applique l'en-tête Idempotency-Key aux requêtes POST des chemins donnés.
+
+    - clé inconnue: la requête est traitée; une réponse 2xx est enregistrée, sinon la clé est libérée
+    - clé connue, même requête terminée: la réponse d'origine est renvoyée (en-tête Idempotent-Replayed)
+    - clé connue, même requête en cours: 409
+    - clé connue, requête différente: 422
+    """
+
+    def __init__(self, app, store: IdempotencyStore, paths: Iterable[str] = ("/orders",)):
+        self.app = app
+        self.store = store
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        key = None
+        for name, value in scope["headers"]:
+            if name == IDEMPOTENCY_HEADER:
+                key = value.decode("latin-1").strip()
+                break
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await self._error(400, f"Idempotency-Key trop longue (max {MAX_KEY_LENGTH} caractères)", scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        fingerprint = request_fingerprint(scope["method"], scope["path"], body)
+        state, stored = await run_in_threadpool(self.store.begin, key, fingerprint)
+
+        if state == REPLAY:
+            status_code, content = stored
+            response = Response(
+                content=content,
+                status_code=status_code,
+                media_type="application/json",
+                headers={"Idempotent-Replayed": "true"},
+            )
+            await response(scope, receive, send)
+            return
+        if state == IN_PROGRESS:
+            await self._error(409, "Une requête avec cette Idempotency-Key est en cours de traitement", scope, receive, send)
+            return
+        if state == MISMATCH:
+            await self._error(422, "Idempotency-Key déjà utilisée pour une requête différente", scope, receive, send)
+            return
+
+        body_replayed = False
+
+        async def replay_receive():
+            nonlocal body_replayed
+            if not body_replayed:
+                body_replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code = None
+        chunks = []
+
+        async def capture_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await run_in_threadpool(self.store.release, key)
+            raise
+
+        if status_code is not None and 200 <= status_code < 300:
+            await run_in_threadpool(self.store.complete, key, status_code, b"".join(chunks))
+        else:
+            await run_in_threadpool(self.store.release, key)
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        """Lit le corps complet de la requête"""
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _error(status_code: int, detail: str, scope, receive, send) -> None:
+        """Réponse d'erreur au format des HTTPException FastAPI"""
+        await JSONResponse({"detail": detail}, status_code=status_code)(scope, receive, send)
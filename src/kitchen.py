@@ -0,0 +1,277 @@
+"""
+Ordonnancement de la cuisine: file des commandes en attente et estimation des délais
+
+Modèle:
+- le four cuit au plus KITCHEN_OVEN_SLOTS pizzas en même temps; une commande occupe un
+  emplacement par pizza, de son démarrage (preparing) à sa sortie (ready_for_delivery)
+- KITCHEN_PREP_STATIONS postes de préparation: au plus autant de commandes lancées par fournée
+- la durée de préparation d'une commande est mesurée (started_at -> ready_at) et lissée
+  (moyenne mobile exponentielle)
+
+Les commandes en attente forment une file de priorité (ordre d'arrivée). Le nombre de pizzas
+devant une commande est une somme préfixe sur un arbre de Fenwick indexé par rang d'arrivée:
+l'estimation d'un délai, l'ajout, le démarrage ou l'annulation d'une commande coûtent O(log n),
+même avec des milliers de commandes en attente au coup de feu.
+
+Chaque modification de la file ou du four change les délais estimés d'autres commandes que
+celle modifiée: les abonnés (add_listener) sont prévenus après chaque modification.
+"""
+import heapq
+import math
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from .models import Order, OrderStatus
+
+# Pizzas cuites en même temps
+KITCHEN_OVEN_SLOTS = int(os.getenv("KITCHEN_OVEN_SLOTS", "6"))
+# Postes de préparation (commandes lancées en même temps)
+KITCHEN_PREP_STATIONS = int(os.getenv("KITCHEN_PREP_STATIONS", "2"))
+# Durée de préparation initiale d'une commande, avant toute mesure (minutes)
+DEFAULT_PREP_MINUTES = 12.0
+# Poids d'une nouvelle mesure dans la moyenne des durées de préparation
+PREP_TIME_SMOOTHING = 0.2
+# L'arbre est reconstruit quand les rangs libérés dépassent les commandes en attente
+COMPACT_MIN_SIZE = 1024
+
+# Abonné de la cuisine, appelé après chaque modification de la file ou du four
+KitchenListener = Callable[[], None]
+
+
+class FenwickTree:
+    """Arbre de Fenwick extensible (indices à partir de 1): ajout, mise à jour et somme préfixe en O(log n)"""
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._tree = [0]
+        for value in values:
+            self.append(value)
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def append(self, value: int) -> int:
+        """Ajoute une valeur en fin et retourne son indice"""
+        index = len(self._tree)
+        # Le nœud index couvre ]index - lowbit(index), index]
+        lowbit = index & -index
+        self._tree.append(value + self.prefix_sum(index - 1) - self.prefix_sum(index - lowbit))
+        return index
+
+    def add(self, index: int, delta: int) -> None:
+        """Ajoute delta à la valeur d'indice index"""
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, index: int) -> int:
+        """Somme des valeurs d'indices 1 à index"""
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+
+class KitchenOrder(NamedTuple):
+    """Commande suivie par la cuisine"""
+    order_id: int
+    pizzas: int
+    travel_minutes: int
+    rank: int = 0  # rang d'arrivée dans l'arbre (commandes en attente)
+    started_at: Optional[datetime] = None  # commandes en préparation
+
+
+class KitchenScheduler:
+    """File de la cuisine, fournées suggérées et délais estimés"""
+
+    def __init__(
+        self,
+        oven_slots: int = KITCHEN_OVEN_SLOTS,
+        prep_stations: int = KITCHEN_PREP_STATIONS,
+        prep_minutes: float = DEFAULT_PREP_MINUTES,
+    ):
+        self.oven_slots = oven_slots
+        self.prep_stations = prep_stations
+        self.prep_minutes = prep_minutes
+        self._lock = threading.Lock()
+        self._listeners: List[KitchenListener] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pending: Dict[int, KitchenOrder] = {}
+        self._preparing: Dict[int, KitchenOrder] = {}
+        # File de priorité (rang, order_id); les entrées démarrées ou annulées sont ignorées au dépilement
+        self._queue: List[Tuple[int, int]] = []
+        # Pizzas en attente par rang d'arrivée
+        self._pizzas_by_rank = FenwickTree()
+        self._busy_slots = 0
+
+    def add_listener(self, listener: KitchenListener) -> None:
+        """Abonne une fonction appelée après chaque modification (délais estimés susceptibles d'avoir changé)"""
+        self._listeners.append(listener)
+
+    def _notify(self) -> None:
+        """Prévient les abonnés (appelé hors du lock)"""
+        for listener in self._listeners:
+            listener()
+
+    def clear(self) -> None:
+        """Vide la cuisine"""
+        with self._lock:
+            self._reset()
+        self._notify()
+
+    def load(self, orders: Iterable[Order]) -> None:
+        """Reprend les commandes en attente et en préparation (démarrage du serveur)"""
+        for order in sorted(orders, key=lambda order: order.order_id):
+            if order.status == OrderStatus.PENDING:
+                self.enqueue(order)
+            elif order.status == OrderStatus.PREPARING:
+                with self._lock:
+                    self._start(self._entry(order), order.started_at or datetime.now())
+                self._notify()
+
+    @staticmethod
+    def _entry(order: Order) -> KitchenOrder:
+        return KitchenOrder(order.order_id, len(order.pizzas), order.get_estimated_travel_minutes())
+
+    def enqueue(self, order: Order) -> None:
+        """Ajoute une nouvelle commande en fin de file"""
+        with self._lock:
+            entry = self._entry(order)
+            rank = self._pizzas_by_rank.append(entry.pizzas)
+            self._pending[order.order_id] = entry._replace(rank=rank)
+            heapq.heappush(self._queue, (rank, order.order_id))
+        self._notify()
+
+    def _dequeue(self, order_id: int) -> Optional[KitchenOrder]:
+        """Retire une commande de la file (appelé sous le lock)"""
+        entry = self._pending.pop(order_id, None)
+        if entry is not None:
+            self._pizzas_by_rank.add(entry.rank, -entry.pizzas)
+            if len(self._pizzas_by_rank) > 2 * len(self._pending) + COMPACT_MIN_SIZE:
+                self._compact()
+        return entry
+
+    def _compact(self) -> None:
+        """Renumérote les commandes en attente: l'arbre et la file ne gardent que des rangs utiles"""
+        entries = sorted(self._pending.values(), key=lambda entry: entry.rank)
+        self._pizzas_by_rank = FenwickTree(entry.pizzas for entry in entries)
+        self._pending = {
+            entry.order_id: entry._replace(rank=rank) for rank, entry in enumerate(entries, start=1)
+        }
+        self._queue = [(entry.rank, entry.order_id) for entry in self._pending.values()]
+        heapq.heapify(self._queue)
+
+    def _start(self, entry: KitchenOrder, started_at: datetime) -> None:
+        self._preparing[entry.order_id] = entry._replace(rank=0, started_at=started_at)
+        self._busy_slots += entry.pizzas
+
+    def start(self, order: Order) -> None:
+        """La commande passe au four: elle quitte la file et occupe ses emplacements"""
+        with self._lock:
+            entry = self._dequeue(order.order_id) or self._entry(order)
+            if order.order_id not in self._preparing:
+                self._start(entry, order.started_at or datetime.now())
+        self._notify()
+
+    def finish(self, order: Order) -> None:
+        """La commande sort du four: ses emplacements sont libérés et sa durée mesurée"""
+        with self._lock:
+            entry = self._preparing.pop(order.order_id, None)
+            if entry is None:
+                return
+            self._busy_slots -= entry.pizzas
+            ready_at = order.ready_at or datetime.now()
+            minutes = (ready_at - entry.started_at).total_seconds() / 60
+            if minutes > 0:
+                self.prep_minutes += PREP_TIME_SMOOTHING * (minutes - self.prep_minutes)
+        self._notify()
+
+    def remove(self, order_id: int) -> None:
+        """Commande annulée: retirée de la file ou du four"""
+        with self._lock:
+            entry = self._dequeue(order_id)
+            if entry is None:
+                entry = self._preparing.pop(order_id, None)
+                if entry is None:
+                    return
+                self._busy_slots -= entry.pizzas
+        self._notify()
+
+    def on_transition(self, order: Order, previous_status: OrderStatus) -> None:
+        """Suit un changement de statut appliqué par le vendeur"""
+        if order.status == OrderStatus.PREPARING:
+            self.start(order)
+        elif previous_status == OrderStatus.PREPARING:
+            self.finish(order)
+
+    def _ready_in(self, order_id: int, now: Optional[datetime]) -> Optional[Tuple[float, KitchenOrder]]:
+        """Minutes avant la sortie du four et entrée de la commande (appelé sous le lock)"""
+        entry = self._pending.get(order_id)
+        if entry is not None:
+            pizzas = self._busy_slots + self._pizzas_by_rank.prefix_sum(entry.rank)
+            return self.prep_minutes * math.ceil(pizzas / self.oven_slots), entry
+        entry = self._preparing.get(order_id)
+        if entry is not None:
+            elapsed = ((now or datetime.now()) - entry.started_at).total_seconds() / 60
+            return max(self.prep_minutes - elapsed, 1.0), entry
+        return None
+
+    def ready_in_minutes(self, order_id: int, now: Optional[datetime] = None) -> Optional[float]:
+        """
+        Minutes avant la sortie du four, None si la commande n'est pas en cuisine.
+        En attente: fournées nécessaires pour cuire les pizzas en cours et celles de la file
+        jusqu'à la commande incluse (somme préfixe, O(log n)).
+        En préparation: durée mesurée moins le temps déjà passé au four.
+        """
+        with self._lock:
+            estimate = self._ready_in(order_id, now)
+        return estimate[0] if estimate is not None else None
+
+    def estimated_delivery_minutes(self, order_id: int, now: Optional[datetime] = None) -> Optional[int]:
+        """Minutes avant livraison (cuisine puis trajet), None si la commande n'est pas en cuisine"""
+        with self._lock:
+            estimate = self._ready_in(order_id, now)
+        if estimate is None:
+            return None
+        ready_in, entry = estimate
+        return math.ceil(ready_in) + entry.travel_minutes
+
+    def suggest_batch(self) -> List[int]:
+        """
+        Prochaine fournée: commandes en tête de file, une par poste de préparation, tant que
+        leurs pizzas tiennent dans les emplacements libres. La file n'est jamais dépassée (pas de
+        famine des grosses commandes); four vide: la commande de tête part même si elle le dépasse.
+        """
+        with self._lock:
+            free_slots = self.oven_slots - self._busy_slots
+            taken: List[Tuple[int, int]] = []
+            batch: List[int] = []
+            while self._queue and len(batch) < self.prep_stations:
+                rank, order_id = heapq.heappop(self._queue)
+                entry = self._pending.get(order_id)
+                if entry is None or entry.rank != rank:
+                    continue  # entrée périmée (commande démarrée, annulée ou renumérotée)
+                taken.append((rank, order_id))
+                if entry.pizzas > free_slots and (batch or self._busy_slots):
+                    break
+                batch.append(order_id)
+                free_slots -= entry.pizzas
+            for item in taken:
+                heapq.heappush(self._queue, item)
+            return batch
+
+    def stats(self) -> dict:
+        """État de la cuisine (dashboard vendeur)"""
+        with self._lock:
+            return {
+                "oven_slots": self.oven_slots,
+                "busy_slots": self._busy_slots,
+                "prep_stations": self.prep_stations,
+                "pending_orders": len(self._pending),
+                "pending_pizzas": self._pizzas_by_rank.prefix_sum(len(self._pizzas_by_rank)),
+                "preparing_orders": len(self._preparing),
+                "prep_minutes": round(self.prep_minutes, 1),
+            }
@@ -0,0 +1,53 @@
+"""
+Verrous par bandes (striped locks) pour l'inventaire
+
+Un verrou global sérialise toutes les réservations de stock, même quand deux commandes ne
+partagent aucun ingrédient. Ici chaque ingrédient a un index fixe et est protégé par le verrou
+de sa bande (index modulo le nombre de bandes). Une opération prend les verrous des bandes de
+ses ingrédients, toujours dans l'ordre croissant des bandes: deux opérations ne peuvent pas
+s'attendre mutuellement (pas d'interblocage), et des ensembles d'ingrédients disjoints sont
+traités en parallèle.
+
+Une clé absente de l'index (ingrédient chargé depuis la base mais inconnu du menu) est
+placée sur une bande par hachage stable: elle est toujours protégée, par la même bande.
+"""
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
+
+# Nombre de bandes (au moins le nombre d'ingrédients pour un verrou par ingrédient)
+STOCK_LOCK_STRIPES = int(os.getenv("STOCK_LOCK_STRIPES", "32"))
+
+
+class StripedLocks:
+    """Verrous indexés par clé, pris dans un ordre canonique"""
+
+    def __init__(self, keys: Iterable[str], stripes: int = STOCK_LOCK_STRIPES):
+        # Index stable des clés connues (ordre alphabétique)
+        self._index = {key: index for index, key in enumerate(sorted(keys))}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def stripe(self, key: str) -> int:
+        """Bande d'une clé: son index si elle est connue, sinon un hachage stable"""
+        index = self._index.get(key)
+        if index is None:
+            index = zlib.crc32(key.encode("utf-8"))
+        return index % len(self._locks)
+
+    def stripes_for(self, keys: Iterable[str]) -> List[int]:
+        """Bandes des clés, dans l'ordre canonique d'acquisition (sans doublon)"""
+        return sorted({self.stripe(key) for key in keys})
+
+    @contextmanager
+    def acquire(self, keys: Iterable[str]) -> Iterator[None]:
+        """Prend les verrous des clés dans l'ordre croissant des bandes, les relâche en sortie"""
+        locks = [self._locks[stripe] for stripe in self.stripes_for(keys)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
@@ -1,13 +1,34 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
+import asyncio
 import os
-from typing import List, Dict
-from .models import Pizza, PizzaCreate, Order, OrderCreate, Price, Address, InventoryManager, Topping, Ingredient, PizzaMenuPrice, OrderStatus
-from .db import SQLiteInventoryManager
+from typing import List, Dict, Optional, Tuple
+from .models import Pizza, PizzaCreate, Order, OrderCreate, OrderCreateRequest, OrderBatchCreate, OrderAction, OrderTransitionRequest, DriverCreate, DriverUpdate, Price, Address, InventoryManager, Topping, Ingredient, PizzaMenuPrice, OrderStatus, ACTIVE_STATUSES, TERMINAL_STATUSES
+from .db import SQLiteInventoryManager, get_idempotency_store, get_order_repository
+from .repository import OrderRepository
+from .availability import MenuAvailability
+from .export import EXPORT_MEDIA_TYPES, iter_csv, iter_ndjson, iter_orders
+from .archive import OrderArchive, OrderArchiver
+from .idempotency import IdempotencyMiddleware
+from .transitions import MAX_BULK_TRANSITION, ORDER_TRANSITIONS, transition_error
+from .changes import INGREDIENT_CHANGE, ORDER_CHANGE, ChangeLog, ChangeWaiter
+from .etags import check_etag, etag_matches, make_etag
+from .events import ORDER_CANCELLED, ORDER_CREATED, ORDER_STATUS, ORDER_STATUS_CHANGED, EventBus, Event, format_sse, iter_sse, order_topic
+from .batch import MAX_BATCH_SIZE, address_key, ingredient_requirements, parse_order, price_pizzas, validate_addresses
+from .geocoding import close_http_client, geocode_address
+from .async_store import AsyncInventory, AsyncOrderRepository, DatabaseExecutor
+from .kitchen import KitchenScheduler
+from .dispatch import DRIVER_CAPACITY, DispatchPlanner
+from .drivers import DriverRegistry
+from .background import INVENTORY_CHANGED_EVENT, ORDER_CREATED_EVENT, ORDER_STATUS_CHANGED_EVENT, BackgroundBus
+from .analytics import OrderAnalytics
+from .responses import FastJSONResponse, VersionedBody, encode_json, json_bytes_response
+from contextlib import asynccontextmanager
 from pydantic import ValidationError
 import logging
-import threading
 from datetime import datetime
 
 # Configurer le logging
@@ -17,12 +38,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarre les tâches de fond (archivage) au lancement du serveur et les arrête à l'extinction"""
+    order_archiver.start()
+    yield
+    order_archiver.stop()
+    # Effets de bord encore en file (diffusion, compteurs), attendus hors de la boucle
+    await asyncio.to_thread(background_bus.flush)
+    await close_http_client()
+
+
 app = FastAPI(
     title="API de Livraison de Pizza",
     description="API pour gérer les commandes de pizza avec livraison gratuite à partir de 30€",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# Clés d'idempotence de POST /orders et /orders:batch (en-tête Idempotency-Key), partagées entre workers.
+# Ajouté avant CORS: les réponses rejouées passent aussi par le middleware CORS.
+idempotency_store = get_idempotency_store()
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store, paths=["/orders", "/orders:batch"])
+
 # Configurer CORS pour permettre les requêtes du frontend
 # En développement: localhost et 127.0.0.1
 # En production: définir via variable d'environnement ALLOWED_ORIGINS
@@ -31,8 +71,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=False,  # Désactiver credentials quand allow_origins n'est pas ["*"]
-    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "Idempotency-Key", "If-None-Match"],
+    expose_headers=["ETag"],
 )
 
 # Monter les fichiers statiques (HTML, CSS, JS)
@@ -43,20 +84,147 @@ if not os.path.exists(static_dir):
 
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
-# Base de données en mémoire pour les commandes
-orders_db: Dict[int, Order] = {}
-next_order_id = 1
-# Lock pour la thread-safety sur next_order_id
-order_id_lock = threading.Lock()
-# Lock pour la thread-safety sur l'inventaire
-inventory_lock = threading.Lock()
-
+# Dépôt des commandes (SQLite par défaut, voir ORDER_STORE) avec séquence d'identifiants persistée
+orders_db: OrderRepository = get_order_repository()
+# Stockage froid des commandes terminées anciennes, alimenté par l'archiveur en tâche de fond
+order_archive = OrderArchive()
+order_archiver = OrderArchiver(orders_db, order_archive)
 # Gestionnaire d'inventaire avec persistance SQLite
 inventory = SQLiteInventoryManager()
 
+# Accès SQLite des endpoints asynchrones, sur un pool de threads dédié (jamais dans la boucle)
+db_executor = DatabaseExecutor()
+async_orders = AsyncOrderRepository(orders_db, db_executor)
+async_inventory = AsyncInventory(inventory, db_executor)
+
+# Matrice de disponibilité du menu, mise à jour à chaque franchissement de seuil de stock
+menu_availability = MenuAvailability(inventory)
+
+# Séquence globale et journal des modifications (synchronisation différentielle, GET /changes)
+change_log = ChangeLog()
+inventory.add_stock_listener(change_log.on_stock_change)
+# Corps JSON pré-encodés des lectures fréquentes, reconstruits quand leur version (celle de l'ETag) change
+menu_body = VersionedBody(menu_availability.get_menu)
+toppings_body = VersionedBody(inventory.get_all_toppings)
+inventory_body = VersionedBody(inventory.get_full_inventory)
+# Requêtes en attente d'une modification (long-polling de GET /orders/{order_id}/status?wait=)
+change_waiter = ChangeWaiter()
+change_log.add_listener(change_waiter.on_change)
+
+# Bus d'événements des commandes (flux SSE du dashboard vendeur)
+event_bus = EventBus()
+
+# File de la cuisine et délais estimés, repris des commandes en attente / en préparation
+kitchen = KitchenScheduler()
+# Statuts suivis par la cuisine (délai de livraison estimé)
+KITCHEN_STATUSES = (OrderStatus.PENDING, OrderStatus.PREPARING)
+kitchen.load(
+    order
+    for status in KITCHEN_STATUSES
+    for order in orders_db.list_by_status(status, 0, max(orders_db.count_by_status()[status.value], 1))
+)
+# Les délais estimés suivent la file et le four: les long-pollings du statut sont réévalués
+kitchen.add_listener(lambda: change_waiter.on_kind_change(ORDER_CHANGE))
+
+# Livreurs et file des commandes prêtes (affectation automatique)
+drivers = DriverRegistry()
+drivers.load(orders_db.list_by_status(
+    OrderStatus.READY_FOR_DELIVERY, 0, max(orders_db.count_by_status()[OrderStatus.READY_FOR_DELIVERY.value], 1)
+))
+
+
+# Événements métier: effets de bord non critiques exécutés par des workers de fond
+background_bus = BackgroundBus()
+# Événement abandonné (file pleine): les clients SSE ont pu le manquer et se resynchronisent
+background_bus.add_drop_listener(lambda event_type: event_bus.overflow_all())
+# Compteurs d'activité (GET /admin/analytics)
+analytics = OrderAnalytics()
+
+
+def order_created(order: Order) -> None:
+    """
+    Publie order.created. Les compteurs par statut (lecture O(1)) sont pris au moment de la
+    création, dans la section de publication: le dashboard reçoit les états dans l'ordre où
+    ils ont été lus, même si la diffusion est différée.
+    """
+    with background_bus.publishing():
+        background_bus.publish(
+            ORDER_CREATED_EVENT,
+            {"summary": order.get_summary(), "counts": orders_db.count_by_status()},
+            key=order.order_id,
+        )
+
+
+def order_status_changed(summary: dict, previous_status: OrderStatus) -> None:
+    """Publie order.status_changed (annulation comprise: statut cancelled)"""
+    with background_bus.publishing():
+        background_bus.publish(
+            ORDER_STATUS_CHANGED_EVENT,
+            {"summary": summary, "previous_status": previous_status.value, "counts": orders_db.count_by_status()},
+            key=summary["order_id"],
+        )
+
+
+def inventory_changed(ingredient: str, old_quantity: int, new_quantity: int) -> None:
+    """Abonné du stock: publie inventory.changed (réservation, annulation, réapprovisionnement)"""
+    background_bus.publish(
+        INVENTORY_CHANGED_EVENT,
+        {"ingredient": ingredient, "old_quantity": old_quantity, "new_quantity": new_quantity},
+        key=ingredient,
+    )
+
+
+def publish_order_event(event_type: str, data: dict, counts: Dict[str, int]) -> None:
+    """Publie un événement de commande au dashboard vendeur, avec les compteurs par statut"""
+    if event_bus.has_subscribers():
+        event_bus.publish(event_type, {**data, "counts": counts})
+
+
+def publish_order_status(summary: dict) -> None:
+    """
+    Publie le nouveau statut d'une commande aux clients qui la suivent.
+    Sans abonné, rien n'est construit: suivre des milliers de commandes ne coûte rien entre deux transitions.
+    """
+    topic = order_topic(summary["order_id"])
+    if event_bus.has_subscribers(topic):
+        event_bus.publish(ORDER_STATUS, order_status_payload(summary), topic)
+
+
+def broadcast_order_created(payload: dict) -> None:
+    """Abonné order.created: diffusion au dashboard vendeur (SSE)"""
+    publish_order_event(ORDER_CREATED, {"order": with_kitchen_eta(payload["summary"])}, payload["counts"])
+
+
+def broadcast_order_status(payload: dict) -> None:
+    """Abonné order.status_changed: dashboard vendeur et clients qui suivent la commande (SSE)"""
+    summary = payload["summary"]
+    if summary["status"] == OrderStatus.CANCELLED.value:
+        data = {"order_id": summary["order_id"], "previous_status": payload["previous_status"]}
+        publish_order_event(ORDER_CANCELLED, data, payload["counts"])
+    else:
+        data = {"order": with_kitchen_eta(summary), "previous_status": payload["previous_status"]}
+        publish_order_event(ORDER_STATUS_CHANGED, data, payload["counts"])
+    publish_order_status(summary)
+
+
+def log_order_created(payload: dict) -> None:
+    """Abonné order.created: journal"""
+    summary = payload["summary"]
+    logger.info(f"Commande créée: ID={summary['order_id']}, Client={summary['customer_name']}, Total={summary['total']}€")
+
+
+# Diffusion SSE: worker ordonné (les compteurs du dashboard ne reculent jamais)
+background_bus.subscribe(ORDER_CREATED_EVENT, broadcast_order_created, ordered=True)
+background_bus.subscribe(ORDER_STATUS_CHANGED_EVENT, broadcast_order_status, ordered=True)
+background_bus.subscribe(ORDER_CREATED_EVENT, log_order_created)
+background_bus.subscribe(ORDER_CREATED_EVENT, analytics.on_order_created)
+background_bus.subscribe(ORDER_STATUS_CHANGED_EVENT, analytics.on_order_status_changed)
+background_bus.subscribe(INVENTORY_CHANGED_EVENT, analytics.on_inventory_changed)
+inventory.add_stock_listener(inventory_changed)
+
 
 @app.get("/")
-def read_root():
+async def read_root():
     """Page d'accueil de l'API"""
     return {
         "message": "Bienvenue sur l'API de Livraison de Pizza",
@@ -64,10 +232,16 @@ def read_root():
             "GET /": "Cette page",
             "GET /pizzas/menu": "Voir le menu des pizzas disponibles",
             "GET /topping/menu": "Voir les toppings disponibles avec prix",
-            "POST /orders": "Créer une nouvelle commande",
+            "POST /orders": "Créer une nouvelle commande (en-tête Idempotency-Key optionnel)",
+            "POST /orders:batch": "Créer plusieurs commandes en une requête (résultat par commande)",
+            "GET /orders/export": "Exporter l'historique en flux (format=ndjson|csv, since, until, after)",
             "GET /orders/{order_id}": "Voir les détails d'une commande",
-            "GET /orders": "Voir toutes les commandes",
+            "GET /orders": "Voir les commandes (paginé: after, limit, status, since, until, customer, fields)",
             "DELETE /orders/{order_id}": "Annuler une commande",
+            "GET /orders/{order_id}/status/stream": "Suivre le statut d'une commande en temps réel (SSE)",
+            "GET /customers/{customer_key}/orders": "Historique des commandes d'un client",
+            "POST /customers/{customer_key}/reorder": "Recommander la dernière commande d'un client",
+            "GET /changes": "Commandes et stocks modifiés depuis une séquence (since=<seq>)",
             "GET /inventory": "Voir tout l'inventaire (ingrédients de base et toppings) avec quantités",
             "POST /inventory/ingredients/{ingredient_name}/add": "Ajouter du stock à un ingrédient",
             "GET /pricing/info": "Informations sur la tarification"
@@ -76,7 +250,7 @@ def read_root():
 
 
 @app.get("/pizzas/menu")
-def get_menu() -> List[PizzaMenuPrice]:
+async def get_menu(request: Request, response: Response) -> List[PizzaMenuPrice]:
     """
     Retourne le menu des pizzas disponibles avec les prix pour chaque taille.
 
@@ -84,39 +258,38 @@ def get_menu() -> List[PizzaMenuPrice]:
     - Son nom
     - Les toppings inclus de base
     - Les prix pour small, medium et large
-    """
-    menu_data = [
-        ("Margherita", ["tomate", "mozzarella", "basilic"]),
-        ("Reine", ["tomate", "mozzarella", "jambon", "champignons"]),
-        ("4 Fromages", ["mozzarella", "gorgonzola", "chèvre", "emmental"]),
-        ("Calzone", ["tomate", "mozzarella", "jambon", "oeuf"]),
-        ("Végétarienne", ["tomate", "mozzarella", "poivrons", "oignons", "olives"]),
-        ("Pepperoni", ["tomate", "mozzarella", "pepperoni"]),
-    ]
-
-    result = []
-    for pizza_name, toppings in menu_data:
-        prices = {}
-        for size in ["small", "medium", "large"]:
-            prices[size] = Price.calculate_pizza_price(pizza_name, size, toppings)
+    - La disponibilité par taille et les toppings en rupture de stock
 
-        result.append(PizzaMenuPrice(
-            name=pizza_name,
-            base_toppings=toppings,
-            prices=prices
-        ))
-
-    return result
+    Le menu et sa disponibilité sont précalculés et maintenus incrémentalement
+    à chaque changement de stock: la requête ne fait aucun calcul.
+    L'ETag suit la version de la matrice de disponibilité (If-None-Match: 304);
+    le corps JSON de chaque version est encodé une seule fois.
+    """
+    version = (change_log.epoch, menu_availability.version)
+    etag = make_etag("menu", *version)
+    not_modified = check_etag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    return json_bytes_response(menu_body.get(version), etag)
 
 
 @app.get("/topping/menu")
-def get_toppings_menu() -> List[Topping]:
-    """Retourne la liste de tous les toppings disponibles avec leur prix (+1€)"""
-    return inventory.get_all_toppings()
+async def get_toppings_menu(request: Request, response: Response) -> List[Topping]:
+    """
+    Retourne la liste de tous les toppings disponibles avec leur prix (+1€)
+
+    La liste ne dépend que des ingrédients référencés, fixes pendant la vie du processus:
+    l'ETag ne change qu'au redémarrage (If-None-Match: 304). Le corps est encodé une seule fois.
+    """
+    etag = make_etag("toppings", change_log.epoch)
+    not_modified = check_etag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    return json_bytes_response(toppings_body.get(change_log.epoch), etag)
 
 
 @app.get("/pricing/info")
-def get_pricing_info():
+async def get_pricing_info():
     """Retourne les informations sur la tarification"""
     return {
         "delivery_fee": Price.DELIVERY_FEE,
@@ -126,7 +299,7 @@ def get_pricing_info():
 
 
 @app.post("/orders", status_code=201)
-def create_order(order_create: OrderCreate) -> dict:
+async def create_order(order_create: OrderCreateRequest) -> dict:
     """
     Crée une nouvelle commande de pizza
 
@@ -152,9 +325,14 @@ def create_order(order_create: OrderCreate) -> dict:
         - postal_code: Code postal (doit être "31000")
 
         L'adresse est validée via géocodage pour s'assurer qu'elle existe réellement à Toulouse.
-    """
-    global next_order_id
+        Le géocodage est asynchrone: la requête en attente n'occupe ni la boucle ni un thread.
 
+    IDEMPOTENCE:
+    - En-tête optionnel Idempotency-Key (ex: un UUID généré par le client pour cette commande)
+    - Une requête réessayée avec la même clé renvoie la réponse d'origine (en-tête Idempotent-Replayed),
+      sans nouveau géocodage, sans toucher à l'inventaire et sans créer de doublon
+    - Même clé pour un corps différent: 422; requête d'origine encore en cours: 409
+    """
     if not order_create.pizzas:
         logger.warning(f"Tentative de création de commande sans pizzas par {order_create.customer_name}")
         raise HTTPException(status_code=400, detail="La commande doit contenir au moins une pizza")
@@ -163,67 +341,303 @@ def create_order(order_create: OrderCreate) -> dict:
         logger.warning("Tentative de création de commande sans nom de client")
         raise HTTPException(status_code=400, detail="Le nom du client est obligatoire")
 
+    error = await geocode_address(order_create.customer_address)
+    if error is not None:
+        logger.warning(f"Adresse refusée pour {order_create.customer_name}: {error}")
+        raise RequestValidationError([{
+            "type": "value_error",
+            "loc": ("body", "customer_address"),
+            "msg": f"Value error, {error}",
+            "input": order_create.customer_address.model_dump()
+        }])
+    customer_address = Address.model_validate(order_create.customer_address.model_dump(), context={"skip_geocoding": True})
+
+    order = await place_order(order_create.pizzas, order_create.customer_name, customer_address)
+    return with_kitchen_eta(order.get_summary())
+
+
+async def place_order(pizza_creates: List[PizzaCreate], customer_name: str, customer_address: Address) -> Order:
+    """
+    Calcule les prix, réserve le stock et enregistre la commande.
+    L'adresse doit déjà être validée (géocodée): elle n'est pas revalidée ici.
+    """
     # Convertir les PizzaCreate en Pizza avec calcul automatique du prix (AVANT le lock)
-    pizzas_with_prices = [Pizza.from_create(pizza_create) for pizza_create in order_create.pizzas]
-
-    # LOCK: Vérifier et réduire l'inventaire de manière atomique (thread-safe)
-    with inventory_lock:
-        # Vérifier la disponibilité du stock AVANT de créer la commande
-        can_fulfill, error_message = inventory.can_fulfill_order(order_create.pizzas)
-        if not can_fulfill:
-            logger.warning(f"Commande rejetée pour {order_create.customer_name}: {error_message}")
-            raise HTTPException(status_code=409, detail=f"Commande impossible: {error_message}")
-
-        # Réduire l'inventaire (protégé par le lock)
-        inventory.reduce_inventory(pizzas_with_prices)
-
-    # Utiliser le lock pour assurer que next_order_id est thread-safe
-    with order_id_lock:
-        current_order_id = next_order_id
-        next_order_id += 1
-
-    order = Order(
-        order_id=current_order_id,
-        pizzas=pizzas_with_prices,
-        customer_name=order_create.customer_name,
-        customer_address=order_create.customer_address
+    pizzas_with_prices = [Pizza.from_create(pizza_create) for pizza_create in pizza_creates]
+
+    # Vérifier et réduire l'inventaire de manière atomique (verrous des seuls ingrédients de la commande).
+    # Le commit du stock n'est pas attendu: l'écrivain SQLite le fait, échecs journalisés et réessayés
+    error_message = await async_inventory.reserve_order(pizza_creates, pizzas_with_prices, wait_for_commit=False)
+    if error_message is not None:
+        logger.warning(f"Commande rejetée pour {customer_name}: {error_message}")
+        raise HTTPException(status_code=409, detail=f"Commande impossible: {error_message}")
+
+    # Identifiant unique issu de la séquence du dépôt (persistée avec SQLite)
+    current_order_id = await async_orders.next_order_id()
+
+    # L'adresse a déjà été géocodée (validation de OrderCreate ou commande précédente): ne pas la revalider
+    order = Order.model_validate(
+        {
+            "order_id": current_order_id,
+            "pizzas": pizzas_with_prices,
+            "customer_name": customer_name,
+            "customer_address": customer_address,
+        },
+        context={"skip_geocoding": True},
     )
 
-    orders_db[current_order_id] = order
+    # File de la cuisine (délai estimé de la réponse) et journal des modifications: sur le chemin de la requête;
+    # diffusion, journal et compteurs: en tâche de fond (order.created)
+    await async_orders.add(order)
+    kitchen.enqueue(order)
+    change_log.record_orders([order.order_id])
+    order_created(order)
+    return order
+
+
+@app.post("/orders:batch")
+async def create_orders_batch(batch: OrderBatchCreate) -> dict:
+    """
+    Crée plusieurs commandes en une requête (commandes traiteur / entreprise)
+
+    Chaque élément de "orders" a le format de POST /orders. Les commandes sont traitées en lot:
+    - chaque adresse distincte est géocodée une seule fois
+    - les prix sont calculés en une passe
+    - le stock de tout le lot est réservé en une seule prise du lock, dans l'ordre du lot
+    - les commandes acceptées sont enregistrées en une seule transaction
+
+    Chaque commande est acceptée ou rejetée individuellement (champs invalides, adresse introuvable,
+    rupture de stock): le résultat indique pour chaque position "created" avec la commande, ou
+    "rejected" avec la raison. Maximum MAX_BATCH_SIZE commandes par lot.
+    """
+    if not batch.orders:
+        raise HTTPException(status_code=400, detail="Le lot doit contenir au moins une commande")
+    if len(batch.orders) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Le lot ne peut pas dépasser {MAX_BATCH_SIZE} commandes")
+
+    # Validation des champs (sans géocodage), puis géocodage une fois par adresse distincte
+    errors: List[Optional[str]] = []
+    parsed: List[Optional[OrderCreate]] = []
+    for payload in batch.orders:
+        order_create, error = parse_order(payload)
+        parsed.append(order_create)
+        errors.append(error)
+
+    address_errors = await validate_addresses(order_create.customer_address for order_create in parsed if order_create is not None)
+    for index, order_create in enumerate(parsed):
+        if order_create is not None:
+            errors[index] = address_errors[address_key(order_create.customer_address)]
+
+    valid = [index for index, error in enumerate(errors) if error is None]
+    pizzas_by_index = dict(zip(valid, price_pizzas(parsed[index] for index in valid)))
+
+    # Une seule réservation de stock pour tout le lot (verrous des ingrédients du lot)
+    requirements = [ingredient_requirements(parsed[index].pizzas) for index in valid]
+    stock_errors = await async_inventory.reserve_batch(
+        requirements,
+        [pizzas_by_index[index] for index in valid],
+        wait_for_commit=False,
+    )
+    accepted = []
+    for index, stock_error in zip(valid, stock_errors):
+        if stock_error is None:
+            accepted.append(index)
+        else:
+            errors[index] = f"Commande impossible: {stock_error}"
+
+    orders_by_index: Dict[int, Order] = {}
+    if accepted:
+        for order_id, index in zip(await async_orders.next_order_ids(len(accepted)), accepted):
+            orders_by_index[index] = Order.model_validate(
+                {
+                    "order_id": order_id,
+                    "pizzas": pizzas_by_index[index],
+                    "customer_name": parsed[index].customer_name,
+                    "customer_address": parsed[index].customer_address,
+                },
+                context={"skip_geocoding": True},
+            )
+        await async_orders.add_many(list(orders_by_index.values()))
+        for order in orders_by_index.values():
+            kitchen.enqueue(order)
+        change_log.record_orders(order.order_id for order in orders_by_index.values())
+        for order in orders_by_index.values():
+            order_created(order)
+
+    results = []
+    for index, error in enumerate(errors):
+        order = orders_by_index.get(index)
+        if order is not None:
+            results.append({"index": index, "status": "created", "order": with_kitchen_eta(order.get_summary())})
+        else:
+            results.append({"index": index, "status": "rejected", "error": error})
+
+    logger.info(f"Lot de commandes: {len(accepted)} créées, {len(errors) - len(accepted)} rejetées")
+    return {
+        "created": len(accepted),
+        "rejected": len(errors) - len(accepted),
+        "results": results
+    }
+
+
+@app.get("/orders/export")
+def export_orders(
+    format: str = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Exporte l'historique des commandes en flux (NDJSON ou CSV), en mémoire constante
 
-    logger.info(f"Commande créée: ID={current_order_id}, Client={order_create.customer_name}, Total={order.calculate_total()}€")
+    Query parameters:
+    - format: ndjson (défaut) ou csv
+    - since / until: filtre sur la date de création, intervalle [since, until[
+    - after: reprise d'un export interrompu, identifiant de la dernière commande reçue
 
-    return order.get_summary()
+    Les commandes sont écrites par identifiant croissant, commandes archivées comprises:
+    le dernier order_id reçu sert de curseur pour reprendre l'export.
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Format inconnu: {format} (ndjson ou csv)")
+
+    orders = iter_orders(orders_db, after=after, since=to_local_naive(since), until=to_local_naive(until), archive=order_archive)
+    body = iter_csv(orders) if format == "csv" else iter_ndjson(orders)
+    filename = f"orders-{datetime.now():%Y%m%d-%H%M%S}.{format}"
+
+    logger.info(f"Export des commandes démarré: format={format}, after={after}, since={since}, until={until}")
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @app.get("/orders/{order_id}")
-def get_order(order_id: int) -> dict:
-    """Récupère les détails d'une commande spécifique"""
-    if order_id not in orders_db:
-        raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+def get_order(order_id: int) -> Response:
+    """
+    Récupère les détails d'une commande spécifique (résumé JSON pré-encodé, mis en cache).
+    Commande en attente ou en préparation: résumé complété du délai estimé par la cuisine
+    """
+    summary = orders_db.get_summary(order_id) if kitchen.estimated_delivery_minutes(order_id) is not None else None
+    if summary is not None:
+        return json_bytes_response(encode_json(with_kitchen_eta(summary)))
+
+    summary_json = orders_db.get_summary_json(order_id)
+    if summary_json is None:
+        archived_order = order_archive.get(order_id)
+        if archived_order is None:
+            raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+        summary_json = archived_order.get_summary_json()
 
-    order = orders_db[order_id]
-    return order.get_summary()
+    return Response(content=summary_json, media_type="application/json")
+
+
+# Pagination de GET /orders
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def to_local_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Convertit une date avec fuseau en heure locale naïve (format de Order.created_at)"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def project_summary(summary: dict, fields: Optional[List[str]]) -> dict:
+    """Ne garde que les champs demandés d'un résumé de commande"""
+    if not fields:
+        return summary
+    return {field: summary[field] for field in fields if field in summary}
 
 
 @app.get("/orders")
-def get_all_orders() -> List[dict]:
-    """Récupère toutes les commandes"""
-    return [order.get_summary() for order in orders_db.values()]
+def get_all_orders(
+    response: Response,
+    after: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    status: Optional[OrderStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    customer: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> List[dict]:
+    """
+    Récupère les commandes par pages, triées par identifiant croissant (pagination keyset)
+
+    Query parameters:
+    - after: curseur, identifiant de la dernière commande de la page précédente
+    - limit: taille de la page (défaut 100, max 1000)
+    - status: filtre sur le statut
+    - since / until: filtre sur la date de création, intervalle [since, until[
+    - customer: filtre sur la clé client (champ customer_key des résumés)
+    - fields: projection, liste de champs séparés par des virgules (ex: order_id,status,total)
+
+    Le curseur de la page suivante est retourné dans l'en-tête X-Next-Cursor (absent sur la dernière page).
+    Les commandes livrées ou annulées créées avant l'en-tête X-Archive-Cutoff peuvent avoir été
+    archivées: elles ne sont plus listées ici (voir GET /orders/{order_id} et GET /orders/export).
+    """
+    if limit <= 0 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit doit être compris entre 1 et {MAX_PAGE_SIZE}")
+
+    orders = orders_db.list_orders(
+        after=after,
+        limit=limit,
+        status=status,
+        since=to_local_naive(since),
+        until=to_local_naive(until),
+        customer_key=customer,
+    )
+    if len(orders) == limit:
+        response.headers["X-Next-Cursor"] = str(orders[-1].order_id)
+    response.headers["X-Archive-Cutoff"] = order_archiver.cutoff().isoformat(timespec="seconds")
+
+    selected_fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    return [project_summary(with_kitchen_eta(order.get_summary()), selected_fields) for order in orders]
+
+
+def mark_cancelled(order_id: int) -> Tuple[Order, OrderStatus]:
+    """
+    Passe une commande non terminée au statut cancelled (compare-and-set sur son statut actuel,
+    repris si elle a avancé entre-temps). La commande reste enregistrée: elle compte dans les
+    annulations et sera archivée comme les commandes livrées.
+    Retourne la commande annulée et son statut précédent.
+    """
+    while True:
+        order = orders_db.get(order_id)
+        if order is None:
+            logger.warning(f"Tentative d'annulation d'une commande inexistante: ID={order_id}")
+            raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+        if order.status in TERMINAL_STATUSES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Commande ne peut pas être annulée (statut actuel: {order.status.value})"
+            )
+        cancelled, _ = orders_db.transition(order_id, order.status, OrderStatus.CANCELLED, at=datetime.now())
+        if cancelled is not None:
+            return cancelled, order.status
 
 
 @app.delete("/orders/{order_id}")
-def cancel_order(order_id: int) -> dict:
-    """Annule une commande et restaure l'inventaire"""
-    if order_id not in orders_db:
-        logger.warning(f"Tentative d'annulation d'une commande inexistante: ID={order_id}")
-        raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+async def cancel_order(order_id: int) -> dict:
+    """
+    Annule une commande et restaure l'inventaire
 
-    order = orders_db.pop(order_id)
+    La commande passe au statut cancelled (une seule annulation réussit, même concurrente);
+    une commande livrée ou déjà annulée ne peut pas être annulée (400).
+    """
+    order, previous_status = await db_executor.run(mark_cancelled, order_id)
+
+    kitchen.remove(order_id)
+    driver_freed = drivers.remove_order(order)
+    change_log.record_orders([order_id])
+    if driver_freed:
+        # Le livreur de la commande peut prendre une commande en attente
+        await db_executor.run(assign_drivers)
 
     # Restaurer l'inventaire quand la commande est annulée
-    with inventory_lock:
-        inventory.restore_inventory(order.pizzas)
+    await async_inventory.restore_inventory(order.pizzas)
+    order_status_changed(order.get_summary(), previous_status)
 
     logger.info(f"Commande annulée: ID={order_id}, Client={order.customer_name}, Inventaire restauré")
     return {
@@ -232,12 +646,78 @@ def cancel_order(order_id: int) -> dict:
     }
 
 
+# ====================
+# HISTORIQUE CLIENT
+# ====================
+
+# Nombre de commandes retournées par GET /customers/{customer_key}/orders
+DEFAULT_CUSTOMER_ORDERS = 20
+MAX_CUSTOMER_ORDERS = 100
+
+
+def get_customer_orders(customer_key: str, limit: int) -> List[Order]:
+    """Commandes d'un client (dépôt + archive, via leurs index customer_key), les plus récentes d'abord"""
+    orders = {order.order_id: order for order in order_archive.list_by_customer(customer_key, limit)}
+    orders.update((order.order_id, order) for order in orders_db.list_by_customer(customer_key, limit))
+    return [orders[order_id] for order_id in sorted(orders, reverse=True)[:limit]]
+
+
+@app.get("/customers/{customer_key}/orders")
+def get_customer_order_history(customer_key: str, limit: int = DEFAULT_CUSTOMER_ORDERS) -> dict:
+    """
+    Historique des commandes d'un client, les plus récentes d'abord (commandes archivées incluses)
+
+    La clé client (champ customer_key des résumés) est dérivée du nom et de l'adresse normalisés.
+    Query parameters:
+    - limit: nombre maximum de commandes (défaut 20, max 100)
+    """
+    if limit <= 0 or limit > MAX_CUSTOMER_ORDERS:
+        raise HTTPException(status_code=400, detail=f"limit doit être compris entre 1 et {MAX_CUSTOMER_ORDERS}")
+
+    orders = get_customer_orders(customer_key, limit)
+    if not orders:
+        raise HTTPException(status_code=404, detail=f"Aucune commande pour le client {customer_key}")
+
+    return {
+        "customer_key": customer_key,
+        "customer_name": orders[0].customer_name,
+        "orders": [with_kitchen_eta(order.get_summary()) for order in orders]
+    }
+
+
+@app.post("/customers/{customer_key}/reorder", status_code=201)
+async def reorder_last_order(customer_key: str) -> dict:
+    """
+    Recommande la dernière commande d'un client (mêmes pizzas, même adresse)
+
+    Chemin rapide: l'adresse de la commande précédente a déjà été validée et n'est pas géocodée
+    à nouveau. Les prix sont recalculés au tarif actuel et le stock est vérifié comme pour POST /orders.
+    """
+    orders = await db_executor.run(get_customer_orders, customer_key, 1)
+    if not orders:
+        raise HTTPException(status_code=404, detail=f"Aucune commande pour le client {customer_key}")
+    last_order = orders[0]
+
+    pizza_creates = [
+        PizzaCreate(name=pizza.name, size=pizza.size, toppings=list(pizza.toppings))
+        for pizza in last_order.pizzas
+    ]
+    order = await place_order(pizza_creates, last_order.customer_name, last_order.customer_address)
+
+    logger.info(f"Commande renouvelée: ID={order.order_id} (d'après la commande {last_order.order_id}), Client={order.customer_name}")
+    return {
+        "message": f"Commande {last_order.order_id} recommandée",
+        "reordered_from": last_order.order_id,
+        "order": with_kitchen_eta(order.get_summary())
+    }
+
+
 # ====================
 # GESTION DU STOCK DES INGRÉDIENTS
 # ====================
 
 @app.get("/inventory")
-def get_inventory() -> dict:
+async def get_inventory(request: Request, response: Response) -> dict:
     """
     Retourne l'inventaire complet avec tous les ingrédients de base et toppings avec leurs quantités.
 
@@ -254,12 +734,20 @@ def get_inventory() -> dict:
         ],
         "total_quantity": 1100
     }
+
+    L'ETag suit la dernière modification de stock (If-None-Match: 304); le corps JSON
+    n'est ré-encodé qu'après une modification de stock.
     """
-    return inventory.get_full_inventory()
+    version = change_log.version(INGREDIENT_CHANGE)
+    etag = make_etag("inventory", version)
+    not_modified = check_etag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    return json_bytes_response(inventory_body.get(version), etag)
 
 
 @app.post("/inventory/ingredients/{ingredient_name}/add")
-def add_ingredient_stock(ingredient_name: str, quantity: int) -> dict:
+async def add_ingredient_stock(ingredient_name: str, quantity: int) -> dict:
     """
     Ajoute du stock à un ingrédient
 
@@ -270,12 +758,11 @@ def add_ingredient_stock(ingredient_name: str, quantity: int) -> dict:
         logger.warning(f"Tentative d'ajout de stock avec quantité invalide: {ingredient_name}={quantity}")
         raise HTTPException(status_code=400, detail="La quantité doit être positive")
 
-    success = inventory.add_ingredient_stock(ingredient_name, quantity)
-    if not success:
+    current_stock = await async_inventory.add_ingredient_stock(ingredient_name, quantity)
+    if current_stock is None:
         logger.warning(f"Tentative d'ajout de stock pour un ingrédient inexistant: {ingredient_name}")
         raise HTTPException(status_code=404, detail=f"Ingrédient '{ingredient_name}' non trouvé")
 
-    current_stock = inventory.get_ingredient_stock(ingredient_name)
     logger.info(f"Stock augmenté: {ingredient_name} +{quantity} (nouveau stock: {current_stock})")
     return {
         "message": f"Stock de {ingredient_name} augmenté de {quantity}",
@@ -286,163 +773,496 @@ def add_ingredient_stock(ingredient_name: str, quantity: int) -> dict:
 
 
 # ====================
-# ENDPOINTS POUR SUIVI DES COMMANDES (CLIENT)
+# SYNCHRONISATION DIFFÉRENTIELLE
 # ====================
 
-@app.get("/orders/{order_id}/status")
-def get_order_status(order_id: int) -> dict:
-    """
-    Obtient le statut détaillé d'une commande pour le client
+def active_order_summaries() -> List[dict]:
+    """Résumés en cache des commandes actives (index par statut): jamais l'historique complet"""
+    counts = orders_db.count_by_status()
+    return [
+        summary
+        for status in ACTIVE_STATUSES
+        for summary in orders_db.summaries_by_status(status, 0, max(counts[status.value], 1))
+    ]
+
+
+@app.get("/changes")
+def get_changes(since: Optional[int] = None) -> dict:
     """
-    if order_id not in orders_db:
-        raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+    Retourne les commandes et ingrédients modifiés depuis la séquence `since`
 
-    order = orders_db[order_id]
-    summary = order.get_summary()
+    Le client conserve "sequence" de la réponse et la renvoie au prochain appel.
+    Sans curseur, ou si le curseur est trop ancien pour le journal (ou émis avant un
+    redémarrage), la réponse est un instantané ("full": true) qui remplace l'état du client:
+    commandes actives (non livrées, non annulées, lues dans le cache du dépôt) et stock.
+    L'historique des commandes terminées se lit via GET /orders ou GET /orders/export.
 
-    # Ajouter des informations de progression
-    progress = {
-        "pending": 0,
-        "preparing": 25,
-        "ready_for_delivery": 50,
-        "in_delivery": 75,
-        "delivered": 100,
-        "cancelled": 0
+    Format:
+    {
+        "sequence": 1718000000000042,
+        "full": false,
+        "orders": [résumés des commandes modifiées, annulées comprises (statut cancelled)],
+        "removed_order_ids": [commandes modifiées puis retirées du dépôt],
+        "ingredients": {"pate": 198, ...}
     }
+    """
+    changes = change_log.changes_since(since) if since is not None else None
+    if changes is None:
+        # Séquence lue avant l'état: une modification concurrente sera renvoyée au prochain appel
+        sequence = change_log.sequence
+        return {
+            "sequence": sequence,
+            "full": True,
+            "orders": active_order_summaries(),
+            "removed_order_ids": [],
+            "ingredients": dict(inventory.ingredients)
+        }
+
+    orders = []
+    removed_order_ids = []
+    for order_id in sorted(changes.order_ids):
+        summary = orders_db.get_summary(order_id)
+        if summary is None:
+            removed_order_ids.append(order_id)
+        else:
+            orders.append(summary)
 
     return {
-        **summary,
-        "progress_percent": progress.get(order.status.value, 0),
-        "status_label": {
-            "pending": "En attente de confirmation",
-            "preparing": "En cours de préparation",
-            "ready_for_delivery": "Prête pour livraison",
-            "in_delivery": "En cours de livraison",
-            "delivered": "Livrée",
-            "cancelled": "Annulée"
-        }.get(order.status.value, "Inconnu")
+        "sequence": changes.sequence,
+        "full": False,
+        "orders": orders,
+        "removed_order_ids": removed_order_ids,
+        "ingredients": {name: inventory.get_ingredient_stock(name) for name in sorted(changes.ingredients)}
     }
 
 
 # ====================
-# ENDPOINTS POUR ADMIN/VENDEUR
+# ENDPOINTS POUR SUIVI DES COMMANDES (CLIENT)
 # ====================
 
-@app.get("/admin/orders")
-def get_admin_orders() -> dict:
+# Informations de progression affichées au client
+STATUS_PROGRESS = {
+    "pending": 0,
+    "preparing": 25,
+    "ready_for_delivery": 50,
+    "in_delivery": 75,
+    "delivered": 100,
+    "cancelled": 0
+}
+
+STATUS_LABELS = {
+    "pending": "En attente de confirmation",
+    "preparing": "En cours de préparation",
+    "ready_for_delivery": "Prête pour livraison",
+    "in_delivery": "En cours de livraison",
+    "delivered": "Livrée",
+    "cancelled": "Annulée"
+}
+
+
+# Durée maximale d'attente d'un long-polling sur le statut (secondes)
+MAX_STATUS_WAIT_SECONDS = 60
+
+
+def order_status_etag(order_id: int) -> str:
     """
-    Obtient toutes les commandes groupées par statut (pour le vendeur)
+    ETag du statut d'une commande: version de sa dernière modification et délai estimé par la
+    cuisine (0 hors cuisine), qui change avec la file et le four sans que la commande soit modifiée
     """
-    orders_by_status = {
-        "pending": [],
-        "preparing": [],
-        "ready_for_delivery": [],
-        "in_delivery": [],
-        "delivered": [],
-        "cancelled": []
-    }
+    estimated_minutes = kitchen.estimated_delivery_minutes(order_id) or 0
+    return make_etag(order_id, change_log.version(ORDER_CHANGE, order_id), estimated_minutes)
+
 
-    for order in orders_db.values():
-        status = order.status.value
-        if status in orders_by_status:
-            orders_by_status[status].append(order.get_summary())
+@app.get("/orders/{order_id}/status")
+async def get_order_status(order_id: int, request: Request, response: Response, wait: float = 0) -> dict:
+    """
+    Obtient le statut détaillé d'une commande pour le client
 
+    Réponse avec ETag (version de la commande et délai estimé par la cuisine). Avec If-None-Match:
+    - version et délai inchangés: 304 sans construire la réponse
+    - wait=<secondes> (max MAX_STATUS_WAIT_SECONDS): long-polling, la requête attend la
+      prochaine modification de la commande ou de son délai estimé (réponse 200) ou
+      l'expiration du délai (304). Le temps déjà passé au four n'est relu qu'à l'expiration
+    """
+    if wait < 0 or wait > MAX_STATUS_WAIT_SECONDS:
+        raise HTTPException(status_code=400, detail=f"wait doit être compris entre 0 et {MAX_STATUS_WAIT_SECONDS} secondes")
+
+    etag = order_status_etag(order_id)
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag):
+        if wait:
+            await change_waiter.wait(ORDER_CHANGE, order_id, lambda: order_status_etag(order_id) == etag, wait)
+            etag = order_status_etag(order_id)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    # ETag lu avant le statut: la réponse n'est jamais plus ancienne que sa version
+    status = await db_executor.run(order_status, order_id)
+    response.headers["ETag"] = etag
+    return status
+
+
+def order_status(order_id: int) -> dict:
+    """Statut détaillé d'une commande active ou archivée (404 si inconnue)"""
+    summary = orders_db.get_summary(order_id)
+    if summary is None:
+        archived_order = order_archive.get(order_id)
+        if archived_order is None:
+            raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+        summary = archived_order.get_summary()
+
+    return order_status_payload(summary)
+
+
+def order_status_payload(summary: dict) -> dict:
+    """Résumé de commande complété de la progression, du libellé et du délai de la cuisine affichés au client"""
     return {
-        "total_orders": len(orders_db),
-        "orders_by_status": orders_by_status
+        **with_kitchen_eta(summary),
+        "progress_percent": STATUS_PROGRESS.get(summary["status"], 0),
+        "status_label": STATUS_LABELS.get(summary["status"], "Inconnu")
     }
 
 
-@app.post("/admin/orders/{order_id}/start")
-def start_order_preparation(order_id: int) -> dict:
+def with_kitchen_eta(summary: dict) -> dict:
     """
-    Marque le début de la préparation d'une commande
+    Résumé avec le délai de livraison estimé d'après la file de la cuisine (commande en attente
+    ou en préparation); sinon le résumé inchangé, sans délai (le résumé en cache n'est jamais
+    modifié et ne contient jamais de délai: il serait périmé à la modification suivante de la file)
     """
-    if order_id not in orders_db:
-        raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+    estimated_minutes = kitchen.estimated_delivery_minutes(summary["order_id"])
+    if estimated_minutes is None:
+        return summary
+    return {**summary, "estimated_delivery_minutes": estimated_minutes}
 
-    order = orders_db[order_id]
 
-    if order.status != OrderStatus.PENDING:
-        raise HTTPException(status_code=400, detail=f"Commande ne peut pas être préparée (statut actuel: {order.status.value})")
+FINAL_STATUS_VALUES = frozenset(status.value for status in TERMINAL_STATUSES)
 
-    order.status = OrderStatus.PREPARING
-    order.started_at = datetime.now()
 
-    logger.info(f"Préparation commencée: ID={order_id}, Client={order.customer_name}")
+def is_final_status_event(event: Event) -> bool:
+    """Vrai si l'événement de suivi porte un statut final (livrée, annulée)"""
+    return event.data["status"] in FINAL_STATUS_VALUES
 
-    return {
-        "message": f"Préparation de la commande {order_id} commencée",
-        "order": order.get_summary()
-    }
 
+@app.get("/orders/{order_id}/status/stream")
+async def stream_order_status(order_id: int, request: Request) -> StreamingResponse:
+    """
+    Flux Server-Sent Events du statut d'une commande pour le client
 
-@app.post("/admin/orders/{order_id}/ready")
-def mark_order_ready(order_id: int) -> dict:
+    Le premier événement order_status contient le statut actuel (même contenu que
+    GET /orders/{order_id}/status), puis un événement est poussé à chaque transition.
+    Le flux se termine quand la commande est livrée ou annulée.
+    Événement resync: des événements ont été perdus, relire GET /orders/{order_id}/status.
     """
-    Marque une commande comme prête pour livraison
+    # S'abonner avant de lire le statut: aucune transition ne peut passer entre les deux
+    subscription = event_bus.subscribe(order_topic(order_id))
+    try:
+        status = await db_executor.run(order_status, order_id)
+    except HTTPException:
+        event_bus.unsubscribe(subscription)
+        raise
+
+    async def events():
+        try:
+            yield format_sse(None, ORDER_STATUS, status)
+            if status["status"] in FINAL_STATUS_VALUES:
+                return
+            async for message in iter_sse(subscription, request.is_disconnected, is_final=is_final_status_event):
+                yield message
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ====================
+# ENDPOINTS POUR ADMIN/VENDEUR
+# ====================
+
+@app.get("/admin/orders")
+def get_admin_orders(
+    status: Optional[OrderStatus] = None,
+    limit: int = 50,
+    offset: int = 0,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
     """
-    if order_id not in orders_db:
-        raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+    Obtient les commandes groupées par statut (pour le vendeur)
 
-    order = orders_db[order_id]
+    Les compteurs par statut sont maintenus en O(1) et les colonnes lues via l'index par statut:
+    le coût est proportionnel aux commandes affichées, pas à l'historique complet. Les résumés
+    pré-encodés en JSON (en cache avec chaque commande) sont insérés tels quels dans la réponse;
+    les commandes en cuisine sont complétées de leur délai estimé (voir column_summaries).
 
-    if order.status != OrderStatus.PREPARING:
-        raise HTTPException(status_code=400, detail=f"Commande doit être en cours de préparation (statut actuel: {order.status.value})")
+    Query parameters:
+    - status: ne retourner que la colonne de ce statut (ex: delivered). Par défaut: colonnes actives
+    - limit / offset: pagination de chaque colonne retournée
+    - since / until: ne garder que les commandes créées dans [since, until[ (ex: la dernière heure,
+      les annulations du jour); les compteurs portent alors sur cet intervalle. Lecture via l'index
+      temporel sur created_at, en O(log n + k)
+    """
+    if limit <= 0 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit doit être positif et offset >= 0")
+
+    since, until = to_local_naive(since), to_local_naive(until)
+    columns = [status] if status is not None else ACTIVE_STATUSES
+    counts = orders_db.count_by_status(since, until)
+
+    # Résumés pré-encodés en cache insérés tels quels dans le corps
+    return json_bytes_response(encode_json({
+        "total_orders": sum(counts.values()),
+        "counts": counts,
+        "archived_orders": order_archive.count(),
+        "orders_by_status": {
+            column.value: column_summaries(column, offset, limit, since, until)
+            for column in columns
+        },
+        "limit": limit,
+        "offset": offset
+    }))
+
+
+def column_summaries(
+    status: OrderStatus,
+    offset: int,
+    limit: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> list:
+    """
+    Colonne du dashboard: résumés pré-encodés en cache, sauf en cuisine (en attente, en préparation)
+    où chaque résumé est complété de son délai estimé
+    """
+    if status in KITCHEN_STATUSES:
+        return [with_kitchen_eta(summary) for summary in orders_db.summaries_by_status(status, offset, limit, since, until)]
+    return orders_db.summaries_json_by_status(status, offset, limit, since, until)
 
-    order.status = OrderStatus.READY_FOR_DELIVERY
-    order.ready_at = datetime.now()
 
-    logger.info(f"Commande prête pour livraison: ID={order_id}, Client={order.customer_name}")
+@app.get("/admin/orders/stream")
+async def stream_admin_orders(request: Request) -> StreamingResponse:
+    """
+    Flux Server-Sent Events des changements de commandes pour le dashboard vendeur
 
+    Événements:
+    - order_created: {"order": résumé, "counts": compteurs par statut}
+    - order_status_changed: {"order": résumé, "previous_status": ..., "counts": ...}
+    - order_cancelled: {"order_id": ..., "previous_status": ..., "counts": ...}
+    - resync: des événements ont été perdus, recharger GET /admin/orders
+
+    Le client charge l'état initial via GET /admin/orders puis applique les événements.
+    """
+    subscription = event_bus.subscribe()
+
+    async def events():
+        try:
+            async for message in iter_sse(subscription, request.is_disconnected):
+                yield message
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/admin/kitchen")
+def get_kitchen() -> dict:
+    """
+    État de la cuisine pour le vendeur: emplacements du four occupés, file d'attente,
+    durée de préparation mesurée et prochaine fournée suggérée (à lancer via /admin/orders:transition)
+    """
+    next_batch = kitchen.suggest_batch()
     return {
-        "message": f"Commande {order_id} est prête pour livraison",
-        "order": order.get_summary()
+        **kitchen.stats(),
+        "next_batch": [
+            {"order_id": order_id, "ready_in_minutes": round(kitchen.ready_in_minutes(order_id) or 0, 1)}
+            for order_id in next_batch
+        ]
     }
 
 
-@app.post("/admin/orders/{order_id}/deliver")
-def mark_order_in_delivery(order_id: int) -> dict:
+@app.get("/admin/analytics")
+def get_analytics() -> dict:
     """
-    Marque une commande comme en cours de livraison
+    Activité depuis le démarrage (commandes, chiffre d'affaires, pizzas vendues, transitions) et état
+    des workers de fond qui tiennent ces compteurs à jour
     """
-    if order_id not in orders_db:
-        raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+    return {**analytics.snapshot(), "background": background_bus.stats()}
 
-    order = orders_db[order_id]
 
-    if order.status != OrderStatus.READY_FOR_DELIVERY:
-        raise HTTPException(status_code=400, detail=f"Commande doit être prête (statut actuel: {order.status.value})")
+@app.get("/admin/dispatch/plan")
+def get_dispatch_plan(capacity: int = DRIVER_CAPACITY) -> dict:
+    """
+    Tournées proposées pour les commandes prêtes à livrer
 
-    order.status = OrderStatus.IN_DELIVERY
+    Les commandes voisines sont regroupées dans la limite de la capacité du livreur et de leurs
+    échéances (sortie du four + DELIVERY_WINDOW_MINUTES), l'ordre de passage est optimisé
+    (plus proche voisin + 2-opt). Rien n'est modifié: les livreurs disponibles reçoivent
+    automatiquement des tournées construites de la même façon (capacité DRIVER_CAPACITY); une
+    tournée du plan peut aussi être lancée à la main via /admin/orders:transition (action deliver).
 
-    logger.info(f"Commande en cours de livraison: ID={order_id}, Client={order.customer_name}, Adresse={order.customer_address}")
+    Query parameters:
+    - capacity: pizzas transportées au plus par tournée (défaut DRIVER_CAPACITY)
+    """
+    if capacity <= 0:
+        raise HTTPException(status_code=400, detail="capacity doit être positif")
 
-    return {
-        "message": f"Commande {order_id} est en cours de livraison",
-        "order": order.get_summary()
-    }
+    status = OrderStatus.READY_FOR_DELIVERY
+    ready_orders = orders_db.list_by_status(status, 0, max(orders_db.count_by_status()[status.value], 1))
+    return DispatchPlanner(capacity=capacity).plan(ready_orders)
 
 
-@app.post("/admin/orders/{order_id}/delivered")
-def mark_order_delivered(order_id: int) -> dict:
+@app.post("/admin/drivers", status_code=201)
+def register_driver(request: DriverCreate) -> dict:
     """
-    Marque une commande comme livrée
+    Enregistre un livreur, disponible immédiatement: la commande prête la plus urgente lui est confiée
     """
-    if order_id not in orders_db:
-        raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+    driver = drivers.register(request.name, request.latitude, request.longitude)
+    logger.info(f"Livreur enregistré: ID={driver['driver_id']}, Nom={driver['name']}")
+    assign_drivers()
+    return drivers.get(driver["driver_id"])
 
-    order = orders_db[order_id]
 
-    if order.status != OrderStatus.IN_DELIVERY:
-        raise HTTPException(status_code=400, detail=f"Commande doit être en cours de livraison (statut actuel: {order.status.value})")
+@app.get("/admin/drivers")
+def get_drivers() -> dict:
+    """Livreurs (état, position, commande en cours) et nombre de commandes prêtes sans livreur"""
+    return {**drivers.stats(), "drivers": drivers.list()}
 
-    order.status = OrderStatus.DELIVERED
-    order.delivered_at = datetime.now()
 
-    logger.info(f"Commande livrée: ID={order_id}, Client={order.customer_name}")
+@app.patch("/admin/drivers/{driver_id}")
+def update_driver(driver_id: int, request: DriverUpdate) -> dict:
+    """
+    Met à jour la position d'un livreur (reclassement parmi les disponibles) ou son service
+    (on_duty: false pendant une livraison prend effet à son retour)
+    """
+    if (request.latitude is None) != (request.longitude is None):
+        raise HTTPException(status_code=400, detail="latitude et longitude vont ensemble")
+    driver = drivers.update(driver_id, request.latitude, request.longitude, request.on_duty)
+    if driver is None:
+        raise HTTPException(status_code=404, detail=f"Livreur {driver_id} non trouvé")
+    assign_drivers()
+    return drivers.get(driver_id)
 
+
+def transition_order(order_id: int, action: OrderAction) -> Order:
+    """
+    Applique une action du vendeur à une commande via la table des transitions
+    (compare-and-set atomique: deux clics simultanés ne font avancer la commande qu'une fois)
+    """
+    transition = ORDER_TRANSITIONS[action]
+    order, current_status = orders_db.transition(
+        order_id, transition.source, transition.target, transition.timestamp_field, datetime.now()
+    )
+    if order is None:
+        if current_status is None:
+            raise HTTPException(status_code=404, detail=f"Commande {order_id} non trouvée")
+        raise HTTPException(status_code=400, detail=transition_error(transition, current_status))
+
+    kitchen.on_transition(order, transition.source)
+    drivers.on_transition(order, transition.source)
+    change_log.record_orders([order_id])
+    order_status_changed(order.get_summary(), transition.source)
+    logger.info(f"{transition.log_label}: ID={order_id}, Client={order.customer_name}")
+    if transition.target in (OrderStatus.READY_FOR_DELIVERY, OrderStatus.DELIVERED):
+        # Commande prête ou livreur de retour: nouvelles affectations possibles
+        assign_drivers()
+    return order
+
+
+def assign_drivers() -> None:
+    """
+    Confie aux livreurs disponibles les plus proches les tournées des commandes prêtes les plus
+    urgentes (voisines dans la limite de DRIVER_CAPACITY) et les passe en livraison. Une commande
+    qui n'est plus prête (livrée à la main entre-temps) est retirée de sa tournée.
+    """
+    for order_ids, driver_id in drivers.assign():
+        delivering = []
+        for order_id in order_ids:
+            try:
+                transition_order(order_id, OrderAction.DELIVER)
+            except HTTPException:
+                drivers.release(order_id)
+                continue
+            delivering.append(order_id)
+        if delivering:
+            logger.info(f"Tournée {delivering} confiée au livreur {driver_id}")
+
+
+def transition_response(order_id: int, action: OrderAction) -> dict:
+    """Réponse des endpoints de transition d'une commande"""
+    order = transition_order(order_id, action)
     return {
-        "message": f"Commande {order_id} a été livrée avec succès",
-        "order": order.get_summary()
+        "message": ORDER_TRANSITIONS[action].message.format(order_id=order_id),
+        "order": with_kitchen_eta(order.get_summary())
     }
+
+
+@app.post("/admin/orders:transition")
+def transition_orders(request: OrderTransitionRequest) -> dict:
+    """
+    Applique la même action à plusieurs commandes (ex: démarrer ou expédier toute une fournée)
+
+    Corps de la requête:
+    - order_ids: identifiants des commandes (maximum MAX_BULK_TRANSITION)
+    - action: start, ready, deliver ou delivered
+
+    Chaque commande est traitée indépendamment (compare-and-set): celles qui ne sont pas
+    dans le statut attendu sont listées dans "failed" avec la raison, les autres avancent.
+    """
+    if not request.order_ids:
+        raise HTTPException(status_code=400, detail="order_ids ne doit pas être vide")
+    if len(request.order_ids) > MAX_BULK_TRANSITION:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_BULK_TRANSITION} commandes par requête")
+
+    succeeded = []
+    failed = []
+    for order_id in dict.fromkeys(request.order_ids):
+        try:
+            succeeded.append(with_kitchen_eta(transition_order(order_id, request.action).get_summary()))
+        except HTTPException as e:
+            failed.append({"order_id": order_id, "status_code": e.status_code, "error": e.detail})
+
+    logger.info(f"Transition groupée {request.action.value}: {len(succeeded)} réussies, {len(failed)} échouées")
+    return {
+        "action": request.action.value,
+        "succeeded": succeeded,
+        "failed": failed
+    }
+
+
+@app.post("/admin/orders/{order_id}/start")
+def start_order_preparation(order_id: int) -> dict:
+    """
+    Marque le début de la préparation d'une commande
+    """
+    return transition_response(order_id, OrderAction.START)
+
+
+@app.post("/admin/orders/{order_id}/ready")
+def mark_order_ready(order_id: int) -> dict:
+    """
+    Marque une commande comme prête pour livraison
+    """
+    return transition_response(order_id, OrderAction.READY)
+
+
+@app.post("/admin/orders/{order_id}/deliver")
+def mark_order_in_delivery(order_id: int) -> dict:
+    """
+    Marque une commande comme en cours de livraison
+    """
+    return transition_response(order_id, OrderAction.DELIVER)
+
+
+@app.post("/admin/orders/{order_id}/delivered")
+def mark_order_delivered(order_id: int) -> dict:
+    """
+    Marque une commande comme livrée
+    """
+    return transition_response(order_id, OrderAction.DELIVERED)
@@ -1,9 +1,15 @@
-from typing import List, Optional, Dict
-from pydantic import BaseModel, Field, model_validator, field_validator
+from typing import Any, Callable, List, Optional, Dict
+from pydantic import BaseModel, Field, PrivateAttr, model_validator, field_validator, ValidationInfo
 import requests
 from typing import Tuple
 from datetime import datetime
 from enum import Enum
+import hashlib
+import unicodedata
+try:
+    from .responses import dumps
+except ImportError:  # module chargé hors paquet (from models import ...)
+    from responses import dumps
 
 
 class OrderStatus(str, Enum):
@@ -16,6 +22,27 @@ class OrderStatus(str, Enum):
     CANCELLED = "cancelled"  # Annulée
 
 
+# Statuts finaux: la commande ne changera plus (candidats à la sortie du cache chaud)
+TERMINAL_STATUSES = frozenset({OrderStatus.DELIVERED, OrderStatus.CANCELLED})
+# Statuts actifs, dans l'ordre du workflow (colonnes du dashboard vendeur)
+ACTIVE_STATUSES = tuple(status for status in OrderStatus if status not in TERMINAL_STATUSES)
+
+
+class OrderAction(str, Enum):
+    """Actions du vendeur faisant avancer une commande dans le workflow (voir transitions.py)"""
+    START = "start"  # pending -> preparing
+    READY = "ready"  # preparing -> ready_for_delivery
+    DELIVER = "deliver"  # ready_for_delivery -> in_delivery
+    DELIVERED = "delivered"  # in_delivery -> delivered
+
+
+class DriverStatus(str, Enum):
+    """Énumération des états d'un livreur (voir drivers.py)"""
+    AVAILABLE = "available"  # En service, sans commande
+    DELIVERING = "delivering"  # En livraison
+    OFF_DUTY = "off_duty"  # Hors service
+
+
 class Price:
     """Classe pour gérer la logique de tarification"""
     DELIVERY_FEE = 5.0
@@ -134,12 +161,98 @@ class Price:
         return subtotal + delivery_fee
 
 
+# Géocodage des adresses (Nominatim / OpenStreetMap), partagé avec le chemin asynchrone (geocoding.py)
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+GEOCODING_HEADERS = {"User-Agent": "PizzaOrderingAPI/1.0"}
+GEOCODING_TIMEOUT_SECONDS = 5
+
+
+def full_address(address: "Address") -> str:
+    """Adresse complète envoyée au géocodeur"""
+    return f"{address.street_number} {address.street}, {address.postal_code} {address.city}, France"
+
+
+def geocoding_params(address: "Address") -> dict:
+    """Paramètres de la requête Nominatim"""
+    return {
+        "q": full_address(address),
+        "format": "json",
+        "limit": 5,  # Chercher les 5 meilleurs résultats
+        "extratags": 1
+    }
+
+
+def find_address_result(address: "Address", results: List[dict]) -> Optional[dict]:
+    """Cherche parmi les résultats Nominatim une vraie adresse à Toulouse dans la rue demandée"""
+    valid_result = None
+    street_lower = address.street.lower()
+
+    for result in results:
+        result_type = result.get("type", "")
+        result_class = result.get("class", "")
+        display_name = result.get("display_name", "").lower()
+
+        # Vérifier les coordonnées (Toulouse est environ 43.6°N, 1.4°E)
+        lat = float(result.get("lat", 0))
+        lon = float(result.get("lon", 0))
+
+        # Vérifier que c'est bien à Toulouse (marge de ~20km)
+        if not (43.3 < lat < 43.9 and 0.9 < lon < 1.9):
+            continue
+
+        # Rejeter les résultats qui sont juste des limites administratives
+        if result_type in ["county", "state", "country"] or result_class == "boundary":
+            continue
+
+        # Vérifier que la rue est dans le résultat
+        # (on utilise startswith car Nominatim peut ajouter des caractères comme d'Alsace-Lorraine)
+        street_words = address.street.split()
+        street_name = street_words[0].lower() if street_words else street_lower  # Premier mot ou street entier
+        if street_name in display_name or street_lower in display_name or \
+           display_name.find(street_name) != -1:
+            # Accepter ce résultat si c'est clairement une adresse
+            if result_type in ["house", "residential", "road", "address"]:
+                return result
+            # Sinon, accepter le premier résultat valide à Toulouse avec la rue
+            if not valid_result:
+                valid_result = result
+
+    return valid_result
+
+
+def geocoding_error(address: "Address", status_code: int, results: Optional[List[dict]]) -> Optional[str]:
+    """
+    Analyse la réponse du géocodeur: None si l'adresse est valide, sinon le message d'erreur.
+    Une adresse valide reçoit les coordonnées du résultat retenu (latitude / longitude).
+    """
+    if status_code != 200:
+        return "Impossible de valider l'adresse avec le service de géocodage"
+
+    # Vérifier que au moins un résultat existe
+    if not results:
+        return f"L'adresse '{full_address(address)}' n'existe pas ou n'a pas pu être trouvée à Toulouse"
+
+    result = find_address_result(address, results)
+    if result is None:
+        # Aucun résultat valide trouvé
+        return (
+            f"L'adresse '{full_address(address)}' n'existe pas à Toulouse. "
+            f"Vérifiez que la rue existe réellement."
+        )
+    address.latitude = float(result["lat"])
+    address.longitude = float(result["lon"])
+    return None
+
+
 class Address(BaseModel):
     """Classe pour représenter et valider une adresse à Toulouse"""
     street_number: str = Field(..., description="Numéro de rue")
     street: str = Field(..., description="Nom de la rue")
     city: str = Field(..., description="Ville (doit être Toulouse)")
     postal_code: str = Field(..., description="Code postal (doit être 31000)")
+    # Coordonnées renseignées par le géocodage (None pour les adresses non géocodées)
+    latitude: Optional[float] = Field(default=None, description="Latitude (géocodage)")
+    longitude: Optional[float] = Field(default=None, description="Longitude (géocodage)")
 
     @field_validator("city")
     @classmethod
@@ -158,86 +271,48 @@ class Address(BaseModel):
         return v
 
     @model_validator(mode="after")
-    def validate_address_exists(self) -> "Address":
-        """Valide que l'adresse existe réellement à Toulouse via Nominatim"""
-        # Construire l'adresse pour la requête
-        full_address = f"{self.street_number} {self.street}, {self.postal_code} {self.city}, France"
+    def validate_address_exists(self, info: ValidationInfo) -> "Address":
+        """
+        Valide que l'adresse existe réellement à Toulouse via Nominatim.
+        Ignoré avec le contexte {"skip_geocoding": True} (adresse déjà validée, ex: rechargée depuis la DB).
+        """
+        if info.context and info.context.get("skip_geocoding"):
+            return self
 
         try:
             # Utiliser l'API Nominatim (OpenStreetMap) pour valider l'adresse
             response = requests.get(
-                "https://nominatim.openstreetmap.org/search",
-                params={
-                    "q": full_address,
-                    "format": "json",
-                    "limit": 5,  # Chercher les 5 meilleurs résultats
-                    "extratags": 1
-                },
-                headers={"User-Agent": "PizzaOrderingAPI/1.0"},
-                timeout=5
+                NOMINATIM_URL,
+                params=geocoding_params(self),
+                headers=GEOCODING_HEADERS,
+                timeout=GEOCODING_TIMEOUT_SECONDS
             )
-
-            if response.status_code != 200:
-                raise ValueError("Impossible de valider l'adresse avec le service de géocodage")
-
-            results = response.json()
-
-            # Vérifier que au moins un résultat existe
-            if not results:
-                raise ValueError(f"L'adresse '{full_address}' n'existe pas ou n'a pas pu être trouvée à Toulouse")
-
-            # Chercher un résultat qui est une vraie adresse à Toulouse
-            valid_result = None
-            street_lower = self.street.lower()
-
-            for result in results:
-                result_type = result.get("type", "")
-                result_class = result.get("class", "")
-                display_name = result.get("display_name", "").lower()
-
-                # Vérifier les coordonnées (Toulouse est environ 43.6°N, 1.4°E)
-                lat = float(result.get("lat", 0))
-                lon = float(result.get("lon", 0))
-
-                # Vérifier que c'est bien à Toulouse (marge de ~20km)
-                if not (43.3 < lat < 43.9 and 0.9 < lon < 1.9):
-                    continue
-
-                # Rejeter les résultats qui sont juste des limites administratives
-                if result_type in ["county", "state", "country"] or result_class == "boundary":
-                    continue
-
-                # Vérifier que la rue est dans le résultat
-                # (on utilise startswith car Nominatim peut ajouter des caractères comme d'Alsace-Lorraine)
-                street_words = self.street.split()
-                street_name = street_words[0].lower() if street_words else self.street.lower()  # Premier mot ou street entier
-                if street_name in display_name or street_lower in display_name or \
-                   display_name.find(street_name) != -1:
-                    # Accepter ce résultat si c'est clairement une adresse
-                    if result_type in ["house", "residential", "road", "address"]:
-                        valid_result = result
-                        break
-                    # Sinon, accepter le premier résultat valide à Toulouse avec la rue
-                    if not valid_result:
-                        valid_result = result
-
-            if not valid_result:
-                # Aucun résultat valide trouvé
-                raise ValueError(
-                    f"L'adresse '{full_address}' n'existe pas à Toulouse. "
-                    f"Vérifiez que la rue existe réellement."
-                )
-
-            return self
-
+            error = geocoding_error(self, response.status_code, response.json() if response.status_code == 200 else None)
         except requests.RequestException as e:
             raise ValueError(f"Erreur lors de la validation de l'adresse: {str(e)}")
 
+        if error is not None:
+            raise ValueError(error)
+        return self
+
     def __str__(self) -> str:
         """Retourne l'adresse formatée"""
         return f"{self.street_number} {self.street}, {self.postal_code} {self.city}"
 
 
+def normalize_text(value: str) -> str:
+    """Normalise un texte pour comparaison: minuscules, sans accents, espaces simples"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.lower().split())
+
+
+def make_customer_key(customer_name: str, address: "Address") -> str:
+    """Retourne la clé client: empreinte courte du nom normalisé et de l'adresse normalisée"""
+    raw = f"{normalize_text(customer_name)}|{normalize_text(str(address))}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
 class PizzaCreate(BaseModel):
     """Classe pour créer une pizza (sans prix - calculé automatiquement)"""
     model_config = {"extra": "forbid"}  # Interdit les champs supplémentaires comme "price"
@@ -304,6 +379,10 @@ class PizzaMenuPrice(BaseModel):
     name: str = Field(..., description="Nom de la pizza")
     base_toppings: List[str] = Field(..., description="Toppings inclus de base")
     prices: dict = Field(..., description="Prix par taille: {'small': X, 'medium': Y, 'large': Z}")
+    availability: dict = Field(
+        default_factory=dict,
+        description="Disponibilité par taille: {'small': {'available': bool, 'unavailable_toppings': [...]}, ...}"
+    )
 
     def __str__(self):
         return f"{self.name}: small={self.prices['small']}€, medium={self.prices['medium']}€, large={self.prices['large']}€"
@@ -316,6 +395,48 @@ class OrderCreate(BaseModel):
     customer_address: Address = Field(..., description="Adresse de livraison (rue, numéro, ville, code postal)")
 
 
+class UnverifiedAddress(Address):
+    """Adresse dont seuls les champs sont validés: le géocodage est fait ensuite, sans bloquer"""
+
+    @model_validator(mode="after")
+    def validate_address_exists(self, info: ValidationInfo) -> "UnverifiedAddress":
+        """Pas de géocodage à la lecture du corps de la requête (voir geocoding.geocode_address)"""
+        return self
+
+
+class OrderCreateRequest(OrderCreate):
+    """Corps de POST /orders: l'adresse est géocodée par l'endpoint, de façon asynchrone"""
+    customer_address: UnverifiedAddress = Field(..., description="Adresse de livraison (rue, numéro, ville, code postal)")
+
+
+class OrderTransitionRequest(BaseModel):
+    """Classe pour appliquer une même action à plusieurs commandes (ex: démarrer une fournée)"""
+    order_ids: List[int] = Field(..., description="Identifiants des commandes")
+    action: OrderAction = Field(..., description="Action: start, ready, deliver ou delivered")
+
+
+class DriverCreate(BaseModel):
+    """Classe pour enregistrer un livreur"""
+    name: str = Field(..., min_length=1, description="Nom du livreur")
+    latitude: Optional[float] = Field(default=None, description="Latitude actuelle (défaut: à la pizzeria)")
+    longitude: Optional[float] = Field(default=None, description="Longitude actuelle (défaut: à la pizzeria)")
+
+
+class DriverUpdate(BaseModel):
+    """Classe pour mettre à jour la position ou le service d'un livreur"""
+    latitude: Optional[float] = Field(default=None, description="Nouvelle latitude")
+    longitude: Optional[float] = Field(default=None, description="Nouvelle longitude")
+    on_duty: Optional[bool] = Field(default=None, description="Prise (true) ou fin (false) de service")
+
+
+class OrderBatchCreate(BaseModel):
+    """Classe pour créer plusieurs commandes en une requête (commandes traiteur / entreprise)"""
+    orders: List[Dict[str, Any]] = Field(
+        ...,
+        description="Commandes au format OrderCreate, validées individuellement (adresses géocodées une fois chacune)"
+    )
+
+
 class Order(BaseModel):
     """Classe représentant une commande"""
     order_id: int = Field(..., description="Identifiant de la commande")
@@ -328,34 +449,70 @@ class Order(BaseModel):
     ready_at: Optional[datetime] = Field(default=None, description="Date/heure de fin de préparation")
     delivered_at: Optional[datetime] = Field(default=None, description="Date/heure de livraison")
 
+    # Totaux figés à la création (les pizzas d'une commande ne changent plus)
+    _subtotal: float = PrivateAttr(default=0.0)
+    _delivery_fee: float = PrivateAttr(default=0.0)
+    _total: float = PrivateAttr(default=0.0)
+    _customer_key: Optional[str] = PrivateAttr(default=None)
+    # Résumé mis en cache avec son encodage JSON, invalidé à chaque transition de statut
+    _summary: Optional[dict] = PrivateAttr(default=None)
+    _summary_json: Optional[bytes] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context) -> None:
+        """Calcule une seule fois les totaux de la commande"""
+        self._subtotal = sum(pizza.price for pizza in self.pizzas)
+        self._delivery_fee = Price.calculate_delivery_fee(self._subtotal)
+        self._total = self._subtotal + self._delivery_fee
+
+    @property
+    def customer_key(self) -> str:
+        """Clé client (nom + adresse normalisés) utilisée pour l'indexation"""
+        if self._customer_key is None:
+            self._customer_key = make_customer_key(self.customer_name, self.customer_address)
+        return self._customer_key
+
     def calculate_subtotal(self) -> float:
         """Calcule le sous-total (prix des pizzas uniquement)"""
-        return sum(pizza.price for pizza in self.pizzas)
+        return self._subtotal
 
     def calculate_delivery_fee(self) -> float:
         """Calcule les frais de livraison"""
-        subtotal = self.calculate_subtotal()
-        return Price.calculate_delivery_fee(subtotal)
+        return self._delivery_fee
 
     def calculate_total(self) -> float:
         """Calcule le total de la commande"""
-        subtotal = self.calculate_subtotal()
-        return Price.calculate_total(subtotal)
-
-    def get_estimated_delivery_time(self) -> int:
-        """Retourne le temps estimé de livraison en minutes (simulation)"""
-        # Temps de préparation: 15-20 minutes (simule une valeur basée sur l'ID)
-        prep_time = 15 + (self.order_id % 6)
-        # Temps de livraison: basé sur l'adresse (5-15 minutes) - déterministe via sum() des caractères
+        return self._total
+
+    def get_estimated_travel_minutes(self) -> int:
+        """Temps de trajet estimé (5-15 minutes), basé sur l'adresse - déterministe via sum() des caractères"""
         street_hash = sum(ord(c) for c in self.customer_address.street) % 11
-        delivery_time = 5 + street_hash
-        return prep_time + delivery_time
+        return 5 + street_hash
+
+    def invalidate_summary(self) -> None:
+        """Invalide le résumé en cache (à appeler après chaque transition de statut)"""
+        self._summary = None
+        self._summary_json = None
 
     def get_summary(self) -> dict:
-        """Retourne un résumé de la commande avec détail des pizzas et toppings"""
-        subtotal = self.calculate_subtotal()
-        delivery_fee = self.calculate_delivery_fee()
-        total = self.calculate_total()
+        """
+        Retourne un résumé de la commande avec détail des pizzas et toppings.
+        Le résumé est mis en cache: il ne doit pas être modifié par l'appelant.
+        """
+        if self._summary is None:
+            self._summary = self._build_summary()
+        return self._summary
+
+    def get_summary_json(self) -> bytes:
+        """Retourne le résumé déjà encodé en JSON (mis en cache avec le résumé)"""
+        if self._summary_json is None:
+            self._summary_json = dumps(self.get_summary())
+        return self._summary_json
+
+    def _build_summary(self) -> dict:
+        """Construit le résumé de la commande"""
+        subtotal = self._subtotal
+        delivery_fee = self._delivery_fee
+        total = self._total
 
         # Formater les pizzas avec détails
         pizzas_detail = []
@@ -370,6 +527,7 @@ class Order(BaseModel):
         return {
             "order_id": self.order_id,
             "customer_name": self.customer_name,
+            "customer_key": self.customer_key,
             "customer_address": str(self.customer_address),
             "pizzas": pizzas_detail,
             "subtotal": round(subtotal, 2),
@@ -381,7 +539,9 @@ class Order(BaseModel):
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "ready_at": self.ready_at.isoformat() if self.ready_at else None,
             "delivered_at": self.delivered_at.isoformat() if self.delivered_at else None,
-            "estimated_delivery_minutes": self.get_estimated_delivery_time()
+            # Délai estimé par la file de la cuisine (KitchenScheduler), ajouté aux réponses:
+            # jamais figé dans le résumé en cache, il change à chaque modification de la file
+            "estimated_delivery_minutes": None
         }
 
 
@@ -409,6 +569,28 @@ class Ingredient(BaseModel):
         return f"{self.name}: {self.quantity} ({ingredient_type})"
 
 
+# Signature d'un abonné aux changements de stock: (ingrédient, ancienne quantité, nouvelle quantité)
+StockListener = Callable[[str, int, int], None]
+
+
+class StockLevels(dict):
+    """
+    Dictionnaire ingrédient -> quantité qui signale chaque changement de quantité.
+    Permet aux vues dérivées (disponibilité du menu) d'être mises à jour
+    incrémentalement, même quand le stock est modifié directement via inventory.ingredients[...].
+    """
+
+    def __init__(self, values: Dict[str, int], on_change: StockListener):
+        super().__init__(values)
+        self._on_change = on_change
+
+    def __setitem__(self, ingredient: str, quantity: int) -> None:
+        old_quantity = self.get(ingredient, 0)
+        super().__setitem__(ingredient, quantity)
+        if old_quantity != quantity:
+            self._on_change(ingredient, old_quantity, quantity)
+
+
 class InventoryManager:
     """Classe pour gérer l'inventaire des ingrédients (pas de stock par pizza)"""
 
@@ -435,7 +617,33 @@ class InventoryManager:
 
     def __init__(self):
         """Initialise l'inventaire des ingrédients"""
-        self.ingredients: Dict[str, int] = self.AVAILABLE_INGREDIENTS.copy()
+        self._stock_listeners: List[StockListener] = []
+        self.ingredients = self.AVAILABLE_INGREDIENTS.copy()
+
+    @property
+    def ingredients(self) -> Dict[str, int]:
+        """Stock courant de chaque ingrédient"""
+        return self._ingredients
+
+    @ingredients.setter
+    def ingredients(self, values: Dict[str, int]) -> None:
+        """Remplace tout le stock et notifie uniquement les ingrédients dont la quantité a changé"""
+        old_values = dict(getattr(self, "_ingredients", {}))
+        self._ingredients = StockLevels(values, on_change=self._notify_stock_change)
+        for ingredient in set(old_values) | set(values):
+            old_quantity = old_values.get(ingredient, 0)
+            new_quantity = values.get(ingredient, 0)
+            if old_quantity != new_quantity:
+                self._notify_stock_change(ingredient, old_quantity, new_quantity)
+
+    def add_stock_listener(self, listener: StockListener) -> None:
+        """Abonne une fonction appelée à chaque changement de quantité d'un ingrédient"""
+        self._stock_listeners.append(listener)
+
+    def _notify_stock_change(self, ingredient: str, old_quantity: int, new_quantity: int) -> None:
+        """Propage un changement de stock à tous les abonnés"""
+        for listener in self._stock_listeners:
+            listener(ingredient, old_quantity, new_quantity)
 
     def get_ingredient_stock(self, ingredient: str) -> int:
         """Retourne le stock d'un ingrédient"""
@@ -502,6 +710,9 @@ class InventoryManager:
         self.ingredients[ingredient_name_lower] += quantity
         return True
 
+    def flush(self) -> None:
+        """Attend la persistance des changements de stock (rien à faire en mémoire)"""
+
     def get_all_toppings(self) -> List[Topping]:
         """Retourne la liste de tous les toppings disponibles avec leur prix réel"""
         toppings = []
@@ -0,0 +1,192 @@
+"""
+Représentation compacte des commandes stockées en mémoire
+
+Les commandes conservées par le dépôt sont des OrderRecord (__slots__, tuples):
+- statut, nom de pizza, taille et toppings sont codés par de petits entiers internés
+- les pizzas identiques (même nom, taille, toppings, prix) partagent le même tuple
+- les adresses et noms de clients répétés partagent la même instance
+- les dates sont des entiers (microsecondes depuis 1970-01-01, heure locale de l'horloge murale)
+
+Les modèles Pydantic (Order, Pizza, Address) ne sont reconstruits qu'aux frontières de l'API.
+Mesure: voir benchmarks/order_memory.py et la section "Mémoire des commandes" du README.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, List, Optional, Tuple
+from .models import Address, Order, OrderStatus, Pizza
+from .responses import dumps
+
+# Origine des dates compactes (heure locale naïve, comme Order.created_at)
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Codes de statut: position dans l'énumération
+STATUSES: Tuple[OrderStatus, ...] = tuple(OrderStatus)
+STATUS_CODES: Dict[OrderStatus, int] = {status: code for code, status in enumerate(STATUSES)}
+
+
+class SymbolTable:
+    """Associe chaque chaîne distincte à un petit entier stable (et inversement)"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    def id_of(self, name: str) -> int:
+        """Retourne l'identifiant de la chaîne, en l'enregistrant au besoin"""
+        symbol_id = self._ids.get(name)
+        if symbol_id is None:
+            with self._lock:
+                symbol_id = self._ids.get(name)
+                if symbol_id is None:
+                    symbol_id = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = symbol_id
+        return symbol_id
+
+    def name_of(self, symbol_id: int) -> str:
+        """Retourne la chaîne associée à l'identifiant"""
+        return self._names[symbol_id]
+
+
+class InternPool:
+    """Partage une instance unique pour chaque valeur immuable égale (chaînes, tuples)"""
+
+    def __init__(self):
+        self._values: Dict[Hashable, Hashable] = {}
+
+    def intern(self, value):
+        """Retourne l'instance partagée égale à value"""
+        return self._values.setdefault(value, value)
+
+
+# Tables globales: le vocabulaire (pizzas, tailles, toppings) est petit et borné
+PIZZA_NAMES = SymbolTable()
+SIZES = SymbolTable()
+TOPPINGS = SymbolTable()
+_pool = InternPool()
+
+
+def to_epoch_us(value: Optional[datetime]) -> Optional[int]:
+    """datetime naïf -> microsecondes depuis EPOCH (conversion exacte, sans fuseau)"""
+    if value is None:
+        return None
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_epoch_us(value: Optional[int]) -> Optional[datetime]:
+    """Microsecondes depuis EPOCH -> datetime naïf"""
+    if value is None:
+        return None
+    return EPOCH + timedelta(microseconds=value)
+
+
+# Pizza compacte: (id du nom, id de la taille, ids des toppings, prix)
+PizzaTuple = Tuple[int, int, Tuple[int, ...], float]
+
+
+def pack_pizza(pizza: Pizza) -> PizzaTuple:
+    """Encode une pizza en tuple interné"""
+    toppings = _pool.intern(tuple(TOPPINGS.id_of(topping) for topping in pizza.toppings))
+    return _pool.intern((PIZZA_NAMES.id_of(pizza.name), SIZES.id_of(pizza.size), toppings, pizza.price))
+
+
+def unpack_pizza(packed: PizzaTuple) -> Pizza:
+    """Reconstruit le modèle Pizza (sans revalidation)"""
+    name_id, size_id, topping_ids, price = packed
+    return Pizza.model_construct(
+        name=PIZZA_NAMES.name_of(name_id),
+        size=SIZES.name_of(size_id),
+        toppings=[TOPPINGS.name_of(topping_id) for topping_id in topping_ids],
+        price=price,
+    )
+
+
+class OrderRecord:
+    """Commande stockée sous forme compacte"""
+
+    __slots__ = (
+        "order_id",
+        "status_code",
+        "customer_name",
+        "customer_key",
+        "address",
+        "pizzas",
+        "created_at",
+        "started_at",
+        "ready_at",
+        "delivered_at",
+        "summary",
+        "summary_json",
+    )
+
+    @classmethod
+    def from_order(cls, order: Order) -> "OrderRecord":
+        """Encode une commande; le résumé en cache de la commande est conservé"""
+        record = cls()
+        record.order_id = order.order_id
+        record.status_code = STATUS_CODES[order.status]
+        record.customer_name = _pool.intern(order.customer_name)
+        record.customer_key = _pool.intern(order.customer_key)
+        address = order.customer_address
+        record.address = _pool.intern((
+            _pool.intern(address.street_number),
+            _pool.intern(address.street),
+            _pool.intern(address.city),
+            _pool.intern(address.postal_code),
+            address.latitude,
+            address.longitude,
+        ))
+        record.pizzas = tuple(pack_pizza(pizza) for pizza in order.pizzas)
+        record.created_at = to_epoch_us(order.created_at)
+        record.started_at = to_epoch_us(order.started_at)
+        record.ready_at = to_epoch_us(order.ready_at)
+        record.delivered_at = to_epoch_us(order.delivered_at)
+        record.summary = order._summary
+        record.summary_json = order._summary_json
+        return record
+
+    @property
+    def status(self) -> OrderStatus:
+        """Statut décodé"""
+        return STATUSES[self.status_code]
+
+    def to_order(self) -> Order:
+        """Reconstruit le modèle Order (frontière API), sans géocodage ni revalidation"""
+        street_number, street, city, postal_code, latitude, longitude = self.address
+        order = Order.model_construct(
+            order_id=self.order_id,
+            pizzas=[unpack_pizza(pizza) for pizza in self.pizzas],
+            customer_name=self.customer_name,
+            customer_address=Address.model_construct(
+                street_number=street_number, street=street, city=city, postal_code=postal_code,
+                latitude=latitude, longitude=longitude,
+            ),
+            status=self.status,
+            created_at=from_epoch_us(self.created_at),
+            started_at=from_epoch_us(self.started_at),
+            ready_at=from_epoch_us(self.ready_at),
+            delivered_at=from_epoch_us(self.delivered_at),
+        )
+        order._customer_key = self.customer_key
+        order._summary = self.summary
+        order._summary_json = self.summary_json
+        return order
+
+    def get_summary(self) -> dict:
+        """Résumé de la commande, mis en cache dans l'enregistrement"""
+        if self.summary is None:
+            self.summary = self.to_order().get_summary()
+        return self.summary
+
+    def get_summary_json(self) -> bytes:
+        """Résumé encodé en JSON, mis en cache dans l'enregistrement"""
+        if self.summary_json is None:
+            if self.summary is not None:
+                self.summary_json = dumps(self.summary)
+            else:
+                order = self.to_order()
+                self.summary_json = order.get_summary_json()
+                self.summary = order._summary
+        return self.summary_json
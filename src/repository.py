@@ -0,0 +1,390 @@
+"""
+Dépôt des commandes
+
+OrderRepository est l'implémentation en mémoire (sans persistance) et définit l'interface
+commune. SQLiteOrderRepository (voir db.py) la remplace pour la persistance durable.
+Le dépôt garde une interface compatible dict (in, [], pop, values, len, clear).
+Les commandes sont stockées sous forme compacte (OrderRecord, voir records.py) et
+reconstruites en modèles Pydantic à la lecture.
+
+Index secondaires maintenus à chaque ajout / changement de statut / suppression:
+- un compteur par statut (lecture O(1))
+- un index par statut: identifiants dans l'ordre d'entrée dans le statut
+- un index par client (customer_key): identifiants par ordre croissant
+- un index temporel sur created_at: seaux d'une minute, clés de seaux triées
+  (requête par intervalle en O(log n + k) par recherche dichotomique)
+"""
+import bisect
+import itertools
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import Order, OrderStatus, TERMINAL_STATUSES
+from .records import STATUS_CODES, OrderRecord, to_epoch_us
+from .transitions import apply_transition
+
+# Largeur d'un seau de l'index temporel (microsecondes, comme les dates compactes)
+TIME_BUCKET_US = 60 * 1_000_000
+
+
+class OrderRepository:
+    """Dépôt de commandes en mémoire"""
+
+    # Statuts dont les identifiants sont indexés en mémoire (tous pour le dépôt mémoire)
+    INDEXED_STATUSES = frozenset(OrderStatus)
+
+    def __init__(self):
+        """Initialise le dépôt vide"""
+        self._orders: Dict[int, OrderRecord] = {}
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self._status_counts: Counter = Counter()
+        # dict utilisé comme ensemble ordonné: ordre d'entrée dans le statut
+        self._ids_by_status: Dict[OrderStatus, Dict[int, None]] = {status: {} for status in self.INDEXED_STATUSES}
+        self._status_by_id: Dict[int, OrderStatus] = {}
+        # Identifiants triés pour la pagination par curseur (keyset)
+        self._sorted_ids: List[int] = []
+        # customer_key -> identifiants des commandes du client (dict utilisé comme ensemble ordonné)
+        self._ids_by_customer: Dict[str, Dict[int, None]] = {}
+        # Index temporel: seau (minute de création) -> identifiants, et clés des seaux triées
+        self._ids_by_bucket: Dict[int, List[int]] = {}
+        self._bucket_keys: List[int] = []
+
+    def _track_status(self, order_id: int, old_status: Optional[OrderStatus], new_status: Optional[OrderStatus]) -> None:
+        """Met à jour compteurs et index par statut (None = commande absente), appelé sous le lock"""
+        if old_status == new_status:
+            return
+        if old_status is not None:
+            self._status_counts[old_status] -= 1
+            self._ids_by_status.get(old_status, {}).pop(order_id, None)
+            self._status_by_id.pop(order_id, None)
+        if new_status is not None:
+            self._status_counts[new_status] += 1
+            if new_status in self.INDEXED_STATUSES:
+                self._ids_by_status[new_status][order_id] = None
+                self._status_by_id[order_id] = new_status
+
+    def _index_created_at(self, order_id: int, created_at_us: int) -> None:
+        """Ajoute la commande au seau de sa minute de création, appelé sous le lock"""
+        bucket = created_at_us // TIME_BUCKET_US
+        ids = self._ids_by_bucket.get(bucket)
+        if ids is None:
+            ids = self._ids_by_bucket[bucket] = []
+            # Les commandes arrivent dans l'ordre chronologique: ajout en fin de liste dans le cas courant
+            if not self._bucket_keys or self._bucket_keys[-1] < bucket:
+                self._bucket_keys.append(bucket)
+            else:
+                bisect.insort(self._bucket_keys, bucket)
+        ids.append(order_id)
+
+    def _unindex_created_at(self, order_id: int, created_at_us: int) -> None:
+        """Retire la commande de son seau (supprimé s'il devient vide), appelé sous le lock"""
+        bucket = created_at_us // TIME_BUCKET_US
+        ids = self._ids_by_bucket.get(bucket)
+        if ids is None or order_id not in ids:
+            return
+        ids.remove(order_id)
+        if not ids:
+            del self._ids_by_bucket[bucket]
+            del self._bucket_keys[bisect.bisect_left(self._bucket_keys, bucket)]
+
+    def _ids_in_range(self, since_us: Optional[int], until_us: Optional[int]) -> List[int]:
+        """Identifiants (triés) des commandes créées dans [since, until[, via l'index temporel"""
+        start = bisect.bisect_left(self._bucket_keys, since_us // TIME_BUCKET_US) if since_us is not None else 0
+        end = bisect.bisect_right(self._bucket_keys, until_us // TIME_BUCKET_US) if until_us is not None else len(self._bucket_keys)
+        ids = []
+        for bucket in itertools.islice(self._bucket_keys, start, end):
+            for order_id in self._ids_by_bucket[bucket]:
+                created_at = self._orders[order_id].created_at
+                if (since_us is None or created_at >= since_us) and (until_us is None or created_at < until_us):
+                    ids.append(order_id)
+        ids.sort()
+        return ids
+
+    def _previous_status(self, order: Order) -> Optional[OrderStatus]:
+        """Statut indexé d'une commande existante (le statut de l'objet a pu être modifié en place)"""
+        return self._status_by_id.get(order.order_id)
+
+    def next_order_id(self) -> int:
+        """Réserve et retourne le prochain identifiant de commande (thread-safe)"""
+        with self._lock:
+            order_id = self._next_id
+            self._next_id += 1
+            return order_id
+
+    def next_order_ids(self, count: int) -> range:
+        """Réserve `count` identifiants consécutifs (création en lot)"""
+        with self._lock:
+            first_id = self._next_id
+            self._next_id += count
+            return range(first_id, first_id + count)
+
+    def add(self, order: Order) -> None:
+        """Ajoute une nouvelle commande"""
+        with self._lock:
+            record = self._orders[order.order_id] = OrderRecord.from_order(order)
+            self._track_status(order.order_id, None, order.status)
+            self._ids_by_customer.setdefault(record.customer_key, {})[order.order_id] = None
+            self._index_created_at(order.order_id, record.created_at)
+            # Les identifiants sont croissants: ajout en fin de liste dans le cas courant
+            if not self._sorted_ids or self._sorted_ids[-1] < order.order_id:
+                self._sorted_ids.append(order.order_id)
+            else:
+                bisect.insort(self._sorted_ids, order.order_id)
+
+    def add_many(self, orders: List[Order]) -> None:
+        """Ajoute plusieurs nouvelles commandes"""
+        with self._lock:
+            for order in orders:
+                self.add(order)
+
+    def save(self, order: Order) -> None:
+        """Enregistre une commande existante (à appeler après chaque changement de statut)"""
+        with self._lock:
+            record = OrderRecord.from_order(order)
+            previous = self._orders.get(order.order_id)
+            self._orders[order.order_id] = record
+            self._track_status(order.order_id, self._previous_status(order), order.status)
+            if previous is not None and previous.created_at != record.created_at:
+                self._unindex_created_at(order.order_id, previous.created_at)
+                self._index_created_at(order.order_id, record.created_at)
+
+    def transition(
+        self,
+        order_id: int,
+        expected: OrderStatus,
+        target: OrderStatus,
+        timestamp_field: Optional[str] = None,
+        at: Optional[datetime] = None,
+    ) -> Tuple[Optional[Order], Optional[OrderStatus]]:
+        """
+        Compare-and-set atomique du statut d'une commande.
+        Retourne (commande mise à jour, None) si son statut était `expected`,
+        (None, statut actuel) sinon, (None, None) si la commande n'existe pas.
+        """
+        with self._lock:
+            order = self.get(order_id)
+            if order is None:
+                return None, None
+            if order.status != expected:
+                return None, order.status
+            apply_transition(order, target, timestamp_field, at or datetime.now())
+            self.save(order)
+            return order, None
+
+    def get(self, order_id: int) -> Optional[Order]:
+        """Retourne une commande ou None si elle n'existe pas"""
+        record = self._orders.get(order_id)
+        return record.to_order() if record is not None else None
+
+    def get_summary(self, order_id: int) -> Optional[dict]:
+        """Résumé d'une commande, mis en cache dans son enregistrement"""
+        record = self._orders.get(order_id)
+        return record.get_summary() if record is not None else None
+
+    def get_summary_json(self, order_id: int) -> Optional[bytes]:
+        """Résumé JSON pré-encodé d'une commande, mis en cache dans son enregistrement"""
+        record = self._orders.get(order_id)
+        return record.get_summary_json() if record is not None else None
+
+    def remove(self, order_id: int) -> Optional[Order]:
+        """Supprime une commande et la retourne (None si elle n'existe pas)"""
+        with self._lock:
+            record = self._orders.pop(order_id, None)
+            if record is None:
+                return None
+            self._track_status(order_id, self._status_by_id.get(order_id, record.status), None)
+            customer_ids = self._ids_by_customer.get(record.customer_key, {})
+            customer_ids.pop(order_id, None)
+            if not customer_ids:
+                self._ids_by_customer.pop(record.customer_key, None)
+            self._unindex_created_at(order_id, record.created_at)
+            position = bisect.bisect_left(self._sorted_ids, order_id)
+            if position < len(self._sorted_ids) and self._sorted_ids[position] == order_id:
+                del self._sorted_ids[position]
+        return record.to_order()
+
+    def values(self) -> Iterator[Order]:
+        """Itère sur toutes les commandes par identifiant croissant"""
+        with self._lock:
+            records = [self._orders[order_id] for order_id in sorted(self._orders)]
+        return (record.to_order() for record in records)
+
+    def list_orders(
+        self,
+        after: Optional[int] = None,
+        limit: int = 100,
+        status: Optional[OrderStatus] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        customer_key: Optional[str] = None,
+    ) -> List[Order]:
+        """
+        Retourne une page de commandes d'identifiant strictement supérieur à `after` (pagination keyset).
+        Filtres optionnels: statut, date de création dans [since, until[, clé client.
+        """
+        # Les filtres comparent directement les champs compacts des enregistrements
+        status_code = STATUS_CODES[status] if status is not None else None
+        since_us = to_epoch_us(since)
+        until_us = to_epoch_us(until)
+        with self._lock:
+            # Filtre client ou intervalle de dates: parcours d'un index plutôt que de toutes les commandes
+            if customer_key is not None:
+                ids = sorted(self._ids_by_customer.get(customer_key, ()))
+            elif since_us is not None or until_us is not None:
+                ids = self._ids_in_range(since_us, until_us)
+            else:
+                ids = self._sorted_ids
+            start = bisect.bisect_right(ids, after) if after is not None else 0
+            page: List[OrderRecord] = []
+            for order_id in itertools.islice(ids, start, None):
+                record = self._orders[order_id]
+                if status_code is not None and record.status_code != status_code:
+                    continue
+                if since_us is not None and record.created_at < since_us:
+                    continue
+                if until_us is not None and record.created_at >= until_us:
+                    continue
+                if customer_key is not None and record.customer_key != customer_key:
+                    continue
+                page.append(record)
+                if len(page) >= limit:
+                    break
+        return [record.to_order() for record in page]
+
+    def list_by_customer(self, customer_key: str, limit: int = 20) -> List[Order]:
+        """Commandes d'un client via l'index client, les plus récentes d'abord"""
+        with self._lock:
+            ids = sorted(self._ids_by_customer.get(customer_key, ()), reverse=True)[:limit]
+            records = [self._orders[order_id] for order_id in ids]
+        return [record.to_order() for record in records]
+
+    def archivable_orders(self, cutoff: datetime, limit: int) -> List[Order]:
+        """Commandes livrées ou annulées créées avant cutoff (candidates à l'archivage)"""
+        cutoff_us = to_epoch_us(cutoff)
+        with self._lock:
+            records: List[OrderRecord] = []
+            for status in TERMINAL_STATUSES:
+                for order_id in self._ids_by_status[status]:
+                    record = self._orders[order_id]
+                    if record.created_at < cutoff_us:
+                        records.append(record)
+                        if len(records) >= limit:
+                            break
+                if len(records) >= limit:
+                    break
+        return [record.to_order() for record in records]
+
+    def count_by_status(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Nombre de commandes par statut: O(1) par statut sans intervalle,
+        sinon commandes créées dans [since, until[ via l'index temporel
+        """
+        with self._lock:
+            if since is None and until is None:
+                return {status.value: self._status_counts[status] for status in OrderStatus}
+            counts = Counter(self._orders[order_id].status for order_id in self._ids_in_range(to_epoch_us(since), to_epoch_us(until)))
+            return {status.value: counts[status] for status in OrderStatus}
+
+    def list_by_status(
+        self,
+        status: OrderStatus,
+        offset: int = 0,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Order]:
+        """
+        Retourne une page des commandes d'un statut via l'index, éventuellement créées dans [since, until[.
+        Statuts actifs: les plus anciennes d'abord (file de travail). Statuts finaux: les plus récentes d'abord.
+        """
+        return [record.to_order() for record in self._records_by_status(status, offset, limit, since, until)]
+
+    def summaries_by_status(
+        self,
+        status: OrderStatus,
+        offset: int = 0,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[dict]:
+        """Comme list_by_status, mais retourne les résumés en cache sans reconstruire les modèles"""
+        return [record.get_summary() for record in self._records_by_status(status, offset, limit, since, until)]
+
+    def summaries_json_by_status(
+        self,
+        status: OrderStatus,
+        offset: int = 0,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[bytes]:
+        """Comme summaries_by_status, mais retourne les résumés pré-encodés en JSON (mis en cache)"""
+        return [record.get_summary_json() for record in self._records_by_status(status, offset, limit, since, until)]
+
+    def _records_by_status(
+        self,
+        status: OrderStatus,
+        offset: int,
+        limit: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[OrderRecord]:
+        """Page d'enregistrements d'un statut indexé (intervalle de création: via l'index temporel)"""
+        with self._lock:
+            if since is None and until is None:
+                ids = self._ids_by_status[status]
+            else:
+                status_code = STATUS_CODES[status]
+                ids = [
+                    order_id for order_id in self._ids_in_range(to_epoch_us(since), to_epoch_us(until))
+                    if self._orders[order_id].status_code == status_code
+                ]
+            ordered_ids = reversed(ids) if status in TERMINAL_STATUSES else iter(ids)
+            page_ids = list(itertools.islice(ordered_ids, offset, offset + limit))
+            return [self._orders[order_id] for order_id in page_ids if order_id in self._orders]
+
+    def clear(self) -> None:
+        """Supprime toutes les commandes (la séquence d'identifiants est conservée)"""
+        with self._lock:
+            self._orders.clear()
+            self._reset_indexes()
+
+    def _reset_indexes(self) -> None:
+        """Vide compteurs et index par statut"""
+        self._sorted_ids.clear()
+        self._ids_by_customer.clear()
+        self._ids_by_bucket.clear()
+        self._bucket_keys.clear()
+        self._status_counts.clear()
+        self._status_by_id.clear()
+        for ids in self._ids_by_status.values():
+            ids.clear()
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def __getitem__(self, order_id: int) -> Order:
+        order = self.get(order_id)
+        if order is None:
+            raise KeyError(order_id)
+        return order
+
+    def __setitem__(self, order_id: int, order: Order) -> None:
+        if order_id in self:
+            self.save(order)
+        else:
+            self.add(order)
+
+    def pop(self, order_id: int, *default) -> Order:
+        """Supprime et retourne une commande, comme dict.pop"""
+        order = self.remove(order_id)
+        if order is None:
+            if default:
+                return default[0]
+            raise KeyError(order_id)
+        return order
@@ -0,0 +1,85 @@
+"""
+Réponses JSON rapides et corps pré-encodés
+
+- dumps: encodeur JSON unique de l'application (réponses, résumés en cache, événements SSE),
+  orjson (requirements.txt), sinon json de la bibliothèque standard avec la même sortie compacte
+- FastJSONResponse: classe de réponse par défaut de l'application, encodée par dumps
+- encode_json: encode une structure qui contient des fragments déjà encodés (bytes), par
+  exemple les résumés de commandes en cache, sans les décoder ni les ré-encoder
+- VersionedBody: corps pré-encodé d'un endpoint de lecture, reconstruit seulement quand la
+  version qui le décrit change (la même que celle de son ETag)
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Hashable, Optional, Tuple
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # installation sans requirements.txt: repli plus lent, même sortie
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(value: Any) -> Any:
+    """Types non natifs: modèles Pydantic, dates, ensembles"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type non sérialisable en JSON: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode en JSON compact (UTF-8)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode une structure (dict, list) dont les valeurs bytes sont des fragments JSON insérés tels quels"""
+    if isinstance(content, bytes):
+        return content
+    if isinstance(content, dict):
+        return b"{" + b",".join(dumps(str(key)) + b":" + encode_json(value) for key, value in content.items()) + b"}"
+    if isinstance(content, (list, tuple)):
+        return b"[" + b",".join(encode_json(item) for item in content) + b"]"
+    return dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON encodée par dumps (orjson si disponible)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_bytes_response(body: bytes, etag: Optional[str] = None) -> Response:
+    """Réponse dont le corps est déjà encodé en JSON"""
+    headers = {"ETag": etag} if etag is not None else None
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+class VersionedBody:
+    """
+    Corps JSON pré-encodé, reconstruit quand sa version change. Deux requêtes concurrentes
+    sur une nouvelle version peuvent le construire toutes les deux: le résultat est le même.
+    """
+
+    def __init__(self, build: Callable[[], Any]):
+        self._build = build
+        self._cached: Optional[Tuple[Hashable, bytes]] = None
+
+    def get(self, version: Hashable) -> bytes:
+        """Corps de la version demandée (la version est lue avant l'état qu'elle décrit)"""
+        cached = self._cached
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        body = dumps(self._build())
+        self._cached = (version, body)
+        return body
@@ -0,0 +1,65 @@
+"""
+Machine à états des commandes (workflow vendeur)
+
+Chaque action du vendeur est décrite par une ligne de la table ORDER_TRANSITIONS:
+statut attendu, statut cible et horodatage à renseigner. Le changement de statut est
+appliqué par OrderRepository.transition, en compare-and-set atomique: deux clics
+simultanés ne peuvent pas faire avancer la même commande deux fois.
+"""
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+from .models import Order, OrderAction, OrderStatus
+
+# Nombre maximum de commandes par transition groupée
+MAX_BULK_TRANSITION = 200
+
+
+class Transition(NamedTuple):
+    """Ligne de la table des transitions"""
+    source: OrderStatus  # statut attendu
+    target: OrderStatus  # nouveau statut
+    timestamp_field: Optional[str]  # champ horodaté lors de la transition
+    message: str  # message de succès (format: order_id)
+    requirement: str  # message d'erreur si le statut ne correspond pas
+    log_label: str
+
+
+ORDER_TRANSITIONS: Dict[OrderAction, Transition] = {
+    OrderAction.START: Transition(
+        OrderStatus.PENDING, OrderStatus.PREPARING, "started_at",
+        "Préparation de la commande {order_id} commencée",
+        "Commande ne peut pas être préparée",
+        "Préparation commencée",
+    ),
+    OrderAction.READY: Transition(
+        OrderStatus.PREPARING, OrderStatus.READY_FOR_DELIVERY, "ready_at",
+        "Commande {order_id} est prête pour livraison",
+        "Commande doit être en cours de préparation",
+        "Commande prête pour livraison",
+    ),
+    OrderAction.DELIVER: Transition(
+        OrderStatus.READY_FOR_DELIVERY, OrderStatus.IN_DELIVERY, None,
+        "Commande {order_id} est en cours de livraison",
+        "Commande doit être prête",
+        "Commande en cours de livraison",
+    ),
+    OrderAction.DELIVERED: Transition(
+        OrderStatus.IN_DELIVERY, OrderStatus.DELIVERED, "delivered_at",
+        "Commande {order_id} a été livrée avec succès",
+        "Commande doit être en cours de livraison",
+        "Commande livrée",
+    ),
+}
+
+
+def apply_transition(order: Order, target: OrderStatus, timestamp_field: Optional[str], at: datetime) -> None:
+    """Applique le nouveau statut (et son horodatage) à la commande et invalide son résumé"""
+    order.status = target
+    if timestamp_field is not None:
+        setattr(order, timestamp_field, at)
+    order.invalidate_summary()
+
+
+def transition_error(transition: Transition, current_status: OrderStatus) -> str:
+    """Message d'erreur quand le statut actuel ne permet pas la transition"""
+    return f"{transition.requirement} (statut actuel: {current_status.value})"
@@ -0,0 +1,151 @@
+"""
+Écrivain unique par base SQLite
+
+SQLite n'accepte qu'un écrivain à la fois: des écritures lancées depuis plusieurs threads
+se disputent le verrou de la base (attente, voire "database is locked" sous charge).
+Ici, un thread dédié possède l'unique connexion d'écriture d'une base et consomme une file
+de commandes: les commandes en attente sont regroupées dans une même transaction (un seul
+commit pour tout le groupe), chacune isolée par un SAVEPOINT, et le résultat (ou l'exception)
+de chaque commande est transmis à son appelant via un Future une fois le commit effectué.
+
+Les lectures passent par des connexions séparées en lecture seule (mode WAL: elles ne
+bloquent pas l'écrivain et voient chaque transaction dès son commit).
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+# Nombre maximum de commandes regroupées dans une transaction
+WRITER_MAX_BATCH = int(os.getenv("WRITER_MAX_BATCH", "100"))
+# Attente maximale du verrou d'écriture (autres processus / workers), en secondes
+BUSY_TIMEOUT_SECONDS = 10
+
+T = TypeVar("T")
+# Commande d'écriture: reçoit la connexion (transaction ouverte) et retourne son résultat
+Command = Callable[[sqlite3.Connection], T]
+
+
+def connect_readonly(db_path: str) -> sqlite3.Connection:
+    """Connexion de lecture: toute écriture y est refusée (PRAGMA query_only)"""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class SQLiteWriter:
+    """Thread propriétaire de la connexion d'écriture d'une base"""
+
+    def __init__(self, db_path: str, max_batch: int = WRITER_MAX_BATCH):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[Tuple[Command, Future]]]" = queue.Queue()
+        self._ready = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+        # Nombre de transactions validées (une par groupe de commandes)
+        self.transactions = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"sqlite-writer-{os.path.basename(db_path)}", daemon=True
+        )
+        self._thread.start()
+        # La base est en mode WAL avant toute connexion de lecture
+        self._ready.wait()
+        if self._startup_error is not None:
+            raise self._startup_error
+
+    def submit(self, command: Command) -> "Future[T]":
+        """Met la commande en file et retourne le Future de son résultat"""
+        future: Future = Future()
+        self._queue.put((command, future))
+        return future
+
+    def execute(self, command: Command) -> T:
+        """Exécute la commande sur le thread écrivain et attend son commit"""
+        return self.submit(command).result()
+
+    def close(self) -> None:
+        """Traite les commandes en file puis arrête le thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error as e:
+            self._startup_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Regrouper les commandes déjà en attente dans la même transaction
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._apply(conn, batch)
+        conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, batch: List[Tuple[Command, Future]]) -> None:
+        """Exécute le groupe dans une transaction; chaque commande est annulée seule si elle échoue"""
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for command, future in batch:
+                conn.execute("SAVEPOINT command")
+                try:
+                    result = command(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO command")
+                    conn.execute("RELEASE command")
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute("RELEASE command")
+                    outcomes.append((future, result, None))
+            conn.execute("COMMIT")
+            self.transactions += 1
+        except sqlite3.Error as e:
+            # Transaction impossible (verrou d'un autre processus, disque plein...): tout le groupe échoue
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_writers: Dict[str, SQLiteWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str) -> SQLiteWriter:
+    """Écrivain unique de la base (partagé par tous les composants du processus)"""
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = SQLiteWriter(db_path)
+            _writers[key] = writer
+            atexit.register(writer.close)
+        return writer
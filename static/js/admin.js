@@ -2,6 +2,12 @@
 const API_BASE = '/';
 let currentStatus = 'pending';
 let allOrders = {};
+let statusCounts = {};
+let totalOrders = 0;
+let eventSource = null; // Flux SSE des changements de commandes (null: rafraîchissement périodique)
+
+// Statuts finaux: colonnes chargées à la demande (non incluses par défaut dans /admin/orders)
+const terminalStatuses = ['delivered', 'cancelled'];
 
 // Mapping des statuts
 const statusMap = {
@@ -20,24 +26,84 @@ const nextStatus = {
     'in_delivery': 'delivered'
 };
 
+// Libellés des actions groupées (toute la colonne affichée en une requête)
+const bulkActionLabels = {
+    'start': 'Commencer toute la fournée',
+    'ready': 'Marquer toutes prêtes',
+    'deliver': 'Envoyer toutes en livraison',
+    'delivered': 'Confirmer toutes les livraisons'
+};
+
 // DOM Elements
 const ordersContainer = document.getElementById('orders-container');
 const noOrdersMsg = document.getElementById('no-orders');
 const totalOrdersEl = document.getElementById('total-orders');
 const refreshBtn = document.getElementById('refresh-btn');
+const bulkActionsEl = document.getElementById('bulk-actions');
+const bulkAdvanceBtn = document.getElementById('bulk-advance-btn');
 const navBtns = document.querySelectorAll('.nav-btn');
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     setupEventListeners();
     loadOrders();
-    // Auto-refresh every 5 seconds
-    setInterval(loadOrders, 5000);
+    connectOrderStream();
 });
 
+// Live updates pushed by the server (Server-Sent Events); polling only if EventSource is unavailable
+function connectOrderStream() {
+    if (!window.EventSource) {
+        setInterval(loadOrders, 5000);
+        return;
+    }
+
+    eventSource = new EventSource(API_BASE + 'admin/orders/stream');
+    let interrupted = false;
+
+    // The browser reconnects by itself; events missed meanwhile are recovered with a full reload
+    eventSource.addEventListener('error', () => { interrupted = true; });
+    eventSource.addEventListener('open', () => {
+        if (interrupted) {
+            interrupted = false;
+            loadOrders();
+        }
+    });
+
+    ['order_created', 'order_status_changed', 'order_cancelled'].forEach(type => {
+        eventSource.addEventListener(type, (e) => applyOrderEvent(JSON.parse(e.data)));
+    });
+    eventSource.addEventListener('resync', loadOrders);
+}
+
+// Apply a single order event to the loaded columns and counts
+function applyOrderEvent(event) {
+    statusCounts = event.counts;
+    totalOrders = Object.values(event.counts).reduce((sum, count) => sum + count, 0);
+
+    const orderId = event.order ? event.order.order_id : event.order_id;
+    if (event.previous_status && allOrders[event.previous_status]) {
+        allOrders[event.previous_status] = allOrders[event.previous_status].filter(o => o.order_id !== orderId);
+    }
+
+    if (event.order && allOrders[event.order.status]) {
+        const column = allOrders[event.order.status].filter(o => o.order_id !== orderId);
+        // Final statuses: newest first; active statuses: oldest first (work queue)
+        if (terminalStatuses.includes(event.order.status)) {
+            column.unshift(event.order);
+        } else {
+            column.push(event.order);
+        }
+        allOrders[event.order.status] = column;
+    }
+
+    updateCounts();
+    displayOrders();
+}
+
 // Setup event listeners
 function setupEventListeners() {
     refreshBtn.addEventListener('click', loadOrders);
+    bulkAdvanceBtn.addEventListener('click', advanceAllOrders);
 
     navBtns.forEach(btn => {
         btn.addEventListener('click', (e) => {
@@ -47,7 +113,7 @@ function setupEventListeners() {
     });
 }
 
-// Load all orders
+// Load counts + active columns (and the current column if it is a final status)
 async function loadOrders() {
     try {
         const response = await fetch(API_BASE + 'admin/orders');
@@ -55,6 +121,12 @@ async function loadOrders() {
 
         const data = await response.json();
         allOrders = data.orders_by_status;
+        statusCounts = data.counts;
+        totalOrders = data.total_orders;
+
+        if (terminalStatuses.includes(currentStatus)) {
+            await loadStatusColumn(currentStatus);
+        }
 
         updateCounts();
         displayOrders();
@@ -65,20 +137,36 @@ async function loadOrders() {
     }
 }
 
-// Update status counts
+// Load a single status column (used for final statuses)
+async function loadStatusColumn(status) {
+    const response = await fetch(`${API_BASE}admin/orders?status=${status}`);
+    if (!response.ok) throw new Error('Erreur lors du chargement des commandes');
+
+    const data = await response.json();
+    allOrders[status] = data.orders_by_status[status];
+}
+
+// Update status counts (maintained server-side, independent of pagination)
 function updateCounts() {
-    totalOrdersEl.textContent = Object.values(allOrders).flat().length;
+    totalOrdersEl.textContent = totalOrders;
 
     document.querySelectorAll('.status-count').forEach(el => {
         const status = el.dataset.status;
-        const count = allOrders[status] ? allOrders[status].length : 0;
-        el.textContent = count;
+        el.textContent = statusCounts[status] || 0;
     });
 }
 
 // Display orders for current status
 function displayOrders() {
     const orders = allOrders[currentStatus] || [];
+    const bulkAction = nextStatus[currentStatus];
+
+    if (bulkAction && orders.length > 1) {
+        bulkAdvanceBtn.textContent = `✓ ${bulkActionLabels[bulkAction]} (${orders.length})`;
+        bulkActionsEl.classList.remove('hidden');
+    } else {
+        bulkActionsEl.classList.add('hidden');
+    }
 
     if (orders.length === 0) {
         ordersContainer.innerHTML = '';
@@ -157,7 +245,7 @@ function createOrderElement(order) {
             </div>
             <div class="detail-item">
                 <div class="detail-label">Temps estimé</div>
-                <div class="detail-value">${order.estimated_delivery_minutes} min</div>
+                <div class="detail-value">${order.estimated_delivery_minutes != null ? order.estimated_delivery_minutes + ' min' : '—'}</div>
             </div>
             <div class="detail-item">
                 <div class="detail-label">Créée à</div>
@@ -200,7 +288,40 @@ async function updateOrderStatus(orderId, action) {
         }
 
         showAlert('Commande mise à jour avec succès', 'success');
-        await loadOrders();
+        // With the event stream, the change arrives as an event
+        if (!eventSource) await loadOrders();
+
+    } catch (error) {
+        showAlert('Erreur: ' + error.message, 'error');
+    }
+}
+
+// Advance every displayed order of the current column in one request
+async function advanceAllOrders() {
+    const action = nextStatus[currentStatus];
+    const orderIds = (allOrders[currentStatus] || []).map(order => order.order_id);
+    if (!action || orderIds.length === 0) return;
+
+    try {
+        const response = await fetch(API_BASE + 'admin/orders:transition', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ order_ids: orderIds, action: action })
+        });
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail);
+        }
+
+        const result = await response.json();
+        if (result.failed.length > 0) {
+            showAlert(`${result.succeeded.length} commandes mises à jour, ${result.failed.length} ignorées (statut déjà modifié)`, 'info');
+        } else {
+            showAlert(`${result.succeeded.length} commandes mises à jour`, 'success');
+        }
+        // With the event stream, the change arrives as an event
+        if (!eventSource) await loadOrders();
 
     } catch (error) {
         showAlert('Erreur: ' + error.message, 'error');
@@ -214,6 +335,13 @@ function switchStatus(status) {
     navBtns.forEach(btn => btn.classList.remove('active'));
     document.querySelector(`[data-status="${status}"]`).classList.add('active');
 
+    if (terminalStatuses.includes(status) && !allOrders[status]) {
+        loadStatusColumn(status)
+            .then(displayOrders)
+            .catch(error => showAlert('Erreur: ' + error.message, 'error'));
+        return;
+    }
+
     displayOrders();
 }
 
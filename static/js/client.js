@@ -6,6 +6,7 @@ let allToppings = [];
 let selectedPizzaIndex = null; // Index de la pizza actuellement sélectionnée
 let pizzasToppings = {}; // Objet pour tracker les toppings de chaque pizza {index: [topping1, topping2]}
 let currentToppingPizzaIndex = null; // Index de la pizza en cours de modification des toppings
+let pendingOrder = null; // Commande envoyée non confirmée {body, idempotencyKey}: un réessai réutilise la même clé
 
 // DOM Elements
 const navBtns = document.querySelectorAll('.nav-btn');
@@ -78,6 +79,17 @@ async function loadToppings() {
     }
 }
 
+// Vérifie la disponibilité d'une taille (matrice maintenue par le serveur)
+function isSizeAvailable(pizza, size) {
+    return !pizza.availability || !pizza.availability[size] || pizza.availability[size].available;
+}
+
+// Toppings en rupture pour une pizza (identiques pour toutes les tailles)
+function getUnavailableToppings(pizza) {
+    const sizes = pizza.availability ? Object.values(pizza.availability) : [];
+    return sizes.length > 0 ? sizes[0].unavailable_toppings : [];
+}
+
 // Render pizza menu
 function renderMenu() {
     menuContainer.innerHTML = '';
@@ -113,13 +125,13 @@ function renderMenu() {
             </div>
 
             <div class="pizza-sizes">
-                <button type="button" class="size-btn" data-pizza-index="${pizzaIndex}" data-size="small" data-price="${pizza.prices.small}">
+                <button type="button" class="size-btn" data-pizza-index="${pizzaIndex}" data-size="small" data-price="${pizza.prices.small}" ${isSizeAvailable(pizza, 'small') ? '' : 'disabled title="Rupture de stock"'}>
                     S: ${pizza.prices.small}€
                 </button>
-                <button type="button" class="size-btn" data-pizza-index="${pizzaIndex}" data-size="medium" data-price="${pizza.prices.medium}">
+                <button type="button" class="size-btn" data-pizza-index="${pizzaIndex}" data-size="medium" data-price="${pizza.prices.medium}" ${isSizeAvailable(pizza, 'medium') ? '' : 'disabled title="Rupture de stock"'}>
                     M: ${pizza.prices.medium}€
                 </button>
-                <button type="button" class="size-btn" data-pizza-index="${pizzaIndex}" data-size="large" data-price="${pizza.prices.large}">
+                <button type="button" class="size-btn" data-pizza-index="${pizzaIndex}" data-size="large" data-price="${pizza.prices.large}" ${isSizeAvailable(pizza, 'large') ? '' : 'disabled title="Rupture de stock"'}>
                     L: ${pizza.prices.large}€
                 </button>
             </div>
@@ -228,6 +240,14 @@ function removeFromCart(index) {
     showAlert(`${item.name} supprimée du panier`, 'info');
 }
 
+// Clé d'idempotence unique pour une commande
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
 // Place order
 async function placeOrder(e) {
     if (e) e.preventDefault();
@@ -265,13 +285,21 @@ async function placeOrder(e) {
         }
     };
 
+    // Même commande que la tentative précédente (réseau coupé, double clic): même clé,
+    // le serveur renvoie la commande déjà créée au lieu d'en créer une deuxième
+    const body = JSON.stringify(orderData);
+    if (!pendingOrder || pendingOrder.body !== body) {
+        pendingOrder = { body: body, idempotencyKey: newIdempotencyKey() };
+    }
+
     try {
         const response = await fetch(API_BASE + 'orders', {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'Idempotency-Key': pendingOrder.idempotencyKey
             },
-            body: JSON.stringify(orderData)
+            body: body
         });
 
         if (!response.ok) {
@@ -280,6 +308,7 @@ async function placeOrder(e) {
         }
 
         const result = await response.json();
+        pendingOrder = null;
         showAlert(`✓ Commande créée ! Numéro: #${result.order_id}`, 'success');
 
         // Clear form and cart
@@ -301,6 +330,102 @@ async function placeOrder(e) {
     }
 }
 
+// Live tracking: one SSE stream per tracked order, long-polling fallback
+const FINAL_STATUSES = ['delivered', 'cancelled'];
+const TRACKING_POLL_MS = 10000;
+const TRACKING_WAIT_SECONDS = 30;
+let trackingSource = null;
+let trackingTimer = null;
+let trackingGeneration = 0;
+
+function stopTracking() {
+    trackingGeneration++;
+    if (trackingSource) {
+        trackingSource.close();
+        trackingSource = null;
+    }
+    if (trackingTimer) {
+        clearTimeout(trackingTimer);
+        trackingTimer = null;
+    }
+}
+
+async function fetchOrderStatus(orderId) {
+    const response = await fetch(API_BASE + `orders/${orderId}/status`);
+
+    if (!response.ok) {
+        throw new Error('Commande non trouvée');
+    }
+
+    return response.json();
+}
+
+// Long-poll: the server answers as soon as the order changes, or 304 after TRACKING_WAIT_SECONDS
+function pollOrderStatus(orderId, etag = null, delay = 0) {
+    const generation = trackingGeneration;
+    trackingTimer = setTimeout(async () => {
+        try {
+            const response = await fetch(API_BASE + `orders/${orderId}/status?wait=${TRACKING_WAIT_SECONDS}`, {
+                headers: etag ? { 'If-None-Match': etag } : {},
+                cache: 'no-store'
+            });
+            if (generation !== trackingGeneration) {
+                return;
+            }
+            if (response.status === 304) {
+                pollOrderStatus(orderId, etag);
+                return;
+            }
+            if (!response.ok) {
+                throw new Error('Commande non trouvée');
+            }
+
+            const order = await response.json();
+            displayOrderStatus(order);
+            if (FINAL_STATUSES.includes(order.status)) {
+                trackingTimer = null;
+                return;
+            }
+            pollOrderStatus(orderId, response.headers.get('ETag'));
+        } catch (error) {
+            console.error(error);
+            if (generation === trackingGeneration) {
+                pollOrderStatus(orderId, etag, TRACKING_POLL_MS);
+            }
+        }
+    }, delay);
+}
+
+function followOrderStatus(orderId) {
+    if (typeof EventSource === 'undefined') {
+        pollOrderStatus(orderId);
+        return;
+    }
+
+    trackingSource = new EventSource(API_BASE + `orders/${orderId}/status/stream`);
+    trackingSource.addEventListener('order_status', (event) => {
+        const order = JSON.parse(event.data);
+        displayOrderStatus(order);
+        if (FINAL_STATUSES.includes(order.status)) {
+            stopTracking();
+        }
+    });
+    trackingSource.addEventListener('resync', async () => {
+        try {
+            displayOrderStatus(await fetchOrderStatus(orderId));
+        } catch (error) {
+            console.error(error);
+        }
+    });
+    trackingSource.onerror = () => {
+        // Stream rejected (e.g. proxy without SSE support): fall back to polling
+        if (trackingSource && trackingSource.readyState === EventSource.CLOSED) {
+            stopTracking();
+            pollOrderStatus(orderId, null, TRACKING_POLL_MS);
+        }
+    };
+}
+
 // Track order
 async function trackOrder() {
     const orderId = parseInt(document.getElementById('tracking-id').value);
@@ -310,16 +435,16 @@ async function trackOrder() {
         return;
     }
 
+    stopTracking();
+
     try {
-        const response = await fetch(API_BASE + `orders/${orderId}/status`);
+        const order = await fetchOrderStatus(orderId);
+        displayOrderStatus(order);
 
-        if (!response.ok) {
-            throw new Error('Commande non trouvée');
+        if (!FINAL_STATUSES.includes(order.status)) {
+            followOrderStatus(orderId);
         }
 
-        const order = await response.json();
-        displayOrderStatus(order);
-
     } catch (error) {
         document.getElementById('tracking-result').classList.add('hidden');
         document.getElementById('tracking-error').classList.remove('hidden');
@@ -338,7 +463,10 @@ function displayOrderStatus(order) {
     document.getElementById('track-subtotal').textContent = order.subtotal + '€';
     document.getElementById('track-delivery-fee').textContent = (order.delivery_fee === 0 ? 'GRATUIT ✓' : order.delivery_fee + '€');
     document.getElementById('track-total').textContent = order.total + '€';
-    document.getElementById('track-time').textContent = order.estimated_delivery_minutes + ' min environ';
+    // Délai estimé par la cuisine: absent une fois la commande sortie du four
+    document.getElementById('track-time').textContent = order.estimated_delivery_minutes != null
+        ? order.estimated_delivery_minutes + ' min environ'
+        : '—';
     document.getElementById('track-progress').style.width = order.progress_percent + '%';
     document.getElementById('track-status-label').textContent = order.status_label;
 
@@ -426,13 +554,16 @@ function openToppingModal(pizzaIndex) {
     const toppingGrid = document.getElementById('toppings-modal-grid');
     toppingGrid.innerHTML = '';
 
+    const unavailableToppings = getUnavailableToppings(pizza);
+
     allToppings.forEach(topping => {
         const div = document.createElement('div');
         div.className = 'topping-option';
         div.innerHTML = `
             <input type="checkbox" id="modal-topping-${topping.name}"
                    value="${topping.name}" data-price="${topping.price}"
-                   ${pizzasToppings[pizzaIndex].includes(topping.name) ? 'checked' : ''}>
+                   ${pizzasToppings[pizzaIndex].includes(topping.name) ? 'checked' : ''}
+                   ${unavailableToppings.includes(topping.name) ? 'disabled' : ''}>
             <label for="modal-topping-${topping.name}" style="margin: 0; cursor: pointer;">
                 ${topping.name} (+${topping.price}€)
             </label>
@@ -440,6 +571,7 @@ function openToppingModal(pizzaIndex) {
 
         div.addEventListener('click', () => {
             const checkbox = div.querySelector('input[type="checkbox"]');
+            if (checkbox.disabled) return;
             checkbox.checked = !checkbox.checked;
         });
 
@@ -1,7 +1,9 @@
 """
 Configuration pour pytest - ajoute src au chemin Python
 """
+import os
 import sys
+import tempfile
 from pathlib import Path
 
 # Ajouter le dossier src ET la racine au chemin Python
@@ -11,3 +13,10 @@ src_path = project_root / "src"
 for path in [str(project_root), str(src_path)]:
     if path not in sys.path:
         sys.path.insert(0, path)
+
+# Bases (inventaire, commandes) et archive dans un dossier temporaire, avant l'import de l'application:
+# les tests ne touchent jamais inventory.db, orders.db ni archive/ du développeur
+test_data_dir = tempfile.mkdtemp(prefix="pizza-tests-")
+os.environ["INVENTORY_DB_PATH"] = os.path.join(test_data_dir, "inventory.db")
+os.environ["ORDERS_DB_PATH"] = os.path.join(test_data_dir, "orders.db")
+os.environ["ARCHIVE_DIR"] = os.path.join(test_data_dir, "archive")
@@ -0,0 +1,41 @@
+"""
+Fonctions utilitaires partagées par les tests
+"""
+
+import httpx
+from src.models import Address, Order, Pizza
+
+# Réponse Nominatim: une adresse trouvée à Toulouse
+NOMINATIM_RESULTS = [{
+    "lat": "43.6045",
+    "lon": "1.4440",
+    "type": "house",
+    "class": "place",
+    "display_name": "22, Rue Alsace-Lorraine, Toulouse, France",
+}]
+
+
+def make_order(order_id: int, customer_name: str = "Jean Dupont") -> Order:
+    """Construit une commande sans géocodage (adresse considérée comme déjà validée)"""
+    address = Address.model_validate(
+        {"street_number": "22", "street": "Rue Alsace-Lorraine", "city": "Toulouse", "postal_code": "31000"},
+        context={"skip_geocoding": True},
+    )
+    return Order.model_validate(
+        {
+            "order_id": order_id,
+            "pizzas": [Pizza(name="Margherita", size="medium", toppings=["tomate", "mozzarella", "basilic"], price=8.0)],
+            "customer_name": customer_name,
+            "customer_address": address,
+        },
+        context={"skip_geocoding": True},
+    )
+
+
+def fake_geocoding_client(calls: list, results: list = NOMINATIM_RESULTS) -> httpx.AsyncClient:
+    """Client HTTP du géocodage asynchrone sans réseau: note chaque adresse demandée dans calls"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["q"])
+        return httpx.Response(200, json=results)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
@@ -0,0 +1,126 @@
+"""
+Tests pour l'archivage des commandes terminées
+"""
+
+import os
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from src.archive import OrderArchive, OrderArchiver
+from src.models import OrderStatus
+from src.repository import OrderRepository
+from tests.fixtures import make_order
+
+
+def make_delivered_order(order_id: int, age: timedelta):
+    """Commande livrée créée il y a `age`"""
+    order = make_order(order_id)
+    order.created_at = datetime.now() - age
+    order.status = OrderStatus.DELIVERED
+    return order
+
+
+class TestOrderArchive:
+    """Tests pour le stockage froid"""
+
+    def test_append_and_get(self, tmp_path):
+        """Une commande archivée est retrouvée via l'index"""
+        archive = OrderArchive(str(tmp_path))
+        order = make_delivered_order(1, timedelta(days=2))
+
+        assert archive.append([order]) == 1
+        restored = archive.get(1)
+
+        assert restored.order_id == 1
+        assert restored.status == OrderStatus.DELIVERED
+        assert archive.get(2) is None
+        assert archive.count() == 1
+
+    def test_segments_partitioned_by_date(self, tmp_path):
+        """Les segments sont rangés par date de création"""
+        archive = OrderArchive(str(tmp_path))
+        orders = [make_delivered_order(1, timedelta(days=3)), make_delivered_order(2, timedelta(days=2))]
+        archive.append(orders)
+
+        partitions = sorted(name for name in os.listdir(tmp_path) if name != "index.db")
+        assert partitions == sorted(order.created_at.strftime("%Y-%m-%d") for order in orders)
+
+    def test_index_survives_restart(self, tmp_path):
+        """L'index et les segments sont relus après redémarrage"""
+        OrderArchive(str(tmp_path)).append([make_delivered_order(5, timedelta(days=2))])
+        assert OrderArchive(str(tmp_path)).get(5).order_id == 5
+
+    def test_count_shared_between_workers(self, tmp_path):
+        """Le compteur est lu dans l'index: identique pour tous les workers, sans double comptage"""
+        first, second = OrderArchive(str(tmp_path)), OrderArchive(str(tmp_path))
+        order = make_delivered_order(1, timedelta(days=2))
+        first.append([order, make_delivered_order(2, timedelta(days=2))])
+        second.append([order])  # archivée à nouveau (arrêt entre archivage et retrait du dépôt)
+
+        assert first.count() == second.count() == 2
+        assert second.get(1).order_id == 1
+
+
+class TestOrderArchiver:
+    """Tests pour le passage d'archivage"""
+
+    def test_only_old_terminal_orders_are_archived(self, tmp_path):
+        """Seules les commandes terminées plus anciennes que l'âge configuré sont déplacées"""
+        repository = OrderRepository()
+        old_delivered = make_delivered_order(repository.next_order_id(), timedelta(days=2))
+        recent_delivered = make_delivered_order(repository.next_order_id(), timedelta(minutes=5))
+        old_pending = make_order(repository.next_order_id())
+        old_pending.created_at = datetime.now() - timedelta(days=2)
+        for order in (old_delivered, recent_delivered, old_pending):
+            repository.add(order)
+
+        archive = OrderArchive(str(tmp_path))
+        archiver = OrderArchiver(repository, archive, max_age=timedelta(hours=24))
+
+        assert archiver.run_once() == 1
+        assert old_delivered.order_id not in repository
+        assert archive.get(old_delivered.order_id) is not None
+        assert recent_delivered.order_id in repository
+        assert old_pending.order_id in repository
+
+    def test_single_archiver_per_directory(self, tmp_path):
+        """Un seul archiveur (worker) détient le verrou du dossier; un autre prend le relais à son arrêt"""
+        archive = OrderArchive(str(tmp_path))
+        first = OrderArchiver(OrderRepository(), archive)
+        second = OrderArchiver(OrderRepository(), archive)
+
+        assert first.acquire_lock()
+        assert not second.acquire_lock()
+        first.release_lock()
+        assert second.acquire_lock()
+        second.release_lock()
+
+
+class TestArchivedOrderEndpoint:
+    """Tests pour la résolution transparente des commandes archivées"""
+
+    def test_get_archived_order(self, tmp_path, monkeypatch):
+        """GET /orders/{id} retrouve une commande archivée"""
+        import src.main
+        from main import app
+        from src.main import orders_db
+
+        order_archive = OrderArchive(str(tmp_path))
+        monkeypatch.setattr(src.main, "order_archive", order_archive)
+        orders_db.clear()
+        order = make_delivered_order(orders_db.next_order_id(), timedelta(days=2))
+        order_archive.append([order])
+
+        client = TestClient(app)
+        response = client.get(f"/orders/{order.order_id}")
+        assert response.status_code == 200
+        assert response.json()["status"] == "delivered"
+        assert client.get(f"/orders/{order.order_id}/status").json()["progress_percent"] == 100
+
+    def test_listing_documents_cutoff(self):
+        """GET /orders indique la date avant laquelle des commandes terminées ont pu être archivées"""
+        from main import app
+        from src.main import order_archiver
+
+        response = TestClient(app).get("/orders")
+        cutoff = datetime.fromisoformat(response.headers["x-archive-cutoff"])
+        assert abs(datetime.now() - order_archiver.max_age - cutoff) < timedelta(minutes=1)
@@ -0,0 +1,108 @@
+"""
+Tests pour le chemin de commande asynchrone (géocodage httpx, pool SQLite dédié)
+"""
+
+import asyncio
+import httpx
+from fastapi.testclient import TestClient
+from src import geocoding
+from src.main import app, inventory, orders_db
+from tests.fixtures import NOMINATIM_RESULTS, fake_geocoding_client
+
+client = TestClient(app)
+
+ORDER = {
+    "pizzas": [{"name": "Margherita", "size": "medium", "toppings": ["tomate", "mozzarella"]}],
+    "customer_name": "Jean Dupont",
+    "customer_address": {"street_number": "22", "street": "Rue Alsace-Lorraine", "city": "Toulouse", "postal_code": "31000"},
+}
+
+
+class TestAsyncOrderCreation:
+    """Tests pour POST /orders avec géocodage asynchrone"""
+
+    def setup_method(self):
+        """Réinitialise commandes et inventaire"""
+        orders_db.clear()
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def teardown_method(self):
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def test_order_created_after_geocoding(self, monkeypatch):
+        """L'adresse est géocodée une fois, la commande enregistrée et le stock réservé"""
+        calls = []
+        monkeypatch.setattr(geocoding, "http_client", fake_geocoding_client(calls))
+
+        response = client.post("/orders", json=ORDER)
+
+        assert response.status_code == 201
+        assert len(calls) == 1
+        assert response.json()["order_id"] in orders_db
+        assert inventory.ingredients["pate"] == 199
+
+    def test_coordinates_kept(self, monkeypatch):
+        """Les coordonnées du géocodage sont conservées avec la commande"""
+        monkeypatch.setattr(geocoding, "http_client", fake_geocoding_client([]))
+
+        response = client.post("/orders", json=ORDER)
+
+        address = orders_db.get(response.json()["order_id"]).customer_address
+        assert (address.latitude, address.longitude) == (43.6045, 1.4440)
+
+    def test_unknown_address_rejected(self, monkeypatch):
+        """Adresse introuvable: 422 sur customer_address, stock intact"""
+        monkeypatch.setattr(geocoding, "http_client", fake_geocoding_client([], results=[]))
+
+        response = client.post("/orders", json=ORDER)
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "customer_address"]
+        assert "n'existe pas" in response.json()["detail"][0]["msg"]
+        assert inventory.ingredients["pate"] == 200
+        assert len(orders_db) == 0
+
+    def test_field_validation_without_network(self, monkeypatch):
+        """Ville invalide: 422 sans appel au géocodeur"""
+        calls = []
+        monkeypatch.setattr(geocoding, "http_client", fake_geocoding_client(calls))
+
+        response = client.post("/orders", json={**ORDER, "customer_address": {**ORDER["customer_address"], "city": "Paris"}})
+
+        assert response.status_code == 422
+        assert calls == []
+
+    def test_slow_geocoding_does_not_block_menu(self, monkeypatch):
+        """Pendant un géocodage lent, le menu reste servi immédiatement"""
+        async def slow_handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.5)
+            return httpx.Response(200, json=NOMINATIM_RESULTS)
+
+        monkeypatch.setattr(geocoding, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(slow_handler)))
+
+        async def scenario():
+            finished = []
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                async def post_order():
+                    response = await async_client.post("/orders", json=ORDER)
+                    finished.append(("order", response.status_code))
+
+                async def get_menu():
+                    await asyncio.sleep(0.05)
+                    response = await async_client.get("/pizzas/menu")
+                    finished.append(("menu", response.status_code))
+
+                await asyncio.gather(post_order(), get_menu())
+            return finished
+
+        assert asyncio.run(scenario()) == [("menu", 200), ("order", 201)]
+
+
+class TestAsyncCancellation:
+    """Tests pour DELETE /orders/{order_id}"""
+
+    def test_cancel_unknown_order(self):
+        """Commande inconnue: 404"""
+        assert client.delete("/orders/999999").status_code == 404
+
@@ -0,0 +1,85 @@
+"""
+Tests pour la matrice de disponibilité du menu
+"""
+
+from fastapi.testclient import TestClient
+from src.availability import MenuAvailability
+from src.models import InventoryManager
+from main import app, inventory
+
+
+client = TestClient(app)
+
+
+class TestMenuAvailability:
+    """Tests pour la mise à jour incrémentale de la matrice"""
+
+    def test_everything_available_with_default_stock(self):
+        """Avec le stock initial, toutes les combinaisons sont disponibles"""
+        availability = MenuAvailability(InventoryManager())
+        for entry in availability.get_menu():
+            for size in ["small", "medium", "large"]:
+                assert entry.availability[size]["available"] is True
+                assert entry.availability[size]["unavailable_toppings"] == []
+
+    def test_base_topping_out_of_stock_disables_pizza(self):
+        """Une rupture d'un topping de base rend la pizza indisponible"""
+        manager = InventoryManager()
+        availability = MenuAvailability(manager)
+
+        manager.ingredients["basilic"] = 0
+
+        assert not availability.is_pizza_available("Margherita", "medium")
+        assert not availability.is_available("Margherita", "large", "olives")
+        # Les pizzas sans basilic restent disponibles
+        assert availability.is_pizza_available("Reine", "medium")
+
+    def test_extra_topping_out_of_stock(self):
+        """Une rupture d'un topping supplémentaire n'affecte que les cellules de ce topping"""
+        manager = InventoryManager()
+        availability = MenuAvailability(manager)
+
+        manager.ingredients["ananas"] = 0
+
+        assert availability.is_pizza_available("Reine", "small")
+        assert not availability.is_available("Reine", "small", "ananas")
+        assert availability.is_available("Reine", "small", "olives")
+        assert availability.get_menu()[1].availability["small"]["unavailable_toppings"] == ["ananas"]
+
+    def test_restock_restores_availability(self):
+        """Un réapprovisionnement au-dessus du seuil rétablit la disponibilité"""
+        manager = InventoryManager()
+        availability = MenuAvailability(manager)
+
+        manager.ingredients["pate"] = 0
+        assert not availability.is_pizza_available("Pepperoni", "large")
+
+        manager.add_ingredient_stock("pate", 5)
+        assert availability.is_pizza_available("Pepperoni", "large")
+
+    def test_full_reset_is_diffed(self):
+        """Remplacer tout le stock ne notifie que les ingrédients modifiés"""
+        manager = InventoryManager()
+        availability = MenuAvailability(manager)
+        manager.ingredients["olives"] = 0
+
+        manager.ingredients = manager.AVAILABLE_INGREDIENTS.copy()
+
+        assert availability.is_pizza_available("Végétarienne", "medium")
+
+
+class TestMenuEndpointAvailability:
+    """Tests pour la disponibilité exposée par GET /pizzas/menu"""
+
+    def test_menu_reflects_stock(self):
+        """Le menu reflète une rupture de stock sans recalcul"""
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+        inventory.ingredients["gorgonzola"] = 0
+        try:
+            menu = client.get("/pizzas/menu").json()
+            by_name = {pizza["name"]: pizza for pizza in menu}
+            assert by_name["4 Fromages"]["availability"]["medium"]["available"] is False
+            assert by_name["Margherita"]["availability"]["medium"]["available"] is True
+            assert "gorgonzola" in by_name["Margherita"]["availability"]["medium"]["unavailable_toppings"]
+        finally:
+            inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
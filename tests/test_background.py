@@ -0,0 +1,149 @@
+"""
+Tests pour le bus d'événements métier et les workers de fond
+"""
+
+import threading
+import time
+from fastapi.testclient import TestClient
+from src import geocoding, main
+from src.background import ORDER_CREATED_EVENT, BackgroundBus
+from src.main import analytics, app, background_bus, inventory, orders_db
+from tests.fixtures import fake_geocoding_client
+
+client = TestClient(app)
+
+ORDER = {
+    "pizzas": [{"name": "Margherita", "size": "medium", "toppings": ["tomate", "mozzarella"]}],
+    "customer_name": "Jean Dupont",
+    "customer_address": {"street_number": "22", "street": "Rue Alsace-Lorraine", "city": "Toulouse", "postal_code": "31000"},
+}
+
+
+class TestBackgroundBus:
+    """Tests pour BackgroundBus"""
+
+    def test_same_key_in_order(self):
+        """Les événements d'une même clé sont traités dans l'ordre de publication"""
+        bus = BackgroundBus(workers=4)
+        seen = {1: [], 2: []}
+        bus.subscribe("test", lambda payload: seen[payload["key"]].append(payload["index"]))
+        for index in range(500):
+            bus.publish("test", {"key": 1 + index % 2, "index": index}, key=1 + index % 2)
+        bus.flush()
+
+        assert seen[1] == list(range(0, 500, 2))
+        assert seen[2] == list(range(1, 500, 2))
+
+    def test_failing_handler_isolated(self):
+        """L'échec d'un abonné n'empêche pas les suivants"""
+        bus = BackgroundBus(workers=1)
+        calls = []
+
+        def failing(payload):
+            raise RuntimeError("boom")
+
+        bus.subscribe("test", failing)
+        bus.subscribe("test", calls.append)
+        bus.publish("test", {"n": 1})
+        bus.flush()
+
+        assert calls == [{"n": 1}]
+        assert bus.stats()["failed"] == 1
+
+    def test_full_queue_drops_without_blocking(self):
+        """File pleine: l'événement est abandonné sans attendre, compté et signalé, jamais traité dans le thread qui publie"""
+        bus = BackgroundBus(workers=1, queue_size=1)
+        release = threading.Event()
+        seen, drops = [], []
+
+        def handler(payload):
+            if payload.get("block"):
+                release.wait(5)
+            seen.append((payload["n"], threading.current_thread()))
+
+        bus.subscribe("test", handler)
+        bus.add_drop_listener(drops.append)
+        bus.publish("test", {"n": 0, "block": True})
+        while bus.stats()["queued"]:
+            time.sleep(0.001)  # le worker prend l'événement bloquant
+        bus.publish("test", {"n": 1})
+        started = time.monotonic()
+        bus.publish("test", {"n": 2})
+        assert time.monotonic() - started < 0.1
+        assert seen == [] and drops == ["test"]
+
+        release.set()
+        bus.flush()
+        assert [n for n, _ in seen] == [0, 1]
+        assert threading.current_thread() not in {thread for _, thread in seen}
+        assert bus.stats()["dropped"] == 1
+
+    def test_ordered_handlers_follow_publication(self):
+        """Abonnés ordonnés: ordre global de publication, toutes clés confondues"""
+        bus = BackgroundBus(workers=4)
+        ordered, by_key = [], []
+        bus.subscribe("test", lambda payload: ordered.append(payload["index"]), ordered=True)
+        bus.subscribe("test", lambda payload: by_key.append(payload["index"]))
+        for index in range(500):
+            bus.publish("test", {"index": index}, key=index)
+        bus.flush()
+
+        assert ordered == list(range(500))
+        assert sorted(by_key) == list(range(500))
+
+    def test_no_subscriber(self):
+        """Sans abonné, rien n'est mis en file"""
+        bus = BackgroundBus(workers=1)
+        bus.publish("test", {})
+        assert bus.stats()["published"] == 0
+
+
+class TestOrderSideEffects:
+    """Tests pour les effets de bord de POST /orders"""
+
+    def setup_method(self):
+        """Réinitialise commandes, inventaire et compteurs"""
+        orders_db.clear()
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+        background_bus.flush()
+        analytics.clear()
+
+    def teardown_method(self):
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def test_response_does_not_wait_for_subscribers(self, monkeypatch):
+        """La réponse part avant l'exécution des abonnés de order.created"""
+        monkeypatch.setattr(geocoding, "http_client", fake_geocoding_client([]))
+        bus = BackgroundBus(workers=1)
+        release = threading.Event()
+        handled = []
+
+        def slow_subscriber(payload):
+            release.wait(5)
+            handled.append(payload["summary"]["order_id"])
+
+        bus.subscribe(ORDER_CREATED_EVENT, slow_subscriber)
+        monkeypatch.setattr(main, "background_bus", bus)
+
+        response = client.post("/orders", json=ORDER)
+        assert response.status_code == 201
+        assert handled == []
+
+        release.set()
+        bus.flush()
+        assert handled == [response.json()["order_id"]]
+
+    def test_analytics_updated(self, monkeypatch):
+        """Les compteurs suivent créations et transitions"""
+        monkeypatch.setattr(geocoding, "http_client", fake_geocoding_client([]))
+        order_id = client.post("/orders", json=ORDER).json()["order_id"]
+        client.post(f"/admin/orders/{order_id}/start")
+        background_bus.flush()
+
+        data = client.get("/admin/analytics").json()
+        assert data["orders_created"] == 1
+        assert data["pizzas_sold"] == {"Margherita": 1}
+        assert data["transitions"] == {"preparing": 1}
+        assert data["revenue"] > 0
+        # Stock réservé par la commande (inventory.changed)
+        assert data["ingredients_used"]["pate"] == 1
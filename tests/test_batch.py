@@ -0,0 +1,117 @@
+"""
+Tests pour la création de commandes en lot (POST /orders:batch)
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from src import geocoding
+from src.batch import allocate_stock, ingredient_requirements, price_pizzas, validate_addresses
+from src.models import Address, InventoryManager, OrderCreate, PizzaCreate
+from src.main import app, inventory, orders_db
+from tests.fixtures import fake_geocoding_client
+
+client = TestClient(app)
+
+ADDRESS = {"street_number": "22", "street": "Rue Alsace-Lorraine", "city": "Toulouse", "postal_code": "31000"}
+OTHER_ADDRESS = {"street_number": "1", "street": "Rue Alsace-Lorraine", "city": "Toulouse", "postal_code": "31000"}
+
+
+@pytest.fixture
+def geocoding_calls(monkeypatch):
+    """Remplace l'appel réseau au géocodage et compte les appels"""
+    calls = []
+    monkeypatch.setattr(geocoding, "http_client", fake_geocoding_client(calls))
+    return calls
+
+
+def order_payload(name: str = "Margherita", address: dict = ADDRESS, toppings=None) -> dict:
+    """Corps d'une commande d'une pizza"""
+    return {
+        "pizzas": [{"name": name, "size": "medium", "toppings": toppings or ["tomate", "mozzarella"]}],
+        "customer_name": "Société Dupont",
+        "customer_address": address,
+    }
+
+
+class TestBatchHelpers:
+    """Tests pour les étapes du traitement en lot"""
+
+    def test_addresses_geocoded_once(self, geocoding_calls):
+        """Chaque adresse distincte n'est géocodée qu'une fois"""
+        addresses = [Address.model_validate(address, context={"skip_geocoding": True}) for address in [ADDRESS, OTHER_ADDRESS, ADDRESS]]
+
+        results = asyncio.run(validate_addresses(addresses))
+
+        assert len(geocoding_calls) == 2
+        assert all(error is None for error in results.values())
+
+    def test_price_pizzas(self):
+        """Les prix du lot sont ceux de Pizza.from_create"""
+        order_create = OrderCreate.model_validate(order_payload(), context={"skip_geocoding": True})
+        [[pizza]] = price_pizzas([order_create])
+        assert pizza.price == pytest.approx(8.0)
+
+    def test_allocate_stock_accounts_for_batch(self):
+        """Le stock déjà réservé par le lot est décompté pour les commandes suivantes"""
+        manager = InventoryManager()
+        manager.ingredients["pate"] = 2
+        requirements = [ingredient_requirements([PizzaCreate(name="Margherita", size="medium", toppings=["tomate"])])] * 3
+
+        results = allocate_stock(manager, requirements)
+
+        assert results[:2] == [None, None]
+        assert results[2] == "La pâte est en rupture de stock"
+        assert manager.ingredients["pate"] == 2
+
+
+class TestBatchEndpoint:
+    """Tests pour POST /orders:batch"""
+
+    def setup_method(self):
+        """Réinitialise commandes et inventaire"""
+        orders_db.clear()
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def teardown_method(self):
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def test_batch_reports_each_order(self, geocoding_calls):
+        """Commandes valides créées, commandes invalides rejetées individuellement"""
+        response = client.post("/orders:batch", json={"orders": [
+            order_payload(),
+            order_payload(name="Hawaienne-Ananas"),
+            order_payload(address=OTHER_ADDRESS),
+            order_payload(),
+        ]})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 3
+        assert data["rejected"] == 1
+        assert [result["status"] for result in data["results"]] == ["created", "rejected", "created", "created"]
+        assert "error" in data["results"][1]
+        assert len(geocoding_calls) == 2
+
+        order_ids = [result["order"]["order_id"] for result in data["results"] if result["status"] == "created"]
+        assert len(set(order_ids)) == 3
+        assert all(order_id in orders_db for order_id in order_ids)
+
+    def test_inventory_reserved_for_accepted_orders(self, geocoding_calls):
+        """Le stock est décrémenté une fois par pizza acceptée; la rupture rejette les suivantes"""
+        inventory.ingredients["pate"] = 2
+        mozzarella_before = inventory.ingredients["mozzarella"]
+
+        response = client.post("/orders:batch", json={"orders": [order_payload()] * 3})
+        data = response.json()
+
+        assert data["created"] == 2
+        assert data["results"][2]["status"] == "rejected"
+        assert "rupture de stock" in data["results"][2]["error"]
+        assert inventory.ingredients["pate"] == 0
+        assert inventory.ingredients["mozzarella"] == mozzarella_before - 2
+
+    def test_empty_and_oversized_batch(self):
+        """Lot vide ou trop grand: 400"""
+        assert client.post("/orders:batch", json={"orders": []}).status_code == 400
+        assert client.post("/orders:batch", json={"orders": [order_payload()] * 101}).status_code == 400
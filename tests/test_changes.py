@@ -0,0 +1,112 @@
+"""
+Tests pour le journal des modifications et GET /changes
+"""
+
+from fastapi.testclient import TestClient
+from src.changes import ChangeLog
+from src.main import app, inventory, orders_db
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+
+class TestChangeLog:
+    """Tests pour la séquence globale et le ring buffer"""
+
+    def test_changes_since_cursor(self):
+        """Seules les modifications postérieures au curseur sont retournées"""
+        log = ChangeLog(start=0)
+        log.record_orders([1])
+        log.on_stock_change("pate", 10, 9)
+        cursor = log.sequence
+        log.record_orders([2, 3])
+        log.on_stock_change("tomate", 5, 4)
+
+        changes = log.changes_since(cursor)
+
+        assert changes.sequence == 4
+        assert changes.order_ids == {2, 3}
+        assert changes.ingredients == {"tomate"}
+        assert log.changes_since(log.sequence).order_ids == set()
+
+    def test_stale_cursor(self):
+        """Curseur écrasé par le ring buffer, ou inconnu (redémarrage): instantané requis"""
+        log = ChangeLog(maxlen=3, start=0)
+        for order_id in range(5):
+            log.record_orders([order_id])
+
+        assert log.changes_since(1) is None
+        assert log.changes_since(2).order_ids == {2, 3, 4}
+        assert log.changes_since(99) is None
+
+    def test_versions_evicted_with_entries(self):
+        """Les versions suivent le ring buffer; une clé écrasée prend le plancher, jamais une version antérieure"""
+        log = ChangeLog(maxlen=3, start=0)
+        log.record_orders([1])
+        first_version = log.version("order", 1)
+        for order_id in range(2, 1000):
+            log.record_orders([order_id])
+
+        assert len(log._versions) == 3
+        assert log.version("order", 999) == log.sequence
+        assert first_version < log.version("order", 1) == log.version("order", 5) < log.version("order", 997)
+
+    def test_restart_invalidates_cursors(self):
+        """Un nouveau journal démarre au-delà des séquences émises par le précédent"""
+        previous = ChangeLog()
+        previous.record_orders([1])
+
+        assert ChangeLog().changes_since(previous.sequence) is None
+
+
+class TestChangesEndpoint:
+    """Tests pour GET /changes"""
+
+    def setup_method(self):
+        """Réinitialise commandes et inventaire"""
+        orders_db.clear()
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def test_snapshot_then_delta(self):
+        """Sans curseur: instantané; ensuite uniquement commandes et ingrédients modifiés"""
+        started = make_order(orders_db.next_order_id())
+        cancelled = make_order(orders_db.next_order_id())
+        untouched = make_order(orders_db.next_order_id())
+        for order in (started, cancelled, untouched):
+            orders_db.add(order)
+
+        snapshot = client.get("/changes").json()
+        assert snapshot["full"] is True
+        assert {order["order_id"] for order in snapshot["orders"]} == {started.order_id, cancelled.order_id, untouched.order_id}
+        assert snapshot["ingredients"]["pate"] == 200
+
+        client.post(f"/admin/orders/{started.order_id}/start")
+        client.delete(f"/orders/{cancelled.order_id}")
+        client.post("/inventory/ingredients/olives/add?quantity=5")
+
+        delta = client.get("/changes", params={"since": snapshot["sequence"]}).json()
+        assert delta["full"] is False
+        assert delta["sequence"] > snapshot["sequence"]
+        assert [order["order_id"] for order in delta["orders"]] == [started.order_id, cancelled.order_id]
+        assert [order["status"] for order in delta["orders"]] == ["preparing", "cancelled"]
+        assert delta["removed_order_ids"] == []
+        # L'annulation restaure pâte et ingrédients de la Margherita
+        assert delta["ingredients"]["olives"] == 75
+        assert delta["ingredients"]["pate"] == 201
+
+        assert client.get("/changes", params={"since": delta["sequence"]}).json()["orders"] == []
+
+    def test_snapshot_holds_active_orders(self):
+        """L'instantané ne relit pas l'historique: les commandes terminées n'y sont pas"""
+        active = make_order(orders_db.next_order_id())
+        cancelled = make_order(orders_db.next_order_id())
+        for order in (active, cancelled):
+            orders_db.add(order)
+        client.delete(f"/orders/{cancelled.order_id}")
+
+        snapshot = client.get("/changes").json()
+        assert [order["order_id"] for order in snapshot["orders"]] == [active.order_id]
+
+    def test_stale_cursor_returns_snapshot(self):
+        """Curseur inconnu: instantané complet"""
+        assert client.get("/changes", params={"since": 0}).json()["full"] is True
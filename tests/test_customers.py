@@ -0,0 +1,116 @@
+"""
+Tests pour l'index client, l'historique et la recommande
+"""
+
+from datetime import datetime, timedelta
+import pytest
+import requests
+import src.main
+from fastapi.testclient import TestClient
+from src.archive import OrderArchive
+from src.db import SQLiteOrderRepository
+from src.models import OrderStatus
+from src.repository import OrderRepository
+from src.main import app, inventory, orders_db
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    """Dépôt vide pour chaque implémentation"""
+    if request.param == "memory":
+        return OrderRepository()
+    return SQLiteOrderRepository(str(tmp_path / "orders.db"))
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    """Archive vide isolée pour l'application"""
+    order_archive = OrderArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(src.main, "order_archive", order_archive)
+    return order_archive
+
+
+class TestCustomerIndex:
+    """Tests pour l'index par client du dépôt et de l'archive"""
+
+    def test_list_by_customer(self, repository):
+        """Seules les commandes du client sont retournées, les plus récentes d'abord"""
+        for name in ["Jean Dupont", "Marie Curie", "jean  DUPONT"]:
+            repository.add(make_order(repository.next_order_id(), customer_name=name))
+        key = make_order(0).customer_key
+
+        orders = repository.list_by_customer(key)
+
+        assert [order.customer_name for order in orders] == ["jean  DUPONT", "Jean Dupont"]
+        assert orders[0].order_id > orders[1].order_id
+
+    def test_index_updated_on_remove(self, repository):
+        """Une commande supprimée (annulée, archivée) sort de l'index"""
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+        repository.remove(order.order_id)
+
+        assert repository.list_by_customer(order.customer_key) == []
+        assert repository.list_orders(customer_key=order.customer_key) == []
+
+    def test_archive_index(self, tmp_path):
+        """Les commandes archivées sont retrouvées par clé client"""
+        archive = OrderArchive(str(tmp_path))
+        orders = [make_order(1), make_order(2, customer_name="Marie Curie"), make_order(3)]
+        archive.append(orders)
+
+        assert [order.order_id for order in archive.list_by_customer(orders[0].customer_key)] == [3, 1]
+
+
+class TestCustomerEndpoints:
+    """Tests pour GET /customers/{key}/orders et POST /customers/{key}/reorder"""
+
+    def setup_method(self):
+        """Réinitialise commandes et inventaire"""
+        orders_db.clear()
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def test_history_includes_archived_orders(self, archive):
+        """L'historique fusionne commandes actives et archivées"""
+        archived = make_order(orders_db.next_order_id())
+        archived.status = OrderStatus.DELIVERED
+        archived.created_at = datetime.now() - timedelta(days=3)
+        archive.append([archived])
+        active = make_order(orders_db.next_order_id())
+        orders_db.add(active)
+
+        response = client.get(f"/customers/{active.customer_key}/orders")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [order["order_id"] for order in data["orders"]] == [active.order_id, archived.order_id]
+        assert data["customer_name"] == "Jean Dupont"
+
+    def test_unknown_customer(self, archive):
+        """Client inconnu: 404"""
+        assert client.get("/customers/0000000000000000/orders").status_code == 404
+        assert client.post("/customers/0000000000000000/reorder").status_code == 404
+
+    def test_reorder_skips_geocoding(self, archive, monkeypatch):
+        """La recommande reprend pizzas et adresse sans nouveau géocodage, et réserve le stock"""
+        def no_network(*args, **kwargs):
+            raise AssertionError("géocodage inattendu")
+
+        monkeypatch.setattr(requests, "get", no_network)
+        previous = make_order(orders_db.next_order_id())
+        orders_db.add(previous)
+        pate_before = inventory.ingredients["pate"]
+
+        response = client.post(f"/customers/{previous.customer_key}/reorder")
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["reordered_from"] == previous.order_id
+        assert data["order"]["order_id"] != previous.order_id
+        assert data["order"]["customer_key"] == previous.customer_key
+        assert [pizza["name"] for pizza in data["order"]["pizzas"]] == ["Margherita"]
+        assert inventory.ingredients["pate"] == pate_before - 1
+        assert len(orders_db.list_by_customer(previous.customer_key)) == 2
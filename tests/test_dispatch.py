@@ -0,0 +1,134 @@
+"""
+Tests pour la planification des tournées de livraison
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from src.dispatch import DispatchPlanner, distance_km, two_opt
+from src.main import app, orders_db
+from src.models import OrderStatus
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+NOW = datetime(2026, 3, 1, 19, 0)
+DEPOT = (43.6045, 1.4440)
+
+
+def ready_order(order_id: int, latitude: float, longitude: float, pizzas: int = 1, ready_minutes_ago: int = 0):
+    """Commande prête, géocodée à la position donnée"""
+    order = make_order(order_id)
+    order.pizzas = order.pizzas * pizzas
+    order.customer_address.latitude = latitude
+    order.customer_address.longitude = longitude
+    order.status = OrderStatus.READY_FOR_DELIVERY
+    order.ready_at = NOW - timedelta(minutes=ready_minutes_ago)
+    return order
+
+
+class TestRouting:
+    """Tests pour les distances et l'amélioration 2-opt"""
+
+    def test_distance(self):
+        """Capitole -> gare Matabiau: environ 1,2 km"""
+        assert 1.0 < distance_km(43.6045, 1.4440, 43.6113, 1.4536) < 1.4
+
+    def test_two_opt_removes_crossing(self):
+        """Un parcours qui se croise est démêlé"""
+        points = [(0, 0), (0, 1), (1, 1), (1, 0)]
+        dist = [[abs(a[0] - b[0]) + abs(a[1] - b[1]) for b in points] for a in points]
+        assert two_opt([2, 1, 3], dist) in ([1, 2, 3], [3, 2, 1])
+
+
+class TestDispatchPlanner:
+    """Tests pour DispatchPlanner"""
+
+    def setup_method(self):
+        self.planner = DispatchPlanner(depot=DEPOT, capacity=4, speed_kmh=20, window_minutes=40)
+
+    def test_neighbours_share_a_trip(self):
+        """Les commandes voisines partent ensemble, une commande éloignée part seule"""
+        orders = [
+            ready_order(1, 43.6100, 1.4500),
+            ready_order(2, 43.6105, 1.4510),
+            ready_order(3, 43.6110, 1.4505),
+            ready_order(4, 43.5700, 1.3900),
+        ]
+        plan = self.planner.plan(orders, NOW)
+
+        trips = sorted(sorted(trip["order_ids"]) for trip in plan["trips"])
+        assert trips == [[1, 2, 3], [4]]
+        assert plan["late_orders"] == 0
+
+    def test_capacity_is_respected(self):
+        """Jamais plus de pizzas que la capacité du livreur"""
+        orders = [ready_order(order_id, 43.6100, 1.4500, pizzas=2) for order_id in range(1, 6)]
+        plan = self.planner.plan(orders, NOW)
+
+        assert all(trip["pizzas"] <= 4 for trip in plan["trips"])
+        assert sorted(order_id for trip in plan["trips"] for order_id in trip["order_ids"]) == [1, 2, 3, 4, 5]
+
+    def test_deadlines_split_trips(self):
+        """Une commande presque en retard n'attend pas un détour pour une autre"""
+        orders = [
+            ready_order(1, 43.6300, 1.4700, ready_minutes_ago=30),
+            ready_order(2, 43.5800, 1.4200),
+        ]
+        plan = self.planner.plan(orders, NOW)
+
+        assert sorted(sorted(trip["order_ids"]) for trip in plan["trips"]) == [[1], [2]]
+        assert plan["trips"][0]["order_ids"] == [1]
+
+    def test_late_order_is_flagged(self):
+        """Une commande déjà hors délai part quand même, signalée en retard"""
+        plan = self.planner.plan([ready_order(1, 43.6300, 1.4700, ready_minutes_ago=60)], NOW)
+        assert plan["trips"][0]["stops"][0]["late"] is True
+        assert plan["late_orders"] == 1
+
+    def test_unlocated_orders_listed(self):
+        """Commandes sans coordonnées: listées à part"""
+        order = make_order(1)
+        order.status = OrderStatus.READY_FOR_DELIVERY
+        plan = self.planner.plan([order], NOW)
+
+        assert plan["trips"] == []
+        assert plan["unlocated_order_ids"] == [1]
+
+    def test_hundred_orders_fast(self):
+        """100 commandes dans Toulouse: chaque commande dans une seule tournée, en moins d'une seconde"""
+        rng = random.Random(3)
+        orders = [
+            ready_order(order_id, 43.6045 + rng.uniform(-0.03, 0.03), 1.4440 + rng.uniform(-0.04, 0.04),
+                        pizzas=rng.randint(1, 3), ready_minutes_ago=rng.randint(0, 20))
+            for order_id in range(1, 101)
+        ]
+        began = time.perf_counter()
+        plan = DispatchPlanner(depot=DEPOT).plan(orders, NOW)
+        elapsed = time.perf_counter() - began
+
+        assert elapsed < 1
+        assert sorted(order_id for trip in plan["trips"] for order_id in trip["order_ids"]) == list(range(1, 101))
+        assert len(plan["trips"]) < 100
+
+
+class TestDispatchEndpoint:
+    """Tests pour GET /admin/dispatch/plan"""
+
+    def setup_method(self):
+        """Vide le dépôt avant chaque test"""
+        orders_db.clear()
+
+    def test_plan_ready_orders(self):
+        """Seules les commandes prêtes sont planifiées"""
+        for _ in range(3):
+            orders_db.add(ready_order(orders_db.next_order_id(), 43.6100, 1.4500))
+        orders_db.add(make_order(orders_db.next_order_id()))
+
+        plan = client.get("/admin/dispatch/plan").json()
+        assert sum(len(trip["order_ids"]) for trip in plan["trips"]) == 3
+
+    def test_invalid_capacity(self):
+        """capacity <= 0: 400"""
+        assert client.get("/admin/dispatch/plan", params={"capacity": 0}).status_code == 400
@@ -0,0 +1,212 @@
+"""
+Tests pour le registre des livreurs et l'affectation des commandes prêtes
+"""
+
+import random
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from src.drivers import DriverRegistry, IndexedHeap
+from src.main import app, drivers, kitchen, orders_db
+from src.models import DriverStatus, OrderStatus
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+NOW = datetime(2026, 3, 1, 19, 0)
+DEPOT = (43.6045, 1.4440)
+
+
+def ready_order(order_id: int, latitude: float = None, longitude: float = None, ready_minutes_ago: int = 0):
+    """Commande sortie du four, géocodée si des coordonnées sont données"""
+    order = make_order(order_id)
+    order.customer_address.latitude = latitude
+    order.customer_address.longitude = longitude
+    order.status = OrderStatus.READY_FOR_DELIVERY
+    order.ready_at = NOW - timedelta(minutes=ready_minutes_ago)
+    return order
+
+
+class TestIndexedHeap:
+    """Tests pour le tas indexé"""
+
+    def test_matches_brute_force(self):
+        """Ajouts, changements de priorité et retraits aléatoires: minimum toujours exact"""
+        rng = random.Random(11)
+        heap = IndexedHeap()
+        expected = {}
+        for _ in range(2000):
+            key = rng.randint(1, 50)
+            operation = rng.random()
+            if operation < 0.6:
+                expected[key] = (rng.randint(0, 100), key)
+                heap.push(key, expected[key])
+            elif operation < 0.8:
+                assert heap.remove(key) == (expected.pop(key, None) is not None)
+            elif expected:
+                smallest = min(expected, key=expected.get)
+                assert heap.pop() == smallest
+                del expected[smallest]
+            assert len(heap) == len(expected)
+            assert heap.peek() == (min(expected, key=expected.get) if expected else None)
+
+
+class TestDriverRegistry:
+    """Tests pour DriverRegistry"""
+
+    def setup_method(self):
+        self.registry = DriverRegistry(depot=DEPOT, speed_kmh=20, window_minutes=40)
+
+    def test_oldest_order_first(self):
+        """La commande qui attend depuis le plus longtemps part en premier"""
+        self.registry.on_transition(ready_order(1, ready_minutes_ago=0), OrderStatus.PREPARING)
+        self.registry.on_transition(ready_order(2, ready_minutes_ago=15), OrderStatus.PREPARING)
+        driver = self.registry.register("Paul", now=NOW)
+
+        assert self.registry.assign() == [([2], driver["driver_id"])]
+        assert self.registry.stats()["waiting_orders"] == 1
+
+    def test_distant_order_first(self):
+        """À sortie du four égale, la commande la plus éloignée part en premier"""
+        self.registry.on_transition(ready_order(1, 43.6060, 1.4450), OrderStatus.PREPARING)
+        self.registry.on_transition(ready_order(2, 43.6400, 1.4900), OrderStatus.PREPARING)
+        self.registry.register("Paul", now=NOW)
+
+        assert [order_ids for order_ids, _ in self.registry.assign()] == [[2]]
+
+    def test_nearest_driver_first(self):
+        """Le livreur le plus proche de la pizzeria est choisi; son déplacement le reclasse"""
+        far = self.registry.register("Loin", 43.6400, 1.4900, now=NOW)
+        near = self.registry.register("Proche", 43.6050, 1.4445, now=NOW)
+        self.registry.update(far["driver_id"], *DEPOT)
+        self.registry.update(near["driver_id"], 43.6300, 1.4700)
+        self.registry.on_transition(ready_order(1), OrderStatus.PREPARING)
+
+        assert self.registry.assign() == [([1], far["driver_id"])]
+
+    def test_driver_returns_and_takes_next_order(self):
+        """Le livreur rentre à la livraison de sa commande et prend la suivante"""
+        driver_id = self.registry.register("Paul", now=NOW)["driver_id"]
+        first, second = ready_order(1, 43.6100, 1.4500, ready_minutes_ago=20), ready_order(2)
+        self.registry.on_transition(first, OrderStatus.PREPARING)
+        self.registry.on_transition(second, OrderStatus.PREPARING)
+        assert self.registry.assign() == [([1], driver_id)]
+        assert self.registry.assign() == []
+        assert self.registry.get(driver_id)["status"] == DriverStatus.DELIVERING.value
+
+        first.status = OrderStatus.DELIVERED
+        self.registry.on_transition(first, OrderStatus.IN_DELIVERY)
+        driver = self.registry.get(driver_id)
+        assert driver["status"] == DriverStatus.AVAILABLE.value
+        assert (driver["latitude"], driver["longitude"]) == (43.6100, 1.4500)
+        assert self.registry.assign() == [([2], driver_id)]
+
+    def test_off_duty_after_delivery(self):
+        """Fin de service pendant une livraison: le livreur n'est plus affecté à son retour"""
+        driver_id = self.registry.register("Paul", now=NOW)["driver_id"]
+        order = ready_order(1)
+        self.registry.on_transition(order, OrderStatus.PREPARING)
+        self.registry.assign()
+        self.registry.update(driver_id, on_duty=False)
+
+        order.status = OrderStatus.DELIVERED
+        self.registry.on_transition(order, OrderStatus.IN_DELIVERY)
+        self.registry.on_transition(ready_order(2), OrderStatus.PREPARING)
+        assert self.registry.get(driver_id)["status"] == DriverStatus.OFF_DUTY.value
+        assert self.registry.assign() == []
+
+        self.registry.update(driver_id, on_duty=True)
+        assert self.registry.assign() == [([2], driver_id)]
+
+    def test_cancel_frees_driver(self):
+        """Annuler une commande en livraison libère son livreur"""
+        driver_id = self.registry.register("Paul", now=NOW)["driver_id"]
+        order = ready_order(1)
+        self.registry.on_transition(order, OrderStatus.PREPARING)
+        self.registry.assign()
+
+        assert self.registry.remove_order(order) is True
+        assert self.registry.get(driver_id)["status"] == DriverStatus.AVAILABLE.value
+
+    def test_driver_takes_trip(self):
+        """Le livreur part avec la tournée de la commande la plus urgente; il rentre après la dernière livraison"""
+        driver_id = self.registry.register("Paul", now=NOW)["driver_id"]
+        first, second = ready_order(1, 43.6100, 1.4500, ready_minutes_ago=30), ready_order(2, 43.6110, 1.4510)
+        far = ready_order(3, 43.6400, 1.4440)
+        for order in (first, second, far):
+            self.registry.on_transition(order, OrderStatus.PREPARING)
+
+        [(order_ids, assigned)] = self.registry.assign(now=NOW)
+        assert assigned == driver_id and sorted(order_ids) == [1, 2]
+        assert self.registry.stats()["waiting_orders"] == 1
+
+        first.status = OrderStatus.DELIVERED
+        self.registry.on_transition(first, OrderStatus.IN_DELIVERY)
+        assert self.registry.get(driver_id)["order_ids"] == [2]
+        assert self.registry.remove_order(second) is True
+        assert self.registry.get(driver_id)["status"] == DriverStatus.AVAILABLE.value
+
+    def test_trip_within_capacity(self):
+        """La tournée ne dépasse pas la capacité du livreur"""
+        registry = DriverRegistry(depot=DEPOT, speed_kmh=20, window_minutes=40, capacity=1)
+        registry.register("Paul", now=NOW)
+        registry.register("Marie", now=NOW)
+        registry.on_transition(ready_order(1, 43.6100, 1.4500), OrderStatus.PREPARING)
+        registry.on_transition(ready_order(2, 43.6110, 1.4510), OrderStatus.PREPARING)
+
+        assert sorted(order_ids for order_ids, _ in registry.assign(now=NOW)) == [[1], [2]]
+
+
+class TestDriverEndpoints:
+    """Tests pour /admin/drivers et l'affectation automatique"""
+
+    def setup_method(self):
+        """Vide le dépôt, la cuisine et les livreurs"""
+        orders_db.clear()
+        kitchen.clear()
+        drivers.clear()
+
+    def teardown_method(self):
+        drivers.clear()
+
+    def ready_order(self) -> int:
+        order = make_order(orders_db.next_order_id())
+        orders_db.add(order)
+        client.post(f"/admin/orders/{order.order_id}/start")
+        client.post(f"/admin/orders/{order.order_id}/ready")
+        return order.order_id
+
+    def test_ready_orders_assigned(self):
+        """Un livreur enregistré prend la commande prête; à son retour il prend la suivante"""
+        first, second = self.ready_order(), self.ready_order()
+        response = client.post("/admin/drivers", json={"name": "Paul"})
+        assert response.status_code == 201
+        driver = response.json()
+        assert driver["order_ids"] == [first]
+        assert orders_db.get(first).status == OrderStatus.IN_DELIVERY
+
+        client.post(f"/admin/orders/{first}/delivered")
+        assert orders_db.get(second).status == OrderStatus.IN_DELIVERY
+        data = client.get("/admin/drivers").json()
+        assert data["drivers"][0]["order_ids"] == [second]
+        assert data["waiting_orders"] == 0
+
+    def test_order_ready_with_driver_waiting(self):
+        """Une commande qui sort du four part aussitôt si un livreur attend"""
+        client.post("/admin/drivers", json={"name": "Paul"})
+        order_id = self.ready_order()
+        assert orders_db.get(order_id).status == OrderStatus.IN_DELIVERY
+
+    def test_patch_allowed_by_cors(self):
+        """Préflight CORS de PATCH /admin/drivers/{id} accepté"""
+        response = client.options("/admin/drivers/1", headers={
+            "Origin": "http://localhost:8000",
+            "Access-Control-Request-Method": "PATCH",
+        })
+        assert response.status_code == 200
+        assert "PATCH" in response.headers["access-control-allow-methods"]
+
+    def test_update_driver_errors(self):
+        """Livreur inconnu: 404; latitude sans longitude: 400"""
+        assert client.patch("/admin/drivers/999", json={"on_duty": False}).status_code == 404
+        driver_id = client.post("/admin/drivers", json={"name": "Paul"}).json()["driver_id"]
+        assert client.patch(f"/admin/drivers/{driver_id}", json={"latitude": 43.6}).status_code == 400
@@ -465,9 +465,13 @@ class TestCancelOrder:
         assert "annulée avec succès" in data["message"]
         assert "cancelled_order" in data
 
-        # Vérifier que la commande n'existe plus
+        # Vérifier que la commande est conservée avec le statut annulée
         get_response = client.get(f"/orders/{order_id}")
-        assert get_response.status_code == 404
+        assert get_response.status_code == 200
+        assert get_response.json()["status"] == "cancelled"
+
+        # Une commande déjà annulée ne peut pas l'être à nouveau
+        assert client.delete(f"/orders/{order_id}").status_code == 400
 
     def test_cancel_order_not_found(self):
         """Test d'annulation d'une commande inexistante"""
@@ -528,7 +532,8 @@ class TestIntegration:
 
         # 6. Vérifier que la commande est bien annulée
         final_get_response = client.get(f"/orders/{order_id}")
-        assert final_get_response.status_code == 404
+        assert final_get_response.status_code == 200
+        assert final_get_response.json()["status"] == "cancelled"
 
     def test_multiple_orders_different_delivery_fees(self):
         """Test de plusieurs commandes avec différents frais de livraison"""
@@ -0,0 +1,116 @@
+"""
+Tests pour les requêtes conditionnelles (ETag) et le long-polling du statut
+"""
+
+import threading
+import time
+from fastapi.testclient import TestClient
+from src.etags import etag_matches, make_etag
+from src.main import app, inventory, orders_db
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+
+class TestEtagMatching:
+    """Tests pour la comparaison If-None-Match"""
+
+    def test_matches(self):
+        """Liste d'ETags, ETags faibles et joker"""
+        etag = make_etag(42, 7)
+        assert etag == '"42-7"'
+        assert etag_matches('"1-1", W/"42-7"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"42-8"', etag)
+        assert not etag_matches(None, etag)
+
+
+class TestConditionalGet:
+    """Tests pour les réponses 304"""
+
+    def setup_method(self):
+        """Réinitialise commandes et inventaire"""
+        orders_db.clear()
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def revalidate(self, path: str):
+        """Premier GET puis GET conditionnel avec l'ETag reçu"""
+        first = client.get(path)
+        assert first.status_code == 200
+        return first, client.get(path, headers={"If-None-Match": first.headers["etag"]})
+
+    def test_static_menus(self):
+        """Menus inchangés: 304 sans corps"""
+        for path in ["/pizzas/menu", "/topping/menu"]:
+            _, second = self.revalidate(path)
+            assert second.status_code == 304
+            assert second.content == b""
+
+    def test_inventory_version(self):
+        """L'ETag de l'inventaire change avec le stock"""
+        first, second = self.revalidate("/inventory")
+        assert second.status_code == 304
+
+        client.post("/inventory/ingredients/olives/add?quantity=1")
+        third = client.get("/inventory", headers={"If-None-Match": first.headers["etag"]})
+        assert third.status_code == 200
+        assert third.headers["etag"] != first.headers["etag"]
+
+    def test_menu_version_follows_availability(self):
+        """L'ETag du menu change quand une disponibilité change"""
+        first = client.get("/pizzas/menu")
+        inventory.ingredients["basilic"] = 0
+
+        second = client.get("/pizzas/menu", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+
+    def test_order_status_version(self):
+        """Le statut d'une commande est revalidé jusqu'à sa prochaine transition"""
+        order = make_order(orders_db.next_order_id())
+        orders_db.add(order)
+        path = f"/orders/{order.order_id}/status"
+
+        first, second = self.revalidate(path)
+        assert second.status_code == 304
+
+        client.post(f"/admin/orders/{order.order_id}/start")
+        third = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+        assert third.status_code == 200
+        assert third.json()["status"] == "preparing"
+
+
+class TestStatusLongPolling:
+    """Tests pour GET /orders/{order_id}/status?wait="""
+
+    def setup_method(self):
+        """Vide le dépôt avant chaque test"""
+        orders_db.clear()
+        self.order = make_order(orders_db.next_order_id())
+        orders_db.add(self.order)
+        self.path = f"/orders/{self.order.order_id}/status"
+        self.etag = client.get(self.path).headers["etag"]
+
+    def test_wakes_up_on_transition(self):
+        """La requête en attente répond dès la transition de la commande"""
+        def start_later():
+            time.sleep(0.2)
+            client.post(f"/admin/orders/{self.order.order_id}/start")
+
+        thread = threading.Thread(target=start_later)
+        thread.start()
+        started = time.monotonic()
+        response = client.get(self.path, params={"wait": 10}, headers={"If-None-Match": self.etag})
+        thread.join()
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "preparing"
+        assert time.monotonic() - started < 5
+
+    def test_timeout_returns_not_modified(self):
+        """Sans modification: 304 à l'expiration du délai"""
+        response = client.get(self.path, params={"wait": 0.1}, headers={"If-None-Match": self.etag})
+        assert response.status_code == 304
+
+    def test_wait_bounds(self):
+        """wait hors bornes: 400"""
+        assert client.get(self.path, params={"wait": 3600}).status_code == 400
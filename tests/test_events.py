@@ -0,0 +1,213 @@
+"""
+Tests pour le bus d'événements et le flux SSE du dashboard vendeur
+"""
+
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from src.events import ORDER_CANCELLED, ORDER_STATUS, ORDER_STATUS_CHANGED, EventBus, iter_sse, order_topic
+from src.models import OrderStatus
+from src.main import app, event_bus, orders_db
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+
+def parse_sse(message: str) -> dict:
+    """Décode un message SSE en dictionnaire {champ: valeur}"""
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+class TestEventBus:
+    """Tests pour la publication et l'abonnement"""
+
+    def test_publish_to_subscribers(self):
+        """Chaque abonné reçoit les événements publiés, avec des identifiants croissants"""
+        async def scenario():
+            bus = EventBus()
+            first, second = bus.subscribe(), bus.subscribe()
+            bus.publish("order_created", {"order_id": 1})
+            bus.publish("order_created", {"order_id": 2})
+            return [await first.get(), await first.get(), await second.get()]
+
+        first_event, second_event, other = asyncio.run(scenario())
+        assert first_event.id < second_event.id
+        assert other.data == {"order_id": 1}
+        assert parse_sse(first_event.message) == {"id": str(first_event.id), "event": "order_created", "data": {"order_id": 1}}
+
+    def test_publish_from_thread(self):
+        """Les endpoints synchrones publient depuis le pool de threads"""
+        async def scenario():
+            bus = EventBus()
+            subscription = bus.subscribe()
+            await asyncio.to_thread(bus.publish, "order_created", {"order_id": 7})
+            return await asyncio.wait_for(subscription.get(), 1)
+
+        assert asyncio.run(scenario()).data == {"order_id": 7}
+
+    def test_unsubscribe(self):
+        """Un abonné retiré ne reçoit plus rien"""
+        async def scenario():
+            bus = EventBus()
+            subscription = bus.subscribe()
+            bus.unsubscribe(subscription)
+            bus.publish("order_created", {})
+            return bus.subscriber_count()
+
+        assert asyncio.run(scenario()) == 0
+
+    def test_topics_are_isolated(self):
+        """Un événement publié sur un sujet n'atteint que ses abonnés; sans abonné rien n'est encodé"""
+        async def scenario():
+            bus = EventBus()
+            watcher, other, dashboard = bus.subscribe(order_topic(1)), bus.subscribe(order_topic(2)), bus.subscribe()
+            event = bus.publish(ORDER_STATUS, {"order_id": 1}, order_topic(1))
+            await asyncio.sleep(0)
+            return event, await watcher.get(), other, dashboard, bus.publish(ORDER_STATUS, {}, order_topic(3))
+
+        event, received, other, dashboard, unheard = asyncio.run(scenario())
+        assert received.id == event.id
+        assert other._queue.empty() and dashboard._queue.empty()
+        assert unheard is None
+
+
+class TestSSEStream:
+    """Tests pour le flux SSE d'un abonné"""
+
+    def collect(self, bus_actions, max_messages, maxsize=10, heartbeat=0.01):
+        """Exécute les publications puis lit jusqu'à max_messages messages du flux"""
+        async def scenario():
+            bus = EventBus()
+            subscription = bus.subscribe(maxsize=maxsize)
+            bus_actions(bus)
+            await asyncio.sleep(0)
+            messages = []
+
+            async def is_disconnected():
+                return len(messages) >= max_messages
+
+            async for message in iter_sse(subscription, is_disconnected, heartbeat):
+                messages.append(message)
+            return messages
+
+        return asyncio.run(scenario())
+
+    def test_stream_events_and_heartbeat(self):
+        """Le flux commence par retry, envoie les événements puis des commentaires de maintien"""
+        messages = self.collect(lambda bus: bus.publish("order_created", {"order_id": 1}), 3)
+
+        assert messages[0].startswith("retry:")
+        assert parse_sse(messages[1])["data"] == {"order_id": 1}
+        assert messages[2] == ": keepalive\n\n"
+
+    def test_overflow_sends_resync(self):
+        """Un abonné qui a perdu des événements reçoit resync"""
+        def flood(bus):
+            for order_id in range(5):
+                bus.publish("order_created", {"order_id": order_id})
+
+        messages = self.collect(flood, 2, maxsize=2)
+        assert "event: resync" in messages[1]
+
+    def test_upstream_loss_sends_resync(self):
+        """Événement abandonné en amont (bus de fond plein): chaque abonné reçoit resync sans attendre"""
+        messages = self.collect(lambda bus: bus.overflow_all(), 2, heartbeat=5)
+        assert "event: resync" in messages[1]
+
+    def test_stream_ends_on_final_event(self):
+        """Le flux s'arrête après l'événement final"""
+        async def scenario():
+            bus = EventBus()
+            subscription = bus.subscribe()
+            bus.publish(ORDER_STATUS, {"status": "delivered"})
+
+            async def is_disconnected():
+                return False
+
+            return [message async for message in iter_sse(subscription, is_disconnected, 1, lambda event: True)]
+
+        messages = asyncio.run(scenario())
+        assert len(messages) == 2
+        assert parse_sse(messages[1])["data"] == {"status": "delivered"}
+
+
+class TestOrderEvents:
+    """Tests pour les événements publiés par les endpoints"""
+
+    def setup_method(self):
+        """Vide le dépôt avant chaque test"""
+        orders_db.clear()
+
+    def test_transition_and_cancellation_events(self):
+        """Changement de statut et annulation publient un événement avec les compteurs"""
+        order = make_order(orders_db.next_order_id())
+        orders_db.add(order)
+
+        async def scenario():
+            subscription = event_bus.subscribe()
+            try:
+                await asyncio.to_thread(client.post, f"/admin/orders/{order.order_id}/start")
+                await asyncio.to_thread(client.delete, f"/orders/{order.order_id}")
+                return [await asyncio.wait_for(subscription.get(), 1) for _ in range(2)]
+            finally:
+                event_bus.unsubscribe(subscription)
+
+        changed, cancelled = asyncio.run(scenario())
+        assert changed.type == ORDER_STATUS_CHANGED
+        assert changed.data["order"]["status"] == "preparing"
+        assert changed.data["previous_status"] == "pending"
+        assert changed.data["counts"]["preparing"] == 1
+        assert cancelled.type == ORDER_CANCELLED
+        assert cancelled.data["order_id"] == order.order_id
+        assert cancelled.data["counts"]["preparing"] == 0
+
+
+class TestOrderStatusStream:
+    """Tests pour le suivi d'une commande par le client (GET /orders/{order_id}/status/stream)"""
+
+    def setup_method(self):
+        """Vide le dépôt avant chaque test"""
+        orders_db.clear()
+
+    def test_unknown_order(self):
+        """Commande inconnue: 404, aucun abonné laissé derrière"""
+        assert client.get("/orders/999999/status/stream").status_code == 404
+        assert event_bus.subscriber_count(order_topic(999999)) == 0
+
+    def test_final_order_gets_snapshot_only(self):
+        """Commande livrée: le flux envoie le statut actuel puis se termine"""
+        order = make_order(orders_db.next_order_id())
+        order.status = OrderStatus.DELIVERED
+        orders_db.add(order)
+
+        response = client.get(f"/orders/{order.order_id}/status/stream")
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        [message] = [parse_sse(chunk) for chunk in response.text.split("\n\n") if chunk]
+        assert message["event"] == ORDER_STATUS
+        assert message["data"]["status_label"] == "Livrée"
+        assert event_bus.subscriber_count(order_topic(order.order_id)) == 0
+
+    def test_transitions_pushed_to_watchers(self):
+        """Chaque transition et l'annulation sont poussées aux clients qui suivent la commande"""
+        order = make_order(orders_db.next_order_id())
+        orders_db.add(order)
+
+        async def scenario():
+            subscription = event_bus.subscribe(order_topic(order.order_id))
+            try:
+                await asyncio.to_thread(client.post, f"/admin/orders/{order.order_id}/start")
+                await asyncio.to_thread(client.delete, f"/orders/{order.order_id}")
+                return [await asyncio.wait_for(subscription.get(), 1) for _ in range(2)]
+            finally:
+                event_bus.unsubscribe(subscription)
+
+        started, cancelled = asyncio.run(scenario())
+        assert started.type == ORDER_STATUS
+        assert started.data["status"] == "preparing"
+        assert started.data["progress_percent"] == 25
+        assert started.data["status_label"] == "En cours de préparation"
+        assert cancelled.data["status"] == "cancelled"
+        assert cancelled.data["status_label"] == "Annulée"
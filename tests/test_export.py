@@ -0,0 +1,87 @@
+"""
+Tests pour l'export en flux des commandes
+"""
+
+import csv
+import io
+import json
+from fastapi.testclient import TestClient
+from datetime import timedelta
+from main import app, orders_db
+from src.archive import OrderArchive
+from src.export import iter_orders
+from src.repository import OrderRepository
+from tests.fixtures import make_order
+
+
+client = TestClient(app)
+
+
+class TestIterOrders:
+    """Tests pour la lecture par lots"""
+
+    def test_reads_all_batches(self):
+        """Tous les lots sont lus, dans l'ordre, sans doublon"""
+        repository = OrderRepository()
+        for _ in range(7):
+            repository.add(make_order(repository.next_order_id()))
+
+        ids = [order.order_id for order in iter_orders(repository, batch_size=3)]
+        assert ids == list(range(1, 8))
+
+    def test_resume_after_cursor(self):
+        """Un export reprend après le dernier identifiant reçu"""
+        repository = OrderRepository()
+        for _ in range(5):
+            repository.add(make_order(repository.next_order_id()))
+
+        ids = [order.order_id for order in iter_orders(repository, after=3, batch_size=2)]
+        assert ids == [4, 5]
+
+    def test_includes_archive(self, tmp_path):
+        """Les commandes archivées sont fusionnées dans l'ordre; une commande présente des deux côtés est écrite une fois"""
+        repository = OrderRepository()
+        archive = OrderArchive(str(tmp_path))
+        orders = [make_order(order_id) for order_id in range(1, 7)]
+        for order in orders:
+            order.created_at -= timedelta(days=2)
+        repository.add_many([orders[0], orders[2], orders[4]])
+        archive.append([orders[1], orders[2], orders[3], orders[5]])
+
+        ids = [order.order_id for order in iter_orders(repository, batch_size=2, archive=archive)]
+        assert ids == [1, 2, 3, 4, 5, 6]
+        assert [order.order_id for order in iter_orders(repository, after=4, archive=archive)] == [5, 6]
+
+
+class TestExportEndpoint:
+    """Tests pour GET /orders/export"""
+
+    def setup_method(self):
+        orders_db.clear()
+        for _ in range(3):
+            orders_db.add(make_order(orders_db.next_order_id()))
+
+    def teardown_method(self):
+        orders_db.clear()
+
+    def test_export_ndjson(self):
+        """Une ligne JSON par commande"""
+        response = client.get("/orders/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 3
+        assert lines[0]["customer_name"] == "Jean Dupont"
+
+    def test_export_csv(self):
+        """En-tête puis une ligne par commande"""
+        response = client.get("/orders/export?format=csv")
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 3
+        assert rows[0]["pizzas"] == "Margherita (medium)"
+
+    def test_export_unknown_format(self):
+        """Un format inconnu est refusé"""
+        response = client.get("/orders/export?format=xml")
+        assert response.status_code == 400
@@ -0,0 +1,155 @@
+"""
+Tests pour les clés d'idempotence de POST /orders
+"""
+
+import json
+import uuid
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from src.db import SQLiteIdempotencyStore
+from src.idempotency import (
+    IN_PROGRESS, MISMATCH, NEW, REPLAY, IdempotencyMiddleware, IdempotencyStore, request_fingerprint,
+)
+from src.main import app, idempotency_store, inventory
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    """Fabrique de stores, en mémoire et SQLite"""
+    def factory(**kwargs):
+        if request.param == "memory":
+            return IdempotencyStore(**kwargs)
+        store = SQLiteIdempotencyStore(str(tmp_path / "orders.db"), **kwargs)
+        store.PURGE_EVERY = 1
+        return store
+    return factory
+
+
+class TestIdempotencyStore:
+    """Tests pour la réservation et le rejeu des clés"""
+
+    def test_reserve_complete_replay(self, make_store):
+        """Une clé réservée est en cours, puis rejoue la réponse enregistrée"""
+        store = make_store()
+        assert store.begin("k1", "f1") == (NEW, None)
+        assert store.begin("k1", "f1") == (IN_PROGRESS, None)
+
+        store.complete("k1", 201, b'{"order_id": 1}')
+        assert store.begin("k1", "f1") == (REPLAY, (201, b'{"order_id": 1}'))
+
+    def test_fingerprint_mismatch(self, make_store):
+        """Une clé réutilisée pour une autre requête est refusée"""
+        store = make_store()
+        store.begin("k1", "f1")
+        assert store.begin("k1", "f2") == (MISMATCH, None)
+
+    def test_release_allows_retry(self, make_store):
+        """Une clé libérée (requête échouée) peut être réutilisée"""
+        store = make_store()
+        store.begin("k1", "f1")
+        store.release("k1")
+        assert store.begin("k1", "f1") == (NEW, None)
+
+    def test_expired_keys(self, make_store):
+        """Les clés expirent après le TTL; une requête en cours abandonnée est reprise"""
+        store = make_store(ttl_seconds=100, pending_timeout=10)
+        store.begin("done", "f", now=1000.0)
+        store.complete("done", 201, b"{}")
+        store.begin("stuck", "f", now=1000.0)
+
+        assert store.begin("stuck", "f", now=1020.0) == (NEW, None)
+        assert store.begin("done", "f", now=1050.0)[0] == REPLAY
+        assert store.begin("done", "f", now=1200.0) == (NEW, None)
+
+    def test_bounded_size(self, make_store):
+        """Le nombre de clés conservées est borné"""
+        store = make_store(max_keys=3)
+        for i in range(10):
+            store.begin(f"k{i}", "f", now=1000.0 + i)
+        assert len(store) <= 3
+        assert store.begin("k9", "f", now=1010.0) == (IN_PROGRESS, None)
+
+    def test_shared_between_instances(self, tmp_path):
+        """Deux stores SQLite sur la même base (deux workers) partagent les clés"""
+        path = str(tmp_path / "orders.db")
+        first, second = SQLiteIdempotencyStore(path), SQLiteIdempotencyStore(path)
+
+        first.begin("k1", "f1")
+        first.complete("k1", 201, b"{}")
+        assert second.begin("k1", "f1") == (REPLAY, (201, b"{}"))
+
+
+class TestIdempotencyMiddleware:
+    """Tests pour le middleware sur une application minimale"""
+
+    @pytest.fixture
+    def client(self):
+        """Application dont l'endpoint compte ses exécutions"""
+        app = FastAPI()
+        app.state.calls = 0
+
+        @app.post("/orders", status_code=201)
+        def create(payload: dict) -> dict:
+            if payload.get("fail"):
+                raise HTTPException(status_code=409, detail="Rupture de stock")
+            app.state.calls += 1
+            return {"order_id": app.state.calls}
+
+        app.add_middleware(IdempotencyMiddleware, store=IdempotencyStore(), paths=["/orders"])
+        return TestClient(app)
+
+    def test_replay_returns_original_response(self, client):
+        """Une requête réessayée avec la même clé n'est pas exécutée à nouveau"""
+        headers = {"Idempotency-Key": "abc"}
+        first = client.post("/orders", json={"pizza": "Reine"}, headers=headers)
+        second = client.post("/orders", json={"pizza": "Reine"}, headers=headers)
+
+        assert first.status_code == second.status_code == 201
+        assert second.json() == first.json() == {"order_id": 1}
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert client.app.state.calls == 1
+
+    def test_same_key_different_body(self, client):
+        """La même clé avec un autre corps est refusée (422)"""
+        client.post("/orders", json={"pizza": "Reine"}, headers={"Idempotency-Key": "abc"})
+        response = client.post("/orders", json={"pizza": "Margherita"}, headers={"Idempotency-Key": "abc"})
+
+        assert response.status_code == 422
+        assert client.app.state.calls == 1
+
+    def test_error_response_is_not_stored(self, client):
+        """Une erreur libère la clé: le réessai est exécuté"""
+        headers = {"Idempotency-Key": "abc"}
+        assert client.post("/orders", json={"fail": True}, headers=headers).status_code == 409
+        response = client.post("/orders", json={"fail": True}, headers=headers)
+
+        assert response.status_code == 409
+        assert "Idempotent-Replayed" not in response.headers
+
+    def test_without_key(self, client):
+        """Sans en-tête, chaque requête est exécutée"""
+        client.post("/orders", json={"pizza": "Reine"})
+        client.post("/orders", json={"pizza": "Reine"})
+        assert client.app.state.calls == 2
+
+
+class TestCreateOrderIdempotency:
+    """Tests sur POST /orders de l'application"""
+
+    def test_replay_skips_validation_and_inventory(self):
+        """Une réponse rejouée ne revalide pas l'adresse et ne touche pas à l'inventaire"""
+        body = json.dumps({"pizzas": [{"name": "Margherita", "size": "medium"}], "customer_name": "Jean"}).encode()
+        key = str(uuid.uuid4())
+        idempotency_store.begin(key, request_fingerprint("POST", "/orders", body))
+        idempotency_store.complete(key, 201, b'{"order_id": 42}')
+        stock_before = dict(inventory.ingredients)
+
+        response = TestClient(app).post(
+            "/orders", content=body, headers={"Idempotency-Key": key, "Content-Type": "application/json"}
+        )
+
+        assert response.status_code == 201
+        assert response.json() == {"order_id": 42}
+        assert dict(inventory.ingredients) == stock_before
@@ -0,0 +1,214 @@
+"""
+Tests pour l'ordonnancement de la cuisine (file, fournées, délais estimés)
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from src.kitchen import FenwickTree, KitchenScheduler
+from src.main import app, kitchen, orders_db
+from src.models import OrderStatus
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+
+def order_with_pizzas(order_id: int, pizzas: int):
+    """Commande en attente de `pizzas` pizzas"""
+    order = make_order(order_id)
+    order.pizzas = order.pizzas * pizzas
+    return order
+
+
+class TestFenwickTree:
+    """Tests pour l'arbre de Fenwick extensible"""
+
+    def test_prefix_sums_match_brute_force(self):
+        """Sommes préfixes exactes après ajouts et mises à jour aléatoires"""
+        rng = random.Random(7)
+        tree = FenwickTree()
+        values = []
+        for _ in range(200):
+            values.append(rng.randint(0, 5))
+            assert tree.append(values[-1]) == len(values)
+            index = rng.randint(1, len(values))
+            delta = rng.randint(-2, 2)
+            values[index - 1] += delta
+            tree.add(index, delta)
+        for index in range(len(values) + 1):
+            assert tree.prefix_sum(index) == sum(values[:index])
+
+
+class TestKitchenScheduler:
+    """Tests pour KitchenScheduler"""
+
+    def setup_method(self):
+        """Four de 4 emplacements, 2 postes, 10 minutes par fournée"""
+        self.kitchen = KitchenScheduler(oven_slots=4, prep_stations=2, prep_minutes=10)
+
+    def test_eta_follows_queue_depth(self):
+        """Le délai d'une commande dépend des pizzas devant elle dans la file"""
+        for order_id in range(1, 5):
+            self.kitchen.enqueue(order_with_pizzas(order_id, 2))
+
+        assert [self.kitchen.ready_in_minutes(order_id) for order_id in range(1, 5)] == [10, 10, 20, 20]
+        assert self.kitchen.ready_in_minutes(99) is None
+
+    def test_cancel_and_start_update_eta(self):
+        """Annuler ou démarrer une commande avance les suivantes"""
+        for order_id in range(1, 4):
+            self.kitchen.enqueue(order_with_pizzas(order_id, 3))
+        assert self.kitchen.ready_in_minutes(3) == 30
+
+        self.kitchen.remove(1)
+        assert self.kitchen.ready_in_minutes(3) == 20
+
+        started = order_with_pizzas(2, 3)
+        started.status = OrderStatus.PREPARING
+        started.started_at = datetime.now()
+        self.kitchen.on_transition(started, OrderStatus.PENDING)
+        # 3 pizzas au four + 3 en attente: deux fournées
+        assert self.kitchen.ready_in_minutes(3) == 20
+        assert self.kitchen.stats()["busy_slots"] == 3
+
+    def test_suggest_batch(self):
+        """Fournée: tête de file, un poste par commande, dans les emplacements libres"""
+        self.kitchen.enqueue(order_with_pizzas(1, 1))
+        self.kitchen.enqueue(order_with_pizzas(2, 2))
+        self.kitchen.enqueue(order_with_pizzas(3, 1))
+        assert self.kitchen.suggest_batch() == [1, 2]
+
+        self.kitchen.remove(1)
+        self.kitchen.enqueue(order_with_pizzas(4, 4))
+        # 2 + 1 pizzas tiennent; la commande de 4 pizzas attend la fournée suivante
+        assert self.kitchen.suggest_batch() == [2, 3]
+
+    def test_large_order_not_starved(self):
+        """Four vide: une commande plus grande que le four part quand même"""
+        self.kitchen.enqueue(order_with_pizzas(1, 6))
+        self.kitchen.enqueue(order_with_pizzas(2, 1))
+        assert self.kitchen.suggest_batch() == [1]
+
+    def test_measured_prep_time(self):
+        """La durée mesurée entre démarrage et sortie du four ajuste les estimations"""
+        order = order_with_pizzas(1, 1)
+        order.status = OrderStatus.PREPARING
+        order.started_at = datetime.now() - timedelta(minutes=20)
+        self.kitchen.on_transition(order, OrderStatus.PENDING)
+        order.status = OrderStatus.READY_FOR_DELIVERY
+        order.ready_at = datetime.now()
+        self.kitchen.on_transition(order, OrderStatus.PREPARING)
+
+        assert round(self.kitchen.prep_minutes, 1) == 12.0
+        assert self.kitchen.stats()["busy_slots"] == 0
+
+    def test_compaction_keeps_order(self):
+        """Après renumérotation des rangs, file et délais sont inchangés"""
+        for order_id in range(1, 3001):
+            self.kitchen.enqueue(order_with_pizzas(order_id, 1))
+        for order_id in range(1, 2990):
+            self.kitchen.remove(order_id)
+
+        assert self.kitchen.ready_in_minutes(2994) == 20
+        assert self.kitchen.suggest_batch() == [2990, 2991]
+
+    def test_listeners_notified(self):
+        """Les abonnés sont prévenus à chaque modification de la file ou du four, pas sans modification"""
+        notifications = []
+        self.kitchen.add_listener(lambda: notifications.append(1))
+        order = order_with_pizzas(1, 1)
+        self.kitchen.enqueue(order)
+        order.status = OrderStatus.PREPARING
+        order.started_at = datetime.now()
+        self.kitchen.on_transition(order, OrderStatus.PENDING)
+        self.kitchen.remove(1)
+        self.kitchen.remove(1)
+        self.kitchen.finish(order)
+
+        assert len(notifications) == 3
+
+
+class TestKitchenEndpoints:
+    """Tests pour GET /admin/kitchen et les délais renvoyés au client"""
+
+    def setup_method(self):
+        """Vide le dépôt et la cuisine"""
+        orders_db.clear()
+        kitchen.clear()
+
+    def add_order(self, pizzas: int = 1):
+        order = order_with_pizzas(orders_db.next_order_id(), pizzas)
+        orders_db.add(order)
+        kitchen.enqueue(order)
+        return order
+
+    def test_kitchen_state(self):
+        """File, emplacements et prochaine fournée"""
+        first, second = self.add_order(), self.add_order()
+        client.post(f"/admin/orders/{first.order_id}/start")
+
+        data = client.get("/admin/kitchen").json()
+        assert data["pending_orders"] == 1
+        assert data["preparing_orders"] == 1
+        assert data["busy_slots"] == 1
+        assert [item["order_id"] for item in data["next_batch"]] == [second.order_id]
+
+    def test_status_uses_kitchen_eta(self):
+        """Le délai affiché au client vient de la file de la cuisine"""
+        order = self.add_order()
+        expected = kitchen.estimated_delivery_minutes(order.order_id)
+
+        data = client.get(f"/orders/{order.order_id}/status").json()
+        assert data["estimated_delivery_minutes"] == expected
+
+    def test_summaries_use_kitchen_eta(self):
+        """Détail, liste et dashboard: délai de la cuisine; hors cuisine, aucun délai figé"""
+        order = self.add_order()
+        expected = kitchen.estimated_delivery_minutes(order.order_id)
+        outside = make_order(orders_db.next_order_id())
+        orders_db.add(outside)
+
+        assert client.get(f"/orders/{order.order_id}").json()["estimated_delivery_minutes"] == expected
+        assert client.get("/orders").json()[0]["estimated_delivery_minutes"] == expected
+        pending = client.get("/admin/orders").json()["orders_by_status"]["pending"]
+        assert {item["order_id"]: item["estimated_delivery_minutes"] for item in pending} == {
+            order.order_id: expected,
+            outside.order_id: None,
+        }
+        assert client.get(f"/orders/{outside.order_id}").json()["estimated_delivery_minutes"] is None
+
+    def test_status_etag_follows_queue(self):
+        """Le délai change quand la file avance: l'ETag du statut aussi"""
+        ahead = self.add_order(pizzas=6)
+        order = self.add_order()
+        path = f"/orders/{order.order_id}/status"
+        first = client.get(path)
+        assert client.get(path, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+        kitchen.remove(ahead.order_id)
+        second = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+
+        assert second.status_code == 200
+        assert second.json()["estimated_delivery_minutes"] < first.json()["estimated_delivery_minutes"]
+
+    def test_long_poll_wakes_on_queue_change(self):
+        """Une requête en attente sur le statut répond dès que la file devant la commande avance"""
+        ahead = self.add_order(pizzas=6)
+        order = self.add_order()
+        path = f"/orders/{order.order_id}/status"
+        etag = client.get(path).headers["etag"]
+
+        def remove_later():
+            time.sleep(0.2)
+            kitchen.remove(ahead.order_id)
+
+        thread = threading.Thread(target=remove_later)
+        thread.start()
+        started = time.monotonic()
+        response = client.get(path, params={"wait": 10}, headers={"If-None-Match": etag})
+        thread.join()
+
+        assert response.status_code == 200
+        assert time.monotonic() - started < 5
@@ -0,0 +1,129 @@
+"""
+Tests pour les verrous d'ingrédients (verrous par bandes) et les réservations concurrentes
+"""
+
+import asyncio
+import threading
+from src.async_store import AsyncInventory, DatabaseExecutor
+from src.locks import StripedLocks
+from src.models import InventoryManager, PizzaCreate
+from tests.fixtures import make_order
+
+
+class TestStripedLocks:
+    """Tests pour StripedLocks"""
+
+    def test_canonical_order(self):
+        """Les bandes sont prises par ordre croissant, sans doublon"""
+        locks = StripedLocks(["c", "a", "b"], stripes=2)
+        assert locks.stripes_for(["c", "a", "b", "a", "inconnu"]) == [0, 1]
+        assert locks.stripes_for(["b"]) == [1]
+
+    def test_unknown_key_is_locked(self):
+        """Une clé hors de l'index a toujours la même bande: elle est protégée comme les autres"""
+        locks = StripedLocks(["a"], stripes=8)
+        stripe = locks.stripe("truffe")
+        assert locks.stripes_for(["truffe"]) == [stripe] == [StripedLocks([], stripes=8).stripe("truffe")]
+
+        acquired = threading.Event()
+
+        def hold_truffe():
+            with locks.acquire(["truffe"]):
+                acquired.set()
+
+        with locks.acquire(["truffe"]):
+            thread = threading.Thread(target=hold_truffe)
+            thread.start()
+            assert not acquired.wait(0.1)
+        assert acquired.wait(1)
+        thread.join()
+
+    def test_disjoint_keys_in_parallel(self):
+        """Des clés de bandes différentes sont tenues en même temps"""
+        locks = StripedLocks(["a", "b"], stripes=2)
+        acquired = threading.Event()
+
+        def hold_b():
+            with locks.acquire(["b"]):
+                acquired.set()
+
+        with locks.acquire(["a"]):
+            thread = threading.Thread(target=hold_b)
+            thread.start()
+            assert acquired.wait(1)
+        thread.join()
+
+    def test_shared_key_excludes(self):
+        """Une clé commune fait attendre le second appelant"""
+        locks = StripedLocks(["a", "b"], stripes=2)
+        acquired = threading.Event()
+
+        def hold_a_and_b():
+            with locks.acquire(["b", "a"]):
+                acquired.set()
+
+        with locks.acquire(["a"]):
+            thread = threading.Thread(target=hold_a_and_b)
+            thread.start()
+            assert not acquired.wait(0.1)
+        assert acquired.wait(1)
+        thread.join()
+
+    def test_opposite_orders_do_not_deadlock(self):
+        """Ensembles de clés demandés dans des ordres opposés: pas d'interblocage"""
+        locks = StripedLocks(["a", "b", "c"])
+
+        def worker(keys):
+            for _ in range(2000):
+                with locks.acquire(keys):
+                    pass
+
+        threads = [threading.Thread(target=worker, args=(keys,)) for keys in (["a", "b", "c"], ["c", "b", "a"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert not any(thread.is_alive() for thread in threads)
+
+
+class TestConcurrentReservations:
+    """Tests pour les réservations de AsyncInventory sous verrous d'ingrédients"""
+
+    def test_no_oversell(self):
+        """Réservations concurrentes sur un stock limité: jamais plus que le stock"""
+        inventory = InventoryManager()
+        inventory.ingredients["basilic"] = 10
+        async_inventory = AsyncInventory(inventory, DatabaseExecutor(max_workers=8))
+        order = make_order(1)
+        pizza_creates = [PizzaCreate(name=pizza.name, size=pizza.size, toppings=pizza.toppings) for pizza in order.pizzas]
+
+        async def scenario():
+            return await asyncio.gather(*(
+                async_inventory.reserve_order(pizza_creates, order.pizzas) for _ in range(50)
+            ))
+
+        results = asyncio.run(scenario())
+        assert results.count(None) == 10
+        assert inventory.ingredients["basilic"] == 0
+        assert inventory.ingredients["pate"] == inventory.AVAILABLE_INGREDIENTS["pate"] - 10
+
+    def test_order_quantities_are_cumulated(self):
+        """Trois pizzas avec une seule pâte en stock: la commande est refusée, rien n'est réservé"""
+        inventory = InventoryManager()
+        inventory.ingredients["pate"] = 1
+        async_inventory = AsyncInventory(inventory, DatabaseExecutor(max_workers=1))
+        order = make_order(1)
+        pizza = order.pizzas[0]
+        pizza_creates = [PizzaCreate(name=pizza.name, size=pizza.size, toppings=pizza.toppings)] * 3
+
+        error = asyncio.run(async_inventory.reserve_order(pizza_creates, order.pizzas * 3))
+        assert error == "La pâte est en rupture de stock"
+        assert inventory.ingredients["pate"] == 1
+
+    def test_restock(self):
+        """Réapprovisionnement: nouveau stock, None pour un ingrédient inconnu"""
+        inventory = InventoryManager()
+        async_inventory = AsyncInventory(inventory, DatabaseExecutor(max_workers=1))
+
+        assert asyncio.run(async_inventory.add_ingredient_stock("Olives", 5)) == inventory.AVAILABLE_INGREDIENTS["olives"] + 5
+        assert asyncio.run(async_inventory.add_ingredient_stock("truffe", 5)) is None
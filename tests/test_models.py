@@ -329,3 +329,31 @@ class TestOrder:
         )
         assert order.calculate_delivery_fee() == 0.0
         assert order.calculate_total() == 30.0
+
+
+class TestOrderSummaryCache:
+    """Tests pour le résumé mis en cache et les totaux figés"""
+
+    def test_summary_is_cached(self):
+        """Le résumé et son JSON ne sont construits qu'une fois"""
+        from tests.fixtures import make_order
+
+        order = make_order(1)
+        assert order.get_summary() is order.get_summary()
+        assert order.get_summary_json() is order.get_summary_json()
+        assert order.calculate_total() == 13.0
+
+    def test_invalidate_summary_after_transition(self):
+        """Une transition invalide le résumé en cache"""
+        import json
+        from src.models import OrderStatus
+        from tests.fixtures import make_order
+
+        order = make_order(1)
+        assert order.get_summary()["status"] == "pending"
+
+        order.status = OrderStatus.PREPARING
+        order.invalidate_summary()
+
+        assert order.get_summary()["status"] == "preparing"
+        assert json.loads(order.get_summary_json())["status"] == "preparing"
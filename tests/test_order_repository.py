@@ -0,0 +1,346 @@
+"""
+Tests pour les dépôts de commandes (mémoire et SQLite)
+"""
+
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from src.models import OrderStatus
+from src.repository import OrderRepository
+from src.db import SQLiteOrderRepository
+from tests.fixtures import make_order
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    """Dépôt vide pour chaque implémentation"""
+    if request.param == "memory":
+        return OrderRepository()
+    return SQLiteOrderRepository(str(tmp_path / "orders.db"))
+
+
+class TestOrderRepository:
+    """Tests communs aux implémentations du dépôt"""
+
+    def test_add_and_get(self, repository):
+        """Une commande ajoutée est retrouvée par son identifiant"""
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+
+        assert order.order_id in repository
+        assert repository[order.order_id].customer_name == "Jean Dupont"
+        assert len(repository) == 1
+
+    def test_ids_are_sequential(self, repository):
+        """La séquence d'identifiants est strictement croissante"""
+        ids = [repository.next_order_id() for _ in range(3)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == 3
+
+    def test_add_many(self, repository):
+        """Identifiants réservés en bloc, commandes ajoutées en une fois"""
+        first_id = repository.next_order_id()
+        ids = repository.next_order_ids(3)
+        repository.add_many([make_order(order_id) for order_id in ids])
+
+        assert list(ids) == [first_id + 1, first_id + 2, first_id + 3]
+        assert repository.next_order_id() == first_id + 4
+        assert len(repository) == 3
+        assert repository.count_by_status()["pending"] == 3
+
+    def test_pop_removes_order(self, repository):
+        """pop supprime la commande"""
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+
+        assert repository.pop(order.order_id).order_id == order.order_id
+        assert order.order_id not in repository
+        with pytest.raises(KeyError):
+            repository.pop(order.order_id)
+
+    def test_concurrent_remove_succeeds_once(self, repository):
+        """Suppressions concurrentes de la même commande: une seule la retourne"""
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+        barrier = threading.Barrier(8)
+
+        def remove():
+            barrier.wait()
+            return repository.remove(order.order_id)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            removed = [result for result in pool.map(lambda _: remove(), range(8)) if result is not None]
+
+        assert [result.order_id for result in removed] == [order.order_id]
+        assert len(repository) == 0
+        assert repository.count_by_status()["pending"] == 0
+
+    def test_values_ordered_by_id(self, repository):
+        """values() itère par identifiant croissant"""
+        for _ in range(3):
+            repository.add(make_order(repository.next_order_id()))
+        ids = [order.order_id for order in repository.values()]
+        assert ids == sorted(ids)
+
+
+class TestSQLiteOrderRepository:
+    """Tests spécifiques à la persistance SQLite"""
+
+    def test_orders_survive_restart(self, tmp_path):
+        """Les commandes et leur statut sont relus après redémarrage"""
+        db_path = str(tmp_path / "orders.db")
+        repository = SQLiteOrderRepository(db_path)
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+        order.status = OrderStatus.PREPARING
+        repository.save(order)
+
+        reloaded = SQLiteOrderRepository(db_path)
+        assert reloaded[order.order_id].status == OrderStatus.PREPARING
+        assert str(reloaded[order.order_id].customer_address) == "22 Rue Alsace-Lorraine, 31000 Toulouse"
+
+    def test_sequence_survives_restart(self, tmp_path):
+        """Les identifiants restent uniques après redémarrage"""
+        db_path = str(tmp_path / "orders.db")
+        first_id = SQLiteOrderRepository(db_path).next_order_id()
+        second_id = SQLiteOrderRepository(db_path).next_order_id()
+        assert second_id == first_id + 1
+
+    def test_remove_across_workers(self, tmp_path):
+        """Deux workers sur la même base: la commande n'est supprimée qu'une fois"""
+        db_path = str(tmp_path / "orders.db")
+        first = SQLiteOrderRepository(db_path)
+        order = make_order(first.next_order_id())
+        first.add(order)
+        second = SQLiteOrderRepository(db_path)
+
+        assert first.remove(order.order_id).order_id == order.order_id
+        assert second.remove(order.order_id) is None
+        assert len(first) == 0
+
+    def test_terminal_orders_leave_hot_cache(self, tmp_path):
+        """Les commandes livrées sont retirées du cache mais restent lisibles"""
+        repository = SQLiteOrderRepository(str(tmp_path / "orders.db"))
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+        order.status = OrderStatus.DELIVERED
+        repository.save(order)
+
+        assert order.order_id not in repository._orders
+        assert repository[order.order_id].status == OrderStatus.DELIVERED
+
+
+class TestStatusIndex:
+    """Tests pour les compteurs et index par statut"""
+
+    def test_counts_follow_transitions(self, repository):
+        """Les compteurs suivent ajout, changement de statut et suppression"""
+        first = make_order(repository.next_order_id())
+        second = make_order(repository.next_order_id())
+        repository.add(first)
+        repository.add(second)
+
+        first.status = OrderStatus.PREPARING
+        repository.save(first)
+        counts = repository.count_by_status()
+        assert counts["pending"] == 1
+        assert counts["preparing"] == 1
+
+        first.status = OrderStatus.READY_FOR_DELIVERY
+        repository.save(first)
+        first.status = OrderStatus.IN_DELIVERY
+        repository.save(first)
+        first.status = OrderStatus.DELIVERED
+        repository.save(first)
+        repository.save(first)  # Ré-enregistrer sans changement ne doit rien compter
+        repository.remove(second.order_id)
+
+        counts = repository.count_by_status()
+        assert counts["pending"] == 0
+        assert counts["preparing"] == 0
+        assert counts["delivered"] == 1
+        assert len(repository) == 1
+
+    def test_list_by_status_paginates(self, repository):
+        """Les colonnes actives sont paginées, plus anciennes d'abord"""
+        ids = []
+        for _ in range(5):
+            order = make_order(repository.next_order_id())
+            repository.add(order)
+            ids.append(order.order_id)
+
+        page = repository.list_by_status(OrderStatus.PENDING, offset=1, limit=2)
+        assert [order.order_id for order in page] == ids[1:3]
+
+    def test_terminal_column_newest_first(self, repository):
+        """Les colonnes finales retournent les plus récentes d'abord"""
+        ids = []
+        for _ in range(3):
+            order = make_order(repository.next_order_id())
+            order.status = OrderStatus.DELIVERED
+            repository.add(order)
+            ids.append(order.order_id)
+
+        page = repository.list_by_status(OrderStatus.DELIVERED, limit=2)
+        assert [order.order_id for order in page] == [ids[2], ids[1]]
+
+    def test_counts_reloaded_after_restart(self, tmp_path):
+        """Les compteurs SQLite sont reconstruits au démarrage"""
+        db_path = str(tmp_path / "orders.db")
+        repository = SQLiteOrderRepository(db_path)
+        delivered = make_order(repository.next_order_id())
+        delivered.status = OrderStatus.DELIVERED
+        repository.add(delivered)
+        repository.add(make_order(repository.next_order_id()))
+
+        counts = SQLiteOrderRepository(db_path).count_by_status()
+        assert counts["delivered"] == 1
+        assert counts["pending"] == 1
+
+
+class TestAdminDashboard:
+    """Tests pour GET /admin/orders"""
+
+    def test_dashboard_returns_counts_and_active_columns(self):
+        """Le dashboard retourne les compteurs et seulement les colonnes actives"""
+        from fastapi.testclient import TestClient
+        from main import app, orders_db
+
+        orders_db.clear()
+        pending = make_order(orders_db.next_order_id())
+        delivered = make_order(orders_db.next_order_id())
+        delivered.status = OrderStatus.DELIVERED
+        orders_db.add(pending)
+        orders_db.add(delivered)
+
+        client = TestClient(app)
+        data = client.get("/admin/orders").json()
+        assert data["total_orders"] == 2
+        assert data["counts"]["delivered"] == 1
+        assert "delivered" not in data["orders_by_status"]
+        assert [o["order_id"] for o in data["orders_by_status"]["pending"]] == [pending.order_id]
+
+        data = client.get("/admin/orders?status=delivered").json()
+        assert [o["order_id"] for o in data["orders_by_status"]["delivered"]] == [delivered.order_id]
+        orders_db.clear()
+
+
+class TestListOrders:
+    """Tests pour la pagination keyset et les filtres"""
+
+    def test_keyset_pagination(self, repository):
+        """Les pages s'enchaînent via le curseur sans doublon ni trou"""
+        ids = []
+        for _ in range(5):
+            order = make_order(repository.next_order_id())
+            repository.add(order)
+            ids.append(order.order_id)
+
+        first_page = repository.list_orders(limit=2)
+        second_page = repository.list_orders(after=first_page[-1].order_id, limit=2)
+        last_page = repository.list_orders(after=second_page[-1].order_id, limit=2)
+
+        seen = [order.order_id for order in first_page + second_page + last_page]
+        assert seen == ids
+
+    def test_filters(self, repository):
+        """Filtres par statut, date de création et client"""
+        alice = make_order(repository.next_order_id(), customer_name="Alice")
+        bob = make_order(repository.next_order_id(), customer_name="Bob")
+        bob.status = OrderStatus.DELIVERED
+        bob.created_at = alice.created_at + timedelta(hours=2)
+        repository.add(alice)
+        repository.add(bob)
+
+        assert [o.order_id for o in repository.list_orders(status=OrderStatus.DELIVERED)] == [bob.order_id]
+        assert [o.order_id for o in repository.list_orders(customer_key=alice.customer_key)] == [alice.order_id]
+        since = alice.created_at + timedelta(hours=1)
+        assert [o.order_id for o in repository.list_orders(since=since)] == [bob.order_id]
+        assert [o.order_id for o in repository.list_orders(until=since)] == [alice.order_id]
+
+
+class TestTimeIndex:
+    """Tests pour les requêtes par intervalle de création"""
+
+    def add_orders_at(self, repository, hours_ago, status=OrderStatus.PENDING):
+        """Ajoute une commande créée il y a `hours_ago` heures"""
+        order = make_order(repository.next_order_id())
+        order.created_at = datetime.now() - timedelta(hours=hours_ago)
+        order.status = status
+        repository.add(order)
+        return order
+
+    def test_range_queries(self, repository):
+        """list_orders, count_by_status et list_by_status restreints à [since, until["""
+        old = self.add_orders_at(repository, 30)
+        cancelled_today = self.add_orders_at(repository, 2, OrderStatus.CANCELLED)
+        recent = self.add_orders_at(repository, 0.5)
+        last_hour = datetime.now() - timedelta(hours=1)
+        today = datetime.now() - timedelta(hours=24)
+
+        assert [o.order_id for o in repository.list_orders(since=last_hour)] == [recent.order_id]
+        assert [o.order_id for o in repository.list_orders(since=today)] == [cancelled_today.order_id, recent.order_id]
+        assert [o.order_id for o in repository.list_orders(until=today)] == [old.order_id]
+
+        counts = repository.count_by_status(since=today)
+        assert counts["cancelled"] == 1
+        assert counts["pending"] == 1
+        assert repository.count_by_status()["pending"] == 2
+
+        assert [o.order_id for o in repository.list_by_status(OrderStatus.PENDING, since=last_hour)] == [recent.order_id]
+        assert [s["order_id"] for s in repository.summaries_by_status(OrderStatus.CANCELLED, since=today)] == [cancelled_today.order_id]
+        assert repository.summaries_by_status(OrderStatus.PENDING, since=today, until=last_hour) == []
+
+    def test_index_follows_remove_and_save(self):
+        """L'index temporel suit les suppressions et les changements de date"""
+        repository = OrderRepository()
+        order = self.add_orders_at(repository, 5)
+        moved = self.add_orders_at(repository, 5)
+        since = datetime.now() - timedelta(hours=1)
+
+        moved.created_at = datetime.now()
+        repository.save(moved)
+        repository.remove(order.order_id)
+
+        assert [o.order_id for o in repository.list_orders(since=since)] == [moved.order_id]
+        assert repository.list_orders(until=since) == []
+
+    def test_admin_dashboard_range(self):
+        """GET /admin/orders?since= restreint colonnes et compteurs"""
+        from fastapi.testclient import TestClient
+        from main import app, orders_db
+
+        orders_db.clear()
+        self.add_orders_at(orders_db, 3)
+        recent = self.add_orders_at(orders_db, 0.25)
+        since = (datetime.now() - timedelta(hours=1)).isoformat()
+
+        data = TestClient(app).get("/admin/orders", params={"since": since}).json()
+        assert data["counts"]["pending"] == 1
+        assert [o["order_id"] for o in data["orders_by_status"]["pending"]] == [recent.order_id]
+        orders_db.clear()
+
+
+class TestOrdersEndpointPagination:
+    """Tests pour GET /orders pagine et projeté"""
+
+    def test_cursor_header_and_projection(self):
+        """X-Next-Cursor permet de lire la page suivante; fields réduit les résumés"""
+        from fastapi.testclient import TestClient
+        from main import app, orders_db
+
+        orders_db.clear()
+        for _ in range(3):
+            orders_db.add(make_order(orders_db.next_order_id()))
+
+        client = TestClient(app)
+        response = client.get("/orders?limit=2&fields=order_id,status")
+        assert response.status_code == 200
+        assert all(set(order) == {"order_id", "status"} for order in response.json())
+        cursor = response.headers["x-next-cursor"]
+
+        response = client.get(f"/orders?limit=2&after={cursor}")
+        assert len(response.json()) == 1
+        assert "x-next-cursor" not in response.headers
+        orders_db.clear()
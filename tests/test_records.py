@@ -0,0 +1,41 @@
+"""
+Tests pour la représentation compacte des commandes
+"""
+
+from src.models import OrderStatus
+from src.records import OrderRecord
+from tests.fixtures import make_order
+
+
+class TestOrderRecord:
+    """Tests pour OrderRecord"""
+
+    def test_round_trip(self):
+        """Encoder puis décoder une commande la restitue à l'identique"""
+        order = make_order(7)
+        order.status = OrderStatus.PREPARING
+
+        restored = OrderRecord.from_order(order).to_order()
+
+        assert restored.order_id == 7
+        assert restored.status == OrderStatus.PREPARING
+        assert restored.created_at == order.created_at
+        assert restored.started_at is None
+        assert restored.pizzas == order.pizzas
+        assert str(restored.customer_address) == str(order.customer_address)
+        assert restored.get_summary() == order.get_summary()
+
+    def test_identical_values_are_shared(self):
+        """Les pizzas, adresses et clients identiques partagent la même instance"""
+        first = OrderRecord.from_order(make_order(1))
+        second = OrderRecord.from_order(make_order(2))
+
+        assert first.pizzas[0] is second.pizzas[0]
+        assert first.address is second.address
+        assert first.customer_name is second.customer_name
+
+    def test_summary_cached_in_record(self):
+        """Le résumé est mis en cache dans l'enregistrement"""
+        record = OrderRecord.from_order(make_order(3))
+        assert record.get_summary() is record.get_summary()
+        assert record.get_summary_json() is record.get_summary_json()
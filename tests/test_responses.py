@@ -0,0 +1,86 @@
+"""
+Tests pour l'encodage JSON rapide et les corps pré-encodés
+"""
+
+import json
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from src import responses
+from src.main import app, inventory, orders_db
+from src.models import Ingredient, OrderStatus
+from src.responses import VersionedBody, dumps, encode_json
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+
+class TestEncoding:
+    """Tests pour dumps et encode_json"""
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_dumps(self, monkeypatch, use_orjson):
+        """Modèles Pydantic, dates et accents, avec ou sans orjson"""
+        if not use_orjson:
+            monkeypatch.setattr(responses, "orjson", None)
+        content = {
+            "ingredient": Ingredient(name="pate", quantity=3, is_base_ingredient=True),
+            "at": datetime(2026, 3, 1, 19, 0),
+            "nom": "Crème brûlée",
+        }
+        assert json.loads(dumps(content)) == {
+            "ingredient": {"name": "pate", "quantity": 3, "is_base_ingredient": True},
+            "at": "2026-03-01T19:00:00",
+            "nom": "Crème brûlée",
+        }
+
+    def test_encode_json_inserts_fragments(self):
+        """Les bytes sont insérés tels quels, le reste est encodé"""
+        body = encode_json({"orders": [b'{"order_id":1}', b'{"order_id":2}'], "limit": 50, "empty": []})
+        assert json.loads(body) == {"orders": [{"order_id": 1}, {"order_id": 2}], "limit": 50, "empty": []}
+
+    def test_versioned_body(self):
+        """Le corps n'est reconstruit que si la version change"""
+        builds = []
+        body = VersionedBody(lambda: builds.append(1) or {"n": len(builds)})
+
+        assert body.get(1) == body.get(1) == b'{"n":1}'
+        assert body.get(2) == b'{"n":2}'
+        assert len(builds) == 2
+
+    def test_summary_json_uses_dumps(self):
+        """Le résumé pré-encodé d'une commande passe par le même encodeur"""
+        order = make_order(1, customer_name="Hélène Crémieux")
+        assert order.get_summary_json() == dumps(order.get_summary())
+
+
+class TestPreEncodedEndpoints:
+    """Tests pour les endpoints servis depuis des corps pré-encodés"""
+
+    def setup_method(self):
+        orders_db.clear()
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def teardown_method(self):
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def test_inventory_follows_stock(self):
+        """Après une modification de stock, corps et ETag changent"""
+        first = client.get("/inventory")
+        client.post("/inventory/ingredients/pate/add", params={"quantity": 5})
+        second = client.get("/inventory")
+
+        assert first.headers["content-type"] == "application/json"
+        assert second.headers["etag"] != first.headers["etag"]
+        assert second.json() == inventory.get_full_inventory() != first.json()
+
+    def test_admin_orders_use_cached_summaries(self):
+        """Les colonnes contiennent les résumés des commandes, statut à jour"""
+        first, second = make_order(orders_db.next_order_id()), make_order(orders_db.next_order_id())
+        orders_db.add_many([first, second])
+        client.post(f"/admin/orders/{second.order_id}/start")
+
+        data = client.get("/admin/orders").json()
+        assert data["orders_by_status"]["pending"] == [orders_db.get_summary(first.order_id)]
+        assert data["orders_by_status"]["preparing"][0]["status"] == OrderStatus.PREPARING.value
+        assert data["counts"]["preparing"] == 1
@@ -0,0 +1,209 @@
+"""
+Tests pour la machine à états des commandes et les transitions groupées
+"""
+
+import threading
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from src.db import SQLiteOrderRepository
+from src.models import OrderAction, OrderStatus
+from src.repository import OrderRepository
+from src.transitions import ORDER_TRANSITIONS
+from src.main import app, inventory, orders_db
+from tests.fixtures import make_order
+
+client = TestClient(app)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    """Dépôt vide pour chaque implémentation"""
+    if request.param == "memory":
+        return OrderRepository()
+    return SQLiteOrderRepository(str(tmp_path / "orders.db"))
+
+
+class TestTransitionTable:
+    """Tests pour la table des transitions"""
+
+    def test_workflow_is_a_chain(self):
+        """Chaque action part du statut atteint par l'action précédente"""
+        transitions = [ORDER_TRANSITIONS[action] for action in OrderAction]
+        assert transitions[0].source == OrderStatus.PENDING
+        for previous, following in zip(transitions, transitions[1:]):
+            assert previous.target == following.source
+        assert transitions[-1].target == OrderStatus.DELIVERED
+
+
+class TestCompareAndSet:
+    """Tests pour OrderRepository.transition"""
+
+    def test_transition_applies_status_and_timestamp(self, repository):
+        """La transition change le statut, horodate et met à jour les compteurs"""
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+
+        updated, current = repository.transition(order.order_id, OrderStatus.PENDING, OrderStatus.PREPARING, "started_at")
+
+        assert current is None
+        assert updated.status == OrderStatus.PREPARING
+        assert repository.get(order.order_id).started_at is not None
+        assert repository.get_summary(order.order_id)["status"] == "preparing"
+        assert repository.count_by_status()["preparing"] == 1
+        assert repository.count_by_status()["pending"] == 0
+
+    def test_wrong_status_is_rejected(self, repository):
+        """Statut différent de celui attendu: rien n'est modifié, le statut actuel est retourné"""
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+
+        updated, current = repository.transition(order.order_id, OrderStatus.PREPARING, OrderStatus.READY_FOR_DELIVERY)
+
+        assert updated is None
+        assert current == OrderStatus.PENDING
+        assert repository.transition(999, OrderStatus.PENDING, OrderStatus.PREPARING) == (None, None)
+
+    def test_concurrent_transitions_apply_once(self, repository):
+        """Des clics simultanés ne font avancer la commande qu'une fois"""
+        order = make_order(repository.next_order_id())
+        repository.add(order)
+        results = []
+
+        def click():
+            results.append(repository.transition(order.order_id, OrderStatus.PENDING, OrderStatus.PREPARING, "started_at"))
+
+        threads = [threading.Thread(target=click) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(1 for updated, _ in results if updated is not None) == 1
+        assert repository.count_by_status()["preparing"] == 1
+
+    def test_cas_between_workers(self, tmp_path):
+        """Deux workers sur la même base: le second, au cache périmé, ne rejoue pas la transition"""
+        path = str(tmp_path / "orders.db")
+        first = SQLiteOrderRepository(path)
+        order = make_order(first.next_order_id())
+        first.add(order)
+        second = SQLiteOrderRepository(path)
+
+        assert first.transition(order.order_id, OrderStatus.PENDING, OrderStatus.PREPARING)[0] is not None
+        updated, current = second.transition(order.order_id, OrderStatus.PENDING, OrderStatus.PREPARING)
+
+        assert updated is None
+        assert current == OrderStatus.PREPARING
+        assert second.count_by_status()["preparing"] == 1
+
+
+class TestTransitionEndpoints:
+    """Tests pour les endpoints de transition"""
+
+    def setup_method(self):
+        """Vide le dépôt avant chaque test"""
+        orders_db.clear()
+
+    def add_orders(self, count: int) -> list:
+        """Ajoute des commandes en attente et retourne leurs identifiants"""
+        order_ids = []
+        for _ in range(count):
+            order = make_order(orders_db.next_order_id())
+            orders_db.add(order)
+            order_ids.append(order.order_id)
+        return order_ids
+
+    def test_single_transition(self):
+        """Les endpoints unitaires passent par la table des transitions"""
+        [order_id] = self.add_orders(1)
+
+        response = client.post(f"/admin/orders/{order_id}/start")
+        assert response.status_code == 200
+        assert response.json()["message"] == f"Préparation de la commande {order_id} commencée"
+        assert response.json()["order"]["status"] == "preparing"
+
+        response = client.post(f"/admin/orders/{order_id}/start")
+        assert response.status_code == 400
+        assert "statut actuel: preparing" in response.json()["detail"]
+
+        assert client.post("/admin/orders/999999/start").status_code == 404
+
+    def test_bulk_transition(self):
+        """Une fournée entière démarre en une requête; les commandes non éligibles sont listées"""
+        order_ids = self.add_orders(3)
+        client.post(f"/admin/orders/{order_ids[0]}/start")
+
+        response = client.post("/admin/orders:transition", json={"order_ids": order_ids + [999999], "action": "start"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [order["order_id"] for order in data["succeeded"]] == order_ids[1:]
+        assert {failure["order_id"]: failure["status_code"] for failure in data["failed"]} == {order_ids[0]: 400, 999999: 404}
+        assert orders_db.count_by_status()["preparing"] == 3
+
+    def test_bulk_transition_validation(self):
+        """Action inconnue: 422; liste vide: 400"""
+        assert client.post("/admin/orders:transition", json={"order_ids": [1], "action": "bake"}).status_code == 422
+        assert client.post("/admin/orders:transition", json={"order_ids": [], "action": "start"}).status_code == 400
+
+
+class TestCancelEndpoint:
+    """Tests pour DELETE /orders/{order_id}: la commande est conservée au statut cancelled"""
+
+    def setup_method(self):
+        """Vide le dépôt et réinitialise l'inventaire"""
+        orders_db.clear()
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def teardown_method(self):
+        inventory.ingredients = inventory.AVAILABLE_INGREDIENTS.copy()
+
+    def test_cancelled_order_is_kept(self):
+        """Annulée: lisible, filtrable par statut et comptée dans les annulations du jour"""
+        order = make_order(orders_db.next_order_id())
+        orders_db.add(order)
+        client.post(f"/admin/orders/{order.order_id}/start")
+
+        response = client.delete(f"/orders/{order.order_id}")
+        assert response.status_code == 200
+        assert response.json()["cancelled_order"]["status"] == "cancelled"
+        assert client.get(f"/orders/{order.order_id}").json()["status"] == "cancelled"
+        assert [summary["order_id"] for summary in client.get("/orders", params={"status": "cancelled"}).json()] == [order.order_id]
+
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        data = client.get("/admin/orders", params={"status": "cancelled", "since": today.isoformat()}).json()
+        assert data["counts"]["cancelled"] == 1
+        assert data["counts"]["preparing"] == 0
+
+    def test_cancel_once(self):
+        """Annulations concurrentes: une seule réussit, le stock n'est restauré qu'une fois"""
+        order = make_order(orders_db.next_order_id())
+        orders_db.add(order)
+        dough = inventory.get_ingredient_stock("pate")
+        barrier = threading.Barrier(4)
+
+        def cancel():
+            barrier.wait()
+            return client.delete(f"/orders/{order.order_id}").status_code
+
+        status_codes = []
+        threads = [threading.Thread(target=lambda: status_codes.append(cancel())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(status_codes) == [200, 400, 400, 400]
+        assert inventory.get_ingredient_stock("pate") == dough + len(order.pizzas)
+        assert orders_db.count_by_status()["cancelled"] == 1
+
+    def test_delivered_order_cannot_be_cancelled(self):
+        """Une commande livrée n'est pas annulable"""
+        order = make_order(orders_db.next_order_id())
+        order.status = OrderStatus.DELIVERED
+        orders_db.add(order)
+
+        response = client.delete(f"/orders/{order.order_id}")
+        assert response.status_code == 400
+        assert "statut actuel: delivered" in response.json()["detail"]
@@ -0,0 +1,134 @@
+"""
+Tests pour l'écrivain SQLite unique (writer.py) et les écritures qui passent par lui
+"""
+
+import sqlite3
+import threading
+import time
+import pytest
+from src import db
+from src.db import SQLiteInventoryManager, SQLiteOrderRepository
+from src.writer import SQLiteWriter, connect_readonly, get_writer
+from tests.fixtures import make_order
+
+
+@pytest.fixture
+def writer(tmp_path):
+    """Écrivain sur une base vide avec une table de test"""
+    writer = SQLiteWriter(str(tmp_path / "test.db"))
+    writer.execute(lambda conn: conn.execute("CREATE TABLE items (name TEXT PRIMARY KEY)"))
+    yield writer
+    writer.close()
+
+
+class TestSQLiteWriter:
+    """Tests pour la file de commandes et les transactions groupées"""
+
+    def test_execute_returns_result(self, writer):
+        """Le résultat de la commande est transmis à l'appelant après le commit"""
+        rowcount = writer.execute(lambda conn: conn.execute("INSERT INTO items VALUES ('a')").rowcount)
+
+        assert rowcount == 1
+        conn = connect_readonly(writer.db_path)
+        assert conn.execute("SELECT name FROM items").fetchall() == [("a",)]
+
+    def test_failing_command_is_isolated(self, writer):
+        """Une commande en échec est annulée seule: les autres commandes du groupe sont validées"""
+        blocker = threading.Event()
+        writer.submit(lambda conn: blocker.wait())
+        first = writer.submit(lambda conn: conn.execute("INSERT INTO items VALUES ('a')"))
+        duplicate = writer.submit(lambda conn: (
+            conn.execute("INSERT INTO items VALUES ('b')"),
+            conn.execute("INSERT INTO items VALUES ('a')"),
+        ))
+        last = writer.submit(lambda conn: conn.execute("INSERT INTO items VALUES ('c')"))
+        blocker.set()
+
+        first.result()
+        last.result()
+        with pytest.raises(sqlite3.IntegrityError):
+            duplicate.result()
+        conn = connect_readonly(writer.db_path)
+        assert conn.execute("SELECT name FROM items ORDER BY name").fetchall() == [("a",), ("c",)]
+
+    def test_pending_commands_are_batched(self, writer):
+        """Les commandes en attente sont validées dans une seule transaction"""
+        before = writer.transactions
+        blocker = threading.Event()
+        writer.submit(lambda conn: blocker.wait())
+        futures = [
+            writer.submit(lambda conn, name=name: conn.execute("INSERT INTO items VALUES (?)", (name,)))
+            for name in "abcde"
+        ]
+        blocker.set()
+        for future in futures:
+            future.result()
+
+        # La commande bloquante, puis au plus une transaction pour les cinq insertions
+        assert writer.transactions - before <= 2
+
+    def test_readonly_connection_rejects_writes(self, writer):
+        """Les connexions de lecture refusent toute écriture"""
+        conn = connect_readonly(writer.db_path)
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO items VALUES ('a')")
+
+    def test_concurrent_writers(self, tmp_path):
+        """Écritures depuis de nombreux threads: aucune erreur de verrou, aucune perte"""
+        repository = SQLiteOrderRepository(str(tmp_path / "orders.db"))
+        errors = []
+
+        def place_orders():
+            try:
+                for _ in range(20):
+                    repository.add(make_order(repository.next_order_id()))
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=place_orders) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(repository) == 160
+        assert len(SQLiteOrderRepository(str(tmp_path / "orders.db"))) == 160
+
+    def test_one_writer_per_database(self, tmp_path):
+        """Les composants d'une même base partagent son écrivain"""
+        path = str(tmp_path / "shared.db")
+        assert get_writer(path) is get_writer(path)
+
+
+class TestSQLiteInventoryPersistence:
+    """Tests pour la persistance de l'inventaire via l'écrivain"""
+
+    def test_stock_changes_are_persisted(self, tmp_path, monkeypatch):
+        """Réservations et réapprovisionnements survivent à un rechargement"""
+        monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "inventory.db"))
+        inventory = SQLiteInventoryManager()
+        inventory.reduce_inventory(make_order(1).pizzas)
+        inventory.add_ingredient_stock("olives", 5)
+        inventory.flush()
+
+        reloaded = SQLiteInventoryManager()
+        assert reloaded.ingredients == inventory.ingredients
+        assert reloaded.ingredients["olives"] == inventory.AVAILABLE_INGREDIENTS["olives"] + 5
+
+    def test_failed_write_is_retried(self, tmp_path, monkeypatch, caplog):
+        """Une écriture du stock échouée est journalisée puis retentée sans autre changement de stock"""
+        monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "inventory.db"))
+        monkeypatch.setattr(SQLiteInventoryManager, "WRITE_RETRY_SECONDS", 0.05)
+        inventory = SQLiteInventoryManager()
+        inventory.UPSERT_SQL = "INSERT INTO missing_table VALUES (?, ?)"
+        inventory.add_ingredient_stock("olives", 5)
+        deadline = time.monotonic() + 5
+        while "Erreur lors de la sauvegarde du stock" not in caplog.text:
+            assert time.monotonic() < deadline, "erreur non journalisée"
+            time.sleep(0.01)
+
+        del inventory.UPSERT_SQL  # la base accepte de nouveau les écritures
+        while SQLiteInventoryManager().ingredients["olives"] != inventory.ingredients["olives"]:
+            assert time.monotonic() < deadline, "écriture jamais retentée"
+            time.sleep(0.02)